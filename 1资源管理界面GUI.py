@@ -4,10 +4,39 @@
 """
 
 import os
+import io
 import csv
+import copy
+import gzip
 import json
+import time
+import shutil
+import sqlite3
+import hashlib
+import functools
+import threading
 from pathlib import Path
-from flask import Flask, render_template_string, jsonify, request, send_from_directory
+from collections import OrderedDict
+from flask import Flask, render_template_string, jsonify, request, send_from_directory, send_file, redirect, url_for, make_response
+
+from extract_manifest import load_folder_index
+
+try:
+    from PIL import Image, features
+except ImportError:
+    Image = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
 
 app = Flask(__name__)
 
@@ -15,8 +44,18 @@ app = Flask(__name__)
 BASE_DIR = Path(__file__).parent
 DATA_DIR = BASE_DIR / "MW数据站爬虫" / "爬取数据"
 IMAGE_DIR = BASE_DIR / "MW解包有益资源" / "contentseparated_assets_content" / "textures" / "sprites"
+COMMON_ITEMS_DIR = BASE_DIR / "MW解包有益资源" / "common-items"
 NEW_DATA_CONFIG_FILE = BASE_DIR / "新数据管理.json"
+NEW_DATA_DB_FILE = BASE_DIR / "新数据管理.db"
+ACTIVITY_DATA_DIR = BASE_DIR / "MW数据站爬虫" / "抽奖物品数据"
+
+# 每个活动保留的历史版本数
+ACTIVITY_HISTORY_COUNT = 5
 ITEM_TYPE_MAPPING_FILE = BASE_DIR / "物品类型映射.json"
+THUMBNAIL_CACHE_DIR = BASE_DIR / "缩略图缓存"
+
+# 缩略图缓存容量上限（字节）
+THUMBNAIL_CACHE_MAX_BYTES = 512 * 1024 * 1024
 
 # 分类与图片目录映射
 CATEGORY_IMAGE_MAP = {
@@ -58,63 +97,720 @@ def load_item_type_mappings():
         print(f"Error loading item type mappings: {e}")
         return {"common_items": [], "category_mappings": {}}
 
-def load_new_data_config():
-    """加载新数据管理配置"""
-    if not NEW_DATA_CONFIG_FILE.exists():
-        return {"excluded_items": [], "recorded_items": []}
-
+# ==================== 安全写入 ====================
+
+class FileLock:
+    """单个文件的写锁：进程内用线程锁，跨进程用 <文件>.lock 独占创建
+
+    超过 stale_seconds 未释放的锁文件视为进程崩溃遗留，会被清理。
+    """
+
+    _thread_locks = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, path, timeout=10.0, stale_seconds=30.0):
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(self.path.name + '.lock')
+        self.timeout = timeout
+        self.stale_seconds = stale_seconds
+        key = os.path.normcase(os.path.abspath(self.path))
+        with FileLock._registry_lock:
+            self._thread_lock = FileLock._thread_locks.setdefault(key, threading.Lock())
+
+    def __enter__(self):
+        if not self._thread_lock.acquire(timeout=self.timeout):
+            raise TimeoutError(f"等待文件锁超时: {self.path}")
+
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                fd = os.open(self.lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.write(fd, str(os.getpid()).encode())
+                os.close(fd)
+                return self
+            except FileExistsError:
+                try:
+                    if time.time() - os.stat(self.lock_path).st_mtime > self.stale_seconds:
+                        os.remove(self.lock_path)
+                        continue
+                except OSError:
+                    continue
+                if time.monotonic() > deadline:
+                    self._thread_lock.release()
+                    raise TimeoutError(f"等待文件锁超时: {self.path}")
+                time.sleep(0.05)
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            os.remove(self.lock_path)
+        except OSError:
+            pass
+        self._thread_lock.release()
+
+def atomic_write_json(path, data):
+    """写入临时文件并fsync后用 os.replace 替换，崩溃时不会留下半截文件"""
+    path = Path(path)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
     try:
-        with open(NEW_DATA_CONFIG_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except Exception as e:
-        print(f"Error loading new data config: {e}")
-        return {"excluded_items": [], "recorded_items": []}
-
-def save_new_data_config(config):
-    """保存新数据管理配置"""
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def file_version(path):
+    """文件内容版本号（内容哈希），文件不存在返回None"""
     try:
-        with open(NEW_DATA_CONFIG_FILE, 'w', encoding='utf-8') as f:
-            json.dump(config, f, ensure_ascii=False, indent=2)
+        with open(path, 'rb') as f:
+            return hashlib.sha1(f.read()).hexdigest()[:16]
+    except FileNotFoundError:
+        return None
+
+# ==================== 新数据管理存储 ====================
+
+# 已录入数据的标准字段（按JSON导出时的顺序）
+RECORDED_ITEM_FIELDS = ('id', 'name_cn', 'name_en', 'type', 'category', 'added_date', 'folder', 'rarity')
+
+class NewDataStore:
+    """新数据管理的SQLite存储（WAL模式）
+
+    排除项和已录入数据分别建表，ID/月份有索引，增删改都在事务中完成，
+    并发点击不会相互覆盖。数据库为空时自动从 新数据管理.json 导入一次；
+    每次修改后把完整数据导出回JSON（原子替换），供下游工具继续读取。
+    """
+
+    def __init__(self, db_path, json_path):
+        self.db_path = Path(db_path)
+        self.json_path = Path(json_path)
+        self._lock = threading.Lock()
+        # 导出串行执行: 快照和写文件在同一把锁内，后导出的一定是更新的数据
+        self._export_lock = threading.Lock()
+        self._conn = None
+
+        # 多进程服务器fork后，子进程不能复用父进程的SQLite连接
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def _reset_after_fork(self):
+        self._lock = threading.Lock()
+        self._export_lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS excluded_items (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    id TEXT NOT NULL UNIQUE,
+                    id_lower TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_excluded_id_lower ON excluded_items(id_lower);
+
+                CREATE TABLE IF NOT EXISTS recorded_items (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    id TEXT NOT NULL UNIQUE,
+                    name_cn TEXT,
+                    name_en TEXT,
+                    type TEXT,
+                    category TEXT,
+                    added_date TEXT,
+                    folder TEXT,
+                    rarity TEXT,
+                    extra TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_recorded_added_date ON recorded_items(added_date);
+
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                );
+            """)
+            self._conn = conn
+            self._import_json_once()
+        return self._conn
+
+    def _import_json_once(self):
+        """数据库首次创建时导入现有的JSON配置"""
+        conn = self._conn
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'json_imported'").fetchone():
+            return
+
+        config = {"excluded_items": [], "recorded_items": []}
+        if self.json_path.exists():
+            try:
+                with open(self.json_path, 'r', encoding='utf-8') as f:
+                    config = json.load(f)
+            except Exception as e:
+                print(f"Error loading new data config: {e}")
+
+        with conn:
+            for item_id in config.get('excluded_items', []):
+                conn.execute("INSERT OR IGNORE INTO excluded_items (id, id_lower) VALUES (?, ?)",
+                             (item_id, item_id.lower()))
+            for item in config.get('recorded_items', []):
+                if item.get('id'):
+                    self._insert_recorded(conn, item)
+            conn.execute("INSERT INTO meta (key, value) VALUES ('json_imported', ?)",
+                         (time.strftime('%Y-%m-%d %H:%M:%S'),))
+
+        print(f"已从 {self.json_path.name} 导入 {len(config.get('excluded_items', []))} 个排除项、"
+              f"{len(config.get('recorded_items', []))} 条已录入数据")
+
+    @staticmethod
+    def _insert_recorded(conn, item):
+        extra = {k: v for k, v in item.items() if k not in RECORDED_ITEM_FIELDS}
+        conn.execute(
+            "INSERT OR IGNORE INTO recorded_items (id, name_cn, name_en, type, category, added_date, folder, rarity, extra) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            tuple(item.get(field) for field in RECORDED_ITEM_FIELDS) + (json.dumps(extra, ensure_ascii=False) if extra else None,)
+        )
+
+    @staticmethod
+    def _row_to_item(row):
+        """数据库行转回JSON格式（缺失的字段不输出，与原文件保持一致）"""
+        item = {field: row[field] for field in RECORDED_ITEM_FIELDS if row[field] is not None}
+        if row['extra']:
+            item.update(json.loads(row['extra']))
+        return item
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._connect().execute(sql, params).fetchall()
+
+    def excluded_ids(self):
+        """所有排除项（含小写版本）的集合"""
+        ids = set()
+        for row in self._query("SELECT id, id_lower FROM excluded_items"):
+            ids.add(row['id'])
+            ids.add(row['id_lower'])
+        return ids
+
+    def recorded_ids(self):
+        """所有已录入ID（含小写版本）的集合"""
+        ids = set()
+        for row in self._query("SELECT id FROM recorded_items"):
+            ids.add(row['id'])
+            ids.add(row['id'].lower())
+        return ids
+
+    def recorded_items(self, month=None):
+        """已录入数据（按录入顺序），可按月份过滤"""
+        if month is None:
+            rows = self._query("SELECT * FROM recorded_items ORDER BY seq")
+        else:
+            rows = self._query("SELECT * FROM recorded_items WHERE added_date = ? ORDER BY seq", (month,))
+        return [self._row_to_item(row) for row in rows]
+
+    def recorded_month_counts(self):
+        """按月份统计已录入数量，缺少月份的计入 未知"""
+        rows = self._query("SELECT COALESCE(added_date, '未知') AS month, COUNT(*) AS n FROM recorded_items GROUP BY month")
+        return {row['month']: row['n'] for row in rows}
+
+    def add_excluded(self, item_id):
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                cursor = conn.execute("INSERT OR IGNORE INTO excluded_items (id, id_lower) VALUES (?, ?)",
+                                      (item_id, item_id.lower()))
+        if cursor.rowcount:
+            self.export_json()
+
+    def remove_excluded(self, item_id):
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                cursor = conn.execute("DELETE FROM excluded_items WHERE id = ?", (item_id,))
+        if cursor.rowcount:
+            self.export_json()
+
+    def add_recorded(self, item):
+        """录入新数据，ID已存在时返回False"""
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                if conn.execute("SELECT 1 FROM recorded_items WHERE id = ?", (item['id'],)).fetchone():
+                    return False
+                self._insert_recorded(conn, item)
+        self.export_json()
         return True
-    except Exception as e:
-        print(f"Error saving new data config: {e}")
-        return False
 
-def get_all_csv_ids():
-    """获取所有CSV中的ID集合"""
-    all_ids = set()
-    exclude_files = {"活动.csv", "战斗通行证.csv"}
+    def to_config(self):
+        """导出为原 新数据管理.json 的格式"""
+        excluded = [row['id'] for row in self._query("SELECT id FROM excluded_items ORDER BY seq")]
+        return {"excluded_items": excluded, "recorded_items": self.recorded_items()}
+
+    def export_json(self):
+        """把当前数据原子写回JSON文件（在文件锁内读取快照，避免较旧的快照覆盖较新的）"""
+        try:
+            with self._export_lock, FileLock(self.json_path):
+                atomic_write_json(self.json_path, self.to_config())
+            return True
+        except Exception as e:
+            print(f"Error saving new data config: {e}")
+            return False
 
-    for root, dirs, files in os.walk(DATA_DIR):
-        for file in files:
-            if file.endswith('.csv') and file not in exclude_files:
-                csv_path = Path(root) / file
+new_data_store = NewDataStore(NEW_DATA_DB_FILE, NEW_DATA_CONFIG_FILE)
+
+def load_new_data_config():
+    """加载新数据管理配置"""
+    return new_data_store.to_config()
+
+def read_csv_rows(csv_path):
+    """读取CSV的所有行"""
+    with open(csv_path, 'r', encoding='utf-8-sig') as f:
+        return list(csv.DictReader(f))
+
+# ==================== CSV目录索引 ====================
+
+# 不参与分类树和ID比对的CSV
+CSV_EXCLUDE_FILES = {"活动.csv", "战斗通行证.csv"}
+
+class CsvCatalog:
+    """进程级CSV目录索引
+
+    启动时完整构建一次，之后只对文件做stat：mtime/大小变化的CSV才会重新解析，
+    新增或删除的CSV会同步到分类树和ID集合中，无需重启Flask。
+    """
+
+    def __init__(self, data_dir, exclude_files=CSV_EXCLUDE_FILES):
+        self.data_dir = Path(data_dir)
+        self.exclude_files = set(exclude_files)
+        self.version = 0
+        # 有文件监听器时只在收到变更通知后刷新，否则每次访问都stat一遍
+        self.watched = False
+        self._dirty = True
+        self._lock = threading.Lock()
+        self._files = {}  # csv_path -> {"stat", "parent", "name", "rows", "ids"}
+        self._tree = {}
+        self._ids = set()
+        self._lower_ids = set()
+
+    def _list_csv_files(self):
+        """遍历数据目录，返回 {csv_path: (父目录, 文件名, (mtime_ns, size))}"""
+        listing = {}
+        for root, dirs, files in os.walk(self.data_dir):
+            rel_path = str(Path(root).relative_to(self.data_dir))
+            for file in files:
+                if not file.endswith('.csv') or file in self.exclude_files:
+                    continue
+                csv_path = str(Path(root) / file)
                 try:
-                    with open(csv_path, 'r', encoding='utf-8-sig') as f:
-                        reader = csv.DictReader(f)
-                        for row in reader:
-                            item_id = row.get('id', '')
-                            if item_id:
-                                all_ids.add(item_id)
-                                all_ids.add(item_id.lower())  # 同时添加小写版本
-                except Exception as e:
-                    print(f"Error reading {csv_path}: {e}")
+                    st = os.stat(csv_path)
+                except OSError:
+                    continue
+                listing[csv_path] = (rel_path, file, (st.st_mtime_ns, st.st_size))
+        return listing
+
+    def _load_entry(self, csv_path, parent, file, stat):
+        try:
+            rows = read_csv_rows(csv_path)
+        except Exception as e:
+            print(f"Error reading {csv_path}: {e}")
+            rows = []
+        ids = {row.get('id', '') for row in rows} - {''}
+        return {"stat": stat, "parent": parent, "name": file, "rows": rows, "ids": ids}
+
+    def refresh(self):
+        """检查所有CSV的状态，只重新加载有变化的文件；返回索引是否发生变化"""
+        self._dirty = False
+        listing = self._list_csv_files()
+
+        with self._lock:
+            changed = listing.keys() != self._files.keys()
+            files = {}
+            for csv_path, (parent, file, stat) in listing.items():
+                entry = self._files.get(csv_path)
+                if entry is None or entry["stat"] != stat:
+                    entry = self._load_entry(csv_path, parent, file, stat)
+                    changed = True
+                files[csv_path] = entry
+
+            if changed:
+                self._files = files
+                self._rebuild()
+                self.version += 1
+
+        return changed
+
+    def _rebuild(self):
+        """由缓存的文件条目重建分类树和ID集合"""
+        tree = {}
+        ids = set()
+
+        for csv_path, entry in self._files.items():
+            ids.update(entry["ids"])
+            parent = entry["parent"]
+            name = entry["name"].replace('.csv', '')
+
+            if parent == ".":
+                # 根目录的CSV
+                if name not in tree:
+                    tree[name] = {
+                        "name": name,
+                        "path": csv_path,
+                        "subcategories": []
+                    }
+            else:
+                # 子目录的CSV
+                if parent not in tree:
+                    tree[parent] = {
+                        "name": parent,
+                        "path": None,
+                        "subcategories": []
+                    }
+                tree[parent]["subcategories"].append({
+                    "name": name,
+                    "path": csv_path,
+                    "parent": parent
+                })
+
+        self._tree = tree
+        self._ids = ids
+        self._lower_ids = {item_id.lower() for item_id in ids}
+
+    def mark_dirty(self):
+        """文件监听器通知CSV有变化，下次访问时刷新"""
+        self._dirty = True
+
+    def _ensure_fresh(self):
+        if not self.watched or self._dirty:
+            self.refresh()
+
+    def current_version(self):
+        """刷新后返回索引版本号（任何CSV变化都会递增）"""
+        self._ensure_fresh()
+        return self.version
+
+    def _refresh_file(self, csv_path):
+        """只检查单个CSV文件，有变化时重新解析"""
+        if self.watched:
+            self._ensure_fresh()
+            with self._lock:
+                return self._files.get(csv_path)
+
+        try:
+            st = os.stat(csv_path)
+        except OSError:
+            return None
+
+        stat = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            entry = self._files.get(csv_path)
+            if entry is not None and entry["stat"] == stat:
+                return entry
+
+        if entry is None:
+            # 不在索引中的CSV（例如被排除的文件），不缓存
+            return None
+
+        # 文件有变化，交给完整刷新处理（顺带更新ID集合）
+        self.refresh()
+        with self._lock:
+            return self._files.get(csv_path)
+
+    def category_tree(self):
+        """返回CSV分类树（副本，调用方可自由修改）"""
+        self._ensure_fresh()
+        with self._lock:
+            return copy.deepcopy(self._tree)
+
+    def get_rows(self, csv_path):
+        """返回CSV的所有行（共享缓存，调用方不应修改）；不在索引中的文件返回None"""
+        entry = self._refresh_file(str(csv_path))
+        return entry["rows"] if entry is not None else None
+
+    def all_ids(self):
+        """返回所有CSV ID（含小写版本）的集合副本"""
+        self._ensure_fresh()
+        with self._lock:
+            return self._ids | self._lower_ids
+
+csv_catalog = CsvCatalog(DATA_DIR)
+
+# ==================== 图片目录索引 ====================
+
+class ImageIndex:
+    """图片目录索引：{目录: {小写文件名: 实际文件名}}
+
+    索引各根目录本身及其直接子目录中的PNG，查找时不区分大小写，
+    列表接口只做字典查询，不再逐个 Path.exists()。
+    没有文件监听器时，最多每 poll_interval 秒按目录mtime检查一次变化。
+    """
+
+    def __init__(self, base_dir, roots, poll_interval=1.0):
+        self.base_dir = Path(base_dir)
+        self.roots = [Path(root) for root in roots]
+        self.poll_interval = poll_interval
+        self.watched = False
+        self.version = 0
+        self._lock = threading.Lock()
+        self._dirs = {}  # 目录key -> {"path", "rel", "mtime", "names"}
+        self._last_poll = None
+
+    @staticmethod
+    def _key(path):
+        return os.path.normcase(os.path.abspath(path))
+
+    def _candidate_dirs(self):
+        """根目录及其直接子目录"""
+        dirs = []
+        for root in self.roots:
+            if not root.is_dir():
+                continue
+            dirs.append(root)
+            try:
+                with os.scandir(root) as it:
+                    dirs.extend(Path(entry.path) for entry in it if entry.is_dir())
+            except OSError:
+                continue
+        return dirs
+
+    def _scan_dir(self, directory):
+        """
+        读取单个目录，返回 (mtime_ns, {小写文件名: 实际文件名})
+        提取脚本写出的 _index.json 仍有效时直接读索引（一次读取），否则列目录
+        """
+        names = {}
+        mtime = os.stat(directory).st_mtime_ns
+        indexed = load_folder_index(directory)
+        if indexed is not None:
+            for name in indexed:
+                if name.lower().endswith('.png'):
+                    names[name.lower()] = name
+            return mtime, names
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.name.lower().endswith('.png') and entry.is_file():
+                    names[entry.name.lower()] = entry.name
+        return mtime, names
+
+    def _store_dir(self, directory, mtime, names):
+        key = self._key(directory)
+        try:
+            rel = str(Path(directory).relative_to(self.base_dir))
+        except ValueError:
+            rel = str(directory)
+        self._dirs[key] = {"path": Path(directory), "rel": rel, "mtime": mtime, "names": names}
+
+    def poll(self):
+        """按目录mtime检查变化，只重新读取有变化的目录；返回有变化的目录数"""
+        changed = 0
+        seen = set()
+        for directory in self._candidate_dirs():
+            key = self._key(directory)
+            seen.add(key)
+            try:
+                mtime = os.stat(directory).st_mtime_ns
+            except OSError:
+                continue
+            with self._lock:
+                entry = self._dirs.get(key)
+                if entry is not None and entry["mtime"] == mtime:
+                    continue
+            try:
+                mtime, names = self._scan_dir(directory)
+            except OSError:
+                continue
+            with self._lock:
+                self._store_dir(directory, mtime, names)
+            changed += 1
+
+        with self._lock:
+            for key in list(self._dirs):
+                if key not in seen:
+                    del self._dirs[key]
+                    changed += 1
+            if changed:
+                self.version += 1
+            self._last_poll = time.monotonic()
+        return changed
+
+    def _ensure_fresh(self):
+        if self._last_poll is None:
+            self.poll()
+        elif not self.watched and time.monotonic() - self._last_poll >= self.poll_interval:
+            self.poll()
+
+    def apply_event(self, path, added):
+        """监听器回调：增量更新单个文件（新增或删除）"""
+        path = Path(path)
+        if not path.name.lower().endswith('.png'):
+            return
+        key = self._key(path.parent)
+        with self._lock:
+            entry = self._dirs.get(key)
+            if entry is None:
+                # 不在索引范围内的目录（新目录由 apply_dir_event 处理）
+                return
+            if added:
+                entry["names"][path.name.lower()] = path.name
+            else:
+                entry["names"].pop(path.name.lower(), None)
+            self.version += 1
+
+    def apply_dir_event(self, path):
+        """监听器回调：目录新增/删除/移动，重新读取该目录"""
+        path = Path(path)
+        key = self._key(path)
+        if path.is_dir():
+            try:
+                mtime, names = self._scan_dir(path)
+            except OSError:
+                return
+            root_keys = {self._key(root) for root in self.roots}
+            if key in root_keys or self._key(path.parent) in root_keys:
+                with self._lock:
+                    self._store_dir(path, mtime, names)
+                    self.version += 1
+        else:
+            with self._lock:
+                if self._dirs.pop(key, None) is not None:
+                    self.version += 1
+
+    def current_version(self):
+        """刷新后返回索引版本号（任何目录内容变化都会递增）"""
+        self._ensure_fresh()
+        return self.version
+
+    def has_dir(self, directory):
+        self._ensure_fresh()
+        with self._lock:
+            return self._key(directory) in self._dirs
+
+    def find(self, directory, filename):
+        """不区分大小写查找图片，返回相对BASE_DIR的路径，找不到返回None"""
+        self._ensure_fresh()
+        with self._lock:
+            entry = self._dirs.get(self._key(directory))
+            if entry is None:
+                return None
+            name = entry["names"].get(filename.lower())
+            if name is None:
+                return None
+            return os.path.join(entry["rel"], name)
+
+    def list_pngs(self, directory):
+        """返回目录中所有PNG的实际文件名"""
+        self._ensure_fresh()
+        with self._lock:
+            entry = self._dirs.get(self._key(directory))
+            return list(entry["names"].values()) if entry is not None else []
+
+image_index = ImageIndex(BASE_DIR, [IMAGE_DIR, COMMON_ITEMS_DIR])
+
+class _IndexEventHandler(FileSystemEventHandler):
+    """watchdog事件处理：PNG增删增量更新图片索引，CSV变化通知目录索引"""
+
+    def __init__(self, image_index, catalog):
+        super().__init__()
+        self.image_index = image_index
+        self.catalog = catalog
+
+    def on_any_event(self, event):
+        if event.event_type not in ("created", "deleted", "moved", "modified"):
+            return
+
+        src_path = os.fsdecode(event.src_path)
+        dest_path = os.fsdecode(getattr(event, 'dest_path', '') or '')
+
+        if any(p.lower().endswith('.csv') for p in (src_path, dest_path) if p):
+            self.catalog.mark_dirty()
+            return
+
+        if event.is_directory:
+            if event.event_type != "modified":
+                self.image_index.apply_dir_event(src_path)
+                if dest_path:
+                    self.image_index.apply_dir_event(dest_path)
+            return
+
+        if event.event_type == "created":
+            self.image_index.apply_event(src_path, added=True)
+        elif event.event_type == "deleted":
+            self.image_index.apply_event(src_path, added=False)
+        elif event.event_type == "moved":
+            self.image_index.apply_event(src_path, added=False)
+            self.image_index.apply_event(dest_path, added=True)
+
+class IndexWatcher:
+    """后台维护图片索引和CSV目录索引
+
+    安装了 watchdog 时使用系统文件通知（inotify等）增量更新；
+    否则退化为后台线程按目录mtime轮询。
+    """
+
+    def __init__(self, image_index, catalog, poll_interval=2.0):
+        self.image_index = image_index
+        self.catalog = catalog
+        self.poll_interval = poll_interval
+        self._observer = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        self.image_index.poll()
+        self.catalog.refresh()
+
+        if Observer is not None:
+            handler = _IndexEventHandler(self.image_index, self.catalog)
+            self._observer = Observer()
+            for root in self.image_index.roots:
+                if root.is_dir():
+                    self._observer.schedule(handler, str(root), recursive=True)
+            if self.catalog.data_dir.is_dir():
+                self._observer.schedule(handler, str(self.catalog.data_dir), recursive=True)
+                self.catalog.watched = True
+            self._observer.daemon = True
+            self._observer.start()
+            mode = "watchdog"
+        else:
+            self._thread = threading.Thread(target=self._poll_loop, name="index-poller", daemon=True)
+            self._thread.start()
+            mode = f"轮询 ({self.poll_interval}s)"
+
+        self.image_index.watched = True
+        return mode
+
+    def _poll_loop(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.image_index.poll()
+            except Exception as e:
+                print(f"Error polling image index: {e}")
+
+    def stop(self):
+        self._stop.set()
+        self.image_index.watched = False
+        self.catalog.watched = False
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+
+index_watcher = IndexWatcher(image_index, csv_catalog)
+
+def get_all_csv_ids():
+    """获取所有CSV中的ID集合"""
+    all_ids = csv_catalog.all_ids()
 
     # 添加已录入的新数据ID（这些不应该在"新数据"区显示）
-    config = load_new_data_config()
-    for recorded_item in config.get('recorded_items', []):
-        item_id = recorded_item.get('id', '')
-        if item_id:
-            all_ids.add(item_id)
-            all_ids.add(item_id.lower())
+    all_ids.update(new_data_store.recorded_ids())
 
     return all_ids
 
 def scan_new_data():
     """扫描图片目录，找出CSV中不存在的新数据，按文件夹分类"""
     csv_ids = get_all_csv_ids()
-    config = load_new_data_config()
-    excluded_ids = set(config.get('excluded_items', []))
+    excluded_ids = new_data_store.excluded_ids()
     new_items_by_folder = {}
 
     # 图片目录与友好名称映射（移除currency、titles）
@@ -129,16 +825,16 @@ def scan_new_data():
     # 扫描每个图片目录
     for folder_name, friendly_name in folder_friendly_names.items():
         folder_path = IMAGE_DIR / folder_name
-        if not folder_path.exists():
+        if not image_index.has_dir(folder_path):
             continue
 
         folder_items = []
-        for png_file in folder_path.glob("*.png"):
-            # 跳过缩略图
-            if "_Thumbnail" in png_file.stem:
-                continue
+        for png_name in image_index.list_pngs(folder_path):
+            item_id = png_name[:-len('.png')]
 
-            item_id = png_file.stem
+            # 跳过缩略图和图集页（sactx-N-2048x2048-...）
+            if "_Thumbnail" in item_id or item_id.startswith("sactx-"):
+                continue
 
             # 跳过被排除的项目
             if item_id in excluded_ids or item_id.lower() in excluded_ids:
@@ -150,7 +846,7 @@ def scan_new_data():
                     "id": item_id,
                     "folder": folder_name,
                     "folder_name": friendly_name,
-                    "image_path": str(png_file.relative_to(BASE_DIR))
+                    "image_path": image_index.find(folder_path, png_name)
                 })
 
         if folder_items:
@@ -163,43 +859,7 @@ def scan_new_data():
 
 def scan_csv_structure():
     """扫描CSV文件结构，构建分类树"""
-    categories = {}
-
-    # 排除的文件
-    exclude_files = {"活动.csv", "战斗通行证.csv"}
-
-    for root, dirs, files in os.walk(DATA_DIR):
-        rel_path = Path(root).relative_to(DATA_DIR)
-
-        for file in files:
-            if file.endswith('.csv') and file not in exclude_files:
-                # 获取分类名
-                if str(rel_path) == ".":
-                    # 根目录的CSV
-                    category_name = file.replace('.csv', '')
-                    if category_name not in categories:
-                        categories[category_name] = {
-                            "name": category_name,
-                            "path": str(Path(root) / file),
-                            "subcategories": []
-                        }
-                else:
-                    # 子目录的CSV
-                    parent = str(rel_path)
-                    subcategory = file.replace('.csv', '')
-
-                    if parent not in categories:
-                        categories[parent] = {
-                            "name": parent,
-                            "path": None,
-                            "subcategories": []
-                        }
-
-                    categories[parent]["subcategories"].append({
-                        "name": subcategory,
-                        "path": str(Path(root) / file),
-                        "parent": parent
-                    })
+    categories = csv_catalog.category_tree()
 
     # 添加"新数据"分类（带子分类）
     new_items_by_folder = scan_new_data()
@@ -223,30 +883,20 @@ def scan_csv_structure():
         }
 
     # 添加"已录入数据"分类（按月份分组）
-    config = load_new_data_config()
-    recorded_items = config.get('recorded_items', [])
-    if recorded_items:
-        # 按月份分组
-        by_month = {}
-        for item in recorded_items:
-            month = item.get('added_date', '未知')
-            if month not in by_month:
-                by_month[month] = []
-            by_month[month].append(item)
-
+    month_counts = new_data_store.recorded_month_counts()
+    if month_counts:
         # 创建子分类
         subcategories = []
-        for month in sorted(by_month.keys(), reverse=True):  # 最新月份在前
-            items = by_month[month]
+        for month in sorted(month_counts.keys(), reverse=True):  # 最新月份在前
             subcategories.append({
-                "name": f"{month} ({len(items)})",
+                "name": f"{month} ({month_counts[month]})",
                 "path": f"__recorded_data__{month}",  # 特殊标识加月份
                 "parent": "已录入数据",
                 "month": month
             })
 
         categories["已录入数据"] = {
-            "name": f"已录入数据 ({len(recorded_items)})",
+            "name": f"已录入数据 ({sum(month_counts.values())})",
             "path": None,
             "subcategories": subcategories,
             "is_recorded_data": True
@@ -256,17 +906,19 @@ def scan_csv_structure():
 
 def load_csv_data(csv_path):
     """加载CSV数据"""
-    items = []
+    if not csv_path:
+        return []
+
+    # 优先使用目录索引中的缓存
+    rows = csv_catalog.get_rows(csv_path)
+    if rows is not None:
+        return rows
 
     try:
-        with open(csv_path, 'r', encoding='utf-8-sig') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                items.append(row)
+        return read_csv_rows(csv_path)
     except Exception as e:
         print(f"Error loading {csv_path}: {e}")
-
-    return items
+        return []
 
 def check_image_exists(item_id, category_name):
     """检查图片是否存在"""
@@ -285,18 +937,13 @@ def check_image_exists(item_id, category_name):
 
     image_dir = IMAGE_DIR / image_folder
 
-    if not image_dir.exists():
+    if not image_index.has_dir(image_dir):
         return None, None
 
-    # 检查PNG文件
-    image_path = image_dir / f"{item_id}.png"
-    if image_path.exists():
-        return str(image_path.relative_to(BASE_DIR)), True
-
-    # 检查小写
-    image_path_lower = image_dir / f"{item_id.lower()}.png"
-    if image_path_lower.exists():
-        return str(image_path_lower.relative_to(BASE_DIR)), True
+    # 检查PNG文件（索引查找不区分大小写）
+    image_path = image_index.find(image_dir, f"{item_id}.png")
+    if image_path:
+        return image_path, True
 
     return None, False
 
@@ -312,7 +959,7 @@ def generate_item_image_path(item_id, item_type, activity_id=None):
         # 资源类物品需要检查currency和common-items目录
         image_folders = [
             IMAGE_DIR / "currency",
-            BASE_DIR / "MW解包有益资源" / "common-items"
+            COMMON_ITEMS_DIR
         ]
     else:
         # 其他类型使用映射表
@@ -328,27 +975,382 @@ def generate_item_image_path(item_id, item_type, activity_id=None):
 
     # 在所有可能的目录中查找图片
     for image_dir in image_folders:
-        if not image_dir.exists():
+        if not image_index.has_dir(image_dir):
             continue
 
         # 如果是特殊货币且有活动ID，使用 {item_id}_{activity_id}.png 格式
         if item_id in special_currency_ids and activity_id:
-            special_image_path = image_dir / f"{item_id}_{activity_id}.png"
-            if special_image_path.exists():
-                return str(special_image_path.relative_to(BASE_DIR))
+            special_image_path = image_index.find(image_dir, f"{item_id}_{activity_id}.png")
+            if special_image_path:
+                return special_image_path
 
-        # 检查PNG文件（普通格式）
-        image_path = image_dir / f"{item_id}.png"
-        if image_path.exists():
-            return str(image_path.relative_to(BASE_DIR))
-
-        # 检查小写
-        image_path_lower = image_dir / f"{item_id.lower()}.png"
-        if image_path_lower.exists():
-            return str(image_path_lower.relative_to(BASE_DIR))
+        # 检查PNG文件（索引查找不区分大小写）
+        image_path = image_index.find(image_dir, f"{item_id}.png")
+        if image_path:
+            return image_path
 
     return None
 
+# ==================== 物品列表查询 ====================
+
+# 稀有度排序权重（与前端 normalizeRarity 的取值一致）
+RARITY_ORDER = {"legendary": 3, "epic": 2, "rare": 1, "common": 0}
+
+# 单次请求最多返回的物品数
+MAX_ITEMS_PAGE_SIZE = 500
+
+def normalize_rarity(rarity):
+    """稀有度统一为 legendary/epic/rare/common（支持中英文）"""
+    if not rarity:
+        return "common"
+    rarity_lower = rarity.lower()
+    if rarity_lower in RARITY_ORDER:
+        return rarity_lower
+    if '传说' in rarity:
+        return "legendary"
+    if '史诗' in rarity:
+        return "epic"
+    if '稀有' in rarity:
+        return "rare"
+    return "common"
+
+def build_item_entry(item):
+    """为 /api/items 的结果项预先计算搜索、筛选和排序用的字段"""
+    data = item['data']
+    name = data.get('name') or data.get('name_en') or item['id']
+    return {
+        "item": item,
+        "search": "\n".join((data.get('name') or '', data.get('name_en') or '', item['id'])).lower(),
+        "name": name.lower(),
+        "id": item['id'].lower(),
+        "rarity": normalize_rarity(data.get('rarityTypeString', '')),
+        "type": data.get('typeString', ''),
+    }
+
+class ItemListIndex:
+    """每个CSV的物品列表索引
+
+    缓存图片路径和搜索/排序字段，CSV目录索引或图片索引版本变化时才重建。
+    """
+
+    def __init__(self, catalog, image_index):
+        self.catalog = catalog
+        self.image_index = image_index
+        self._lock = threading.Lock()
+        self._cache = {}  # (csv_path, category) -> (版本, 条目列表)
+
+    def get_entries(self, csv_path, category):
+        rows = self.catalog.get_rows(csv_path)
+        if rows is None:
+            # 不在目录索引中的文件，直接读取，不缓存
+            return self._build_entries(load_csv_data(csv_path), category)
+
+        key = (str(csv_path), category)
+        stamp = (self.catalog.version, self.image_index.current_version())
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] == stamp:
+                return cached[1]
+
+        entries = self._build_entries(rows, category)
+        with self._lock:
+            self._cache[key] = (stamp, entries)
+        return entries
+
+    @staticmethod
+    def _build_entries(rows, category):
+        entries = []
+        for row in rows:
+            item_id = row.get('id', '')
+            if not item_id:
+                continue
+
+            image_path, has_image = check_image_exists(item_id, category)
+            entries.append(build_item_entry({
+                'id': item_id,
+                'data': row,
+                'image_path': image_path,
+                'has_image': has_image
+            }))
+        return entries
+
+item_list_index = ItemListIndex(csv_catalog, image_index)
+
+def query_item_entries(entries, params):
+    """按查询参数筛选、排序、分页
+
+    params: query（名称/ID子串）、rarity（逗号分隔或列表）、type（typeString）、
+    sort（id/name/rarity，前缀 - 表示倒序，缺省为CSV原始顺序）、offset、limit
+    """
+    query = (params.get('query') or '').strip().lower()
+    if query:
+        entries = [e for e in entries if query in e['search']]
+
+    rarity = params.get('rarity') or []
+    if isinstance(rarity, str):
+        rarity = [r for r in rarity.split(',') if r]
+    if rarity:
+        rarity_set = {normalize_rarity(r) for r in rarity}
+        entries = [e for e in entries if e['rarity'] in rarity_set]
+
+    item_type = params.get('type') or ''
+    if item_type:
+        entries = [e for e in entries if e['type'] == item_type]
+
+    sort_key = params.get('sort') or ''
+    reverse = sort_key.startswith('-')
+    sort_field = sort_key.lstrip('-')
+    if sort_field == 'rarity':
+        # 默认高稀有度在前，同稀有度按名称
+        sign = 1 if reverse else -1
+        entries = sorted(entries, key=lambda e: (sign * RARITY_ORDER[e['rarity']], e['name']))
+    elif sort_field in ('id', 'name'):
+        entries = sorted(entries, key=lambda e: e[sort_field], reverse=reverse)
+
+    # offset/limit 各自解析，其中一个无效不影响另一个
+    try:
+        offset = max(int(params.get('offset') or 0), 0)
+    except (TypeError, ValueError):
+        offset = 0
+    try:
+        limit = min(max(int(params.get('limit')), 1), MAX_ITEMS_PAGE_SIZE)
+    except (TypeError, ValueError):
+        limit = MAX_ITEMS_PAGE_SIZE
+
+    return {
+        'items': [e['item'] for e in entries[offset:offset + limit]],
+        'total': len(entries),
+        'missing': sum(1 for e in entries if not e['item']['has_image']),
+        'offset': offset,
+        'limit': limit,
+    }
+
+# ==================== 缩略图缓存 ====================
+
+# 允许的缩略图宽度（避免任意宽度撑爆缓存）
+THUMBNAIL_WIDTHS = (64, 128, 256, 512)
+
+class ThumbnailCache:
+    """按需生成缩略图的磁盘缓存
+
+    缓存文件名由源图内容哈希 + 宽度 + 格式组成，内容相同的图片（不同目录下的同一图标）共用一份；
+    源文件的 (mtime, size) -> 内容哈希 保存在内存中，未变化的文件不会重复读取。
+    超过容量上限时按最近使用时间淘汰（命中时刷新文件mtime，重启后顺序依然有效）。
+    """
+
+    MIME_TYPES = {"webp": "image/webp", "avif": "image/avif", "png": "image/png"}
+
+    def __init__(self, cache_dir, max_bytes=THUMBNAIL_CACHE_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._hashes = {}  # 源文件路径 -> ((mtime_ns, size), 内容哈希)
+        self._entries = None  # OrderedDict: 缓存文件名 -> 大小（最近使用的在末尾）
+        self._total = 0
+
+    def _load_entries(self):
+        """首次使用时读取缓存目录，按mtime恢复LRU顺序"""
+        entries = []
+        if self.cache_dir.exists():
+            for cache_file in self.cache_dir.iterdir():
+                if cache_file.is_file() and not cache_file.name.endswith('.tmp'):
+                    st = cache_file.stat()
+                    entries.append((st.st_mtime_ns, cache_file.name, st.st_size))
+        entries.sort()
+        self._entries = OrderedDict((name, size) for _, name, size in entries)
+        self._total = sum(self._entries.values())
+
+    def source_hash(self, source_path):
+        """返回源图内容哈希（按 mtime/size 缓存）"""
+        st = os.stat(source_path)
+        stat = (st.st_mtime_ns, st.st_size)
+        key = str(source_path)
+        with self._lock:
+            cached = self._hashes.get(key)
+            if cached is not None and cached[0] == stat:
+                return cached[1]
+
+        with open(source_path, 'rb') as f:
+            digest = hashlib.sha1(f.read()).hexdigest()
+        with self._lock:
+            self._hashes[key] = (stat, digest)
+        return digest
+
+    @staticmethod
+    def pick_format(requested, accept_header):
+        """根据请求参数和 Accept 头选择输出格式"""
+        requested = (requested or 'auto').lower()
+        if requested == 'avif' and features.check('avif'):
+            return 'avif'
+        if requested in ('webp', 'png'):
+            return requested
+        if requested == 'auto':
+            accept = accept_header or ''
+            if 'image/avif' in accept and features.check('avif'):
+                return 'avif'
+            if 'image/webp' in accept:
+                return 'webp'
+        return 'png'
+
+    def cache_key(self, source_path, width, fmt):
+        return f"{self.source_hash(source_path)}_{width}.{fmt}"
+
+    def get(self, source_path, width, fmt):
+        """返回缓存文件路径，不存在时生成"""
+        key = self.cache_key(source_path, width, fmt)
+        cache_file = self.cache_dir / key
+
+        with self._lock:
+            if self._entries is None:
+                self._load_entries()
+            if key in self._entries and cache_file.exists():
+                self._entries.move_to_end(key)
+                try:
+                    os.utime(cache_file)
+                except OSError:
+                    pass
+                return cache_file
+
+        data = self._render(source_path, width, fmt)
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_name(f"{key}.{threading.get_ident()}.tmp")
+        with open(tmp_file, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_file, cache_file)
+
+        with self._lock:
+            self._total += len(data) - self._entries.pop(key, 0)
+            self._entries[key] = len(data)
+            self._evict()
+        return cache_file
+
+    def _render(self, source_path, width, fmt):
+        with Image.open(source_path) as img:
+            img.load()
+            if img.mode not in ('RGB', 'RGBA'):
+                img = img.convert('RGBA')
+            # 只缩小不放大
+            if img.width > width:
+                height = max(1, round(img.height * width / img.width))
+                img = img.resize((width, height), Image.LANCZOS)
+
+            buffer = io.BytesIO()
+            if fmt == 'webp':
+                img.save(buffer, 'WEBP', quality=90, method=4)
+            elif fmt == 'avif':
+                img.save(buffer, 'AVIF', quality=80)
+            else:
+                img.save(buffer, 'PNG', optimize=True)
+            return buffer.getvalue()
+
+    def _evict(self):
+        """超过容量时删除最久未使用的缓存文件"""
+        while self._total > self.max_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            self._total -= size
+            try:
+                os.remove(self.cache_dir / key)
+            except OSError:
+                pass
+
+thumbnail_cache = ThumbnailCache(THUMBNAIL_CACHE_DIR)
+
+# ==================== 条件请求与压缩 ====================
+
+# 每次启动不同，避免重启后内存中的版本号与旧ETag碰撞
+ETAG_SALT = str(time.time_ns())
+
+# 小于该大小的响应不压缩
+COMPRESS_MIN_SIZE = 1024
+COMPRESSIBLE_MIMETYPES = {"application/json", "text/html", "text/css", "application/javascript"}
+
+def file_states(paths):
+    """返回文件的 (mtime_ns, size) 列表和最新修改时间（秒）"""
+    states = []
+    last_modified = None
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError:
+            states.append(None)
+            continue
+        states.append((st.st_mtime_ns, st.st_size))
+        last_modified = max(last_modified or 0, st.st_mtime)
+    return states, last_modified
+
+def conditional_json(stamp_func):
+    """为GET接口添加ETag/Last-Modified，数据未变化时直接返回304
+
+    stamp_func 接收与视图相同的参数，返回 (内存版本号列表, 依赖的文件列表)。
+    只依赖文件的接口同时输出 Last-Modified。
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != 'GET':
+                return view(*args, **kwargs)
+
+            versions, files = stamp_func(*args, **kwargs)
+            states, last_modified = file_states(files)
+            etag = hashlib.sha1(repr((ETAG_SALT, request.full_path, versions, states)).encode()).hexdigest()
+            if versions:
+                last_modified = None
+
+            # 压缩后的响应ETag带编码后缀
+            not_modified = any(request.if_none_match.contains(etag + suffix) for suffix in ("", "-gzip", "-br"))
+            if not request.if_none_match and last_modified and request.if_modified_since:
+                not_modified = int(last_modified) <= request.if_modified_since.timestamp()
+
+            if not_modified:
+                response = app.response_class(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            if last_modified:
+                response.last_modified = int(last_modified)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator
+
+def catalog_stamp(*args, **kwargs):
+    """分类/物品列表依赖CSV目录索引、图片索引和新数据管理配置"""
+    return [csv_catalog.current_version(), image_index.current_version()], [NEW_DATA_CONFIG_FILE]
+
+@app.after_request
+def compress_response(response):
+    """较大的文本响应按客户端支持使用 br/gzip 压缩"""
+    if (response.status_code != 200 or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    encodings = ['br', 'gzip'] if brotli is not None else ['gzip']
+    encoding = request.accept_encodings.best_match(encodings)
+    if not encoding:
+        return response
+
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_SIZE:
+        return response
+
+    if encoding == 'br':
+        data = brotli.compress(data, quality=5)
+    else:
+        data = gzip.compress(data, compresslevel=6)
+
+    response.set_data(data)
+    response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f"{etag}-{encoding}", weak)
+    return response
+
 # HTML模板
 HTML_TEMPLATE = """
 <!DOCTYPE html>
@@ -490,6 +1492,20 @@ HTML_TEMPLATE = """
             border-color: #e94560;
         }
 
+        .filter-select {
+            padding: 10px 12px;
+            background: #1a1a2e;
+            border: 2px solid #0f3460;
+            color: #fff;
+            border-radius: 5px;
+            font-size: 14px;
+        }
+
+        .filter-select:focus {
+            outline: none;
+            border-color: #e94560;
+        }
+
         .filter-info {
             color: #bbb;
             font-size: 14px;
@@ -683,37 +1699,14 @@ HTML_TEMPLATE = """
             background: rgba(30, 41, 59, 0.3);
         }
 
-        /* 分页 */
-        .pagination {
+        /* 滚动加载 */
+        .load-more {
             display: flex;
             justify-content: center;
             align-items: center;
-            gap: 10px;
             padding: 20px;
-        }
-
-        .pagination button {
-            padding: 8px 16px;
-            background: #16213e;
-            border: 2px solid #0f3460;
-            color: #fff;
-            border-radius: 5px;
-            cursor: pointer;
-            transition: all 0.3s;
-        }
-
-        .pagination button:hover:not(:disabled) {
-            background: #e94560;
-            border-color: #e94560;
-        }
-
-        .pagination button:disabled {
-            opacity: 0.3;
-            cursor: not-allowed;
-        }
-
-        .pagination span {
             color: #bbb;
+            font-size: 14px;
         }
 
         /* 加载状态 */
@@ -1380,6 +2373,22 @@ HTML_TEMPLATE = """
             <div class="search-box">
                 <input type="text" id="search-input" placeholder="搜索物品名称或ID...">
             </div>
+            <select id="rarity-filter" class="filter-select">
+                <option value="">全部稀有度</option>
+                <option value="legendary">传说</option>
+                <option value="epic">史诗</option>
+                <option value="rare">稀有</option>
+                <option value="common">普通</option>
+            </select>
+            <select id="type-filter" class="filter-select">
+                <option value="">全部类型</option>
+            </select>
+            <select id="sort-select" class="filter-select">
+                <option value="">默认排序</option>
+                <option value="name">名称</option>
+                <option value="id">ID</option>
+                <option value="rarity">稀有度</option>
+            </select>
             <div class="filter-info">
                 共 <span class="count" id="total-count">0</span> 项 |
                 缺失图片: <span class="count" id="missing-count">0</span> 项
@@ -1389,11 +2398,7 @@ HTML_TEMPLATE = """
 
         <div class="items-container">
             <div id="items-grid" class="items-grid"></div>
-            <div class="pagination">
-                <button id="prev-page">上一页</button>
-                <span id="page-info">第 1 页 / 共 1 页</span>
-                <button id="next-page">下一页</button>
-            </div>
+            <div class="load-more" id="load-more"></div>
         </div>
     </div>
 
@@ -1602,10 +2607,14 @@ HTML_TEMPLATE = """
 
     <script>
         let currentCategory = null;
-        let currentData = [];
-        let filteredData = [];
-        let currentPage = 1;
-        const itemsPerPage = 60; // 10列 x 6排
+        let currentCategoryName = '';  // 当前分类名（用于服务端匹配图片目录）
+        let currentPath = null;  // 当前CSV路径或特殊标识
+        let filteredData = [];  // 已加载的物品（服务端已完成筛选/排序）
+        let totalItems = 0;  // 筛选后的物品总数
+        let missingItems = 0;  // 筛选后缺失图片的物品数
+        let loadingItems = false;
+        let itemsRequestSeq = 0;  // 切换分类/筛选时丢弃过期响应
+        const itemsPerPage = 120; // 每次滚动加载的数量
 
         // 新数据管理相关变量
         let currentContextItem = null; // 当前右键点击的项
@@ -1672,20 +2681,13 @@ HTML_TEMPLATE = """
         // 加载分类数据
         async function loadCategoryData(name, path, parent = null, clickedElement = null) {
             currentCategory = parent ? `${parent} - ${name}` : name;
+            currentCategoryName = name;
+            currentPath = path;
             document.getElementById('current-category').textContent = currentCategory;
 
-            const response = await fetch('/api/items', {
-                method: 'POST',
-                headers: {'Content-Type': 'application/json'},
-                body: JSON.stringify({csv_path: path, category: name})
-            });
-
-            currentData = await response.json();
-            filteredData = currentData;
-            currentPage = 1;
-
-            updateStats();
-            renderItems();
+            // 切换分类时重置类型筛选（类型选项随分类变化）
+            document.getElementById('type-filter').value = '';
+            await reloadItems(true);
 
             // 更新选中状态
             document.querySelectorAll('.category-title, .subcategory').forEach(el => {
@@ -1696,169 +2698,239 @@ HTML_TEMPLATE = """
             }
         }
 
-        // 更新统计信息
-        function updateStats() {
-            const total = filteredData.length;
-            const missing = filteredData.filter(item => !item.has_image).length;
-
-            document.getElementById('total-count').textContent = total;
-            document.getElementById('missing-count').textContent = missing;
+        // 请求一页物品（服务端分页/筛选/排序）
+        async function fetchItemsPage(offset) {
+            // 使用GET，数据未变化时浏览器会收到304并复用缓存
+            const params = new URLSearchParams({
+                csv_path: currentPath,
+                category: currentCategoryName,
+                offset: offset,
+                limit: itemsPerPage,
+                query: document.getElementById('search-input').value,
+                rarity: document.getElementById('rarity-filter').value,
+                type: document.getElementById('type-filter').value,
+                sort: document.getElementById('sort-select').value
+            });
+            const response = await fetch(`/api/items?${params}`);
+            return await response.json();
         }
 
-        // 渲染物品
-        function renderItems() {
-            const start = (currentPage - 1) * itemsPerPage;
-            const end = start + itemsPerPage;
-            const pageItems = filteredData.slice(start, end);
+        // 重新加载当前分类（筛选条件变化时调用）
+        async function reloadItems(updateTypes = false) {
+            if (!currentPath) return;
 
-            const container = document.getElementById('items-grid');
-            container.innerHTML = '';
+            const seq = ++itemsRequestSeq;
+            loadingItems = true;
+            try {
+                const page = await fetchItemsPage(0);
+                if (seq !== itemsRequestSeq) return;
 
-            pageItems.forEach(item => {
-                const card = document.createElement('div');
-                card.className = 'item-card';
+                filteredData = page.items;
+                totalItems = page.total;
+                missingItems = page.missing;
 
-                if (!item.has_image) {
-                    card.classList.add('no-image');
+                if (updateTypes) {
+                    updateTypeOptions(page.types || []);
                 }
 
-                // 新数据特殊标记
-                if (item.is_new) {
-                    card.classList.add('new-item');
+                updateStats();
+                renderItems();
+                document.querySelector('.items-container').scrollTop = 0;
+            } finally {
+                // 只有最新的请求才能解除加载状态（请求失败时也要解除，否则无限滚动会一直停住）
+                if (seq === itemsRequestSeq) loadingItems = false;
+            }
+        }
 
-                    // 为新数据项添加右键菜单支持
-                    card.addEventListener('contextmenu', (e) => {
-                        e.preventDefault();
-                        e.stopPropagation();
-                        currentContextItem = item;
+        // 滚动到底部时加载下一页
+        async function loadMoreItems() {
+            if (loadingItems || !currentPath || filteredData.length >= totalItems) return;
 
-                        // 显示右键菜单
-                        contextMenu.style.left = e.pageX + 'px';
-                        contextMenu.style.top = e.pageY + 'px';
-                        contextMenu.classList.add('show');
-                    });
-                }
+            const seq = itemsRequestSeq;
+            loadingItems = true;
+            try {
+                const page = await fetchItemsPage(filteredData.length);
+                if (seq !== itemsRequestSeq) return;
+
+                const start = filteredData.length;
+                filteredData = filteredData.concat(page.items);
+                appendItems(page.items, start);
+            } finally {
+                // 期间重新加载过时由新的请求负责解除加载状态
+                if (seq === itemsRequestSeq) loadingItems = false;
+            }
+        }
 
-                // 已录入数据特殊标记
-                if (item.is_recorded) {
-                    card.classList.add('recorded-item');
-                }
+        // 更新类型筛选下拉框
+        function updateTypeOptions(types) {
+            const select = document.getElementById('type-filter');
+            select.innerHTML = '<option value="">全部类型</option>';
+            types.forEach(type => {
+                const option = document.createElement('option');
+                option.value = type;
+                option.textContent = type;
+                select.appendChild(option);
+            });
+        }
 
-                // 根据稀有度添加边框颜色（支持中英文）
-                const rarity = item.data.rarityTypeString || '';
-                if (rarity.includes('传说') || rarity === 'legendary') {
-                    card.classList.add('rarity-legendary');
-                } else if (rarity.includes('史诗') || rarity === 'epic') {
-                    card.classList.add('rarity-epic');
-                } else if (rarity.includes('稀有') || rarity === 'rare') {
-                    card.classList.add('rarity-rare');
-                } else if (!item.is_new && !item.is_recorded) {
-                    // 新数据和已录入数据不添加普通稀有度颜色
-                    card.classList.add('rarity-common');
-                }
+        // 更新统计信息
+        function updateStats() {
+            document.getElementById('total-count').textContent = totalItems;
+            document.getElementById('missing-count').textContent = missingItems;
+        }
 
-                // 图片容器
-                const imageContainer = document.createElement('div');
-                imageContainer.className = 'item-image-container';
+        // 渲染物品（重建整个网格）
+        function renderItems() {
+            document.getElementById('items-grid').innerHTML = '';
+            appendItems(filteredData, 0);
+        }
 
-                const img = document.createElement('img');
-                img.className = 'item-image';
-                if (item.has_image) {
-                    img.src = `/image/${item.image_path}`;
-                } else {
-                    img.src = 'data:image/svg+xml,<svg xmlns="http://www.w3.org/2000/svg" width="100" height="100"><rect width="100" height="100" fill="%23333"/><text x="50" y="50" text-anchor="middle" dominant-baseline="middle" fill="%23666" font-size="12">无图片</text></svg>';
-                }
-                img.onerror = () => {
-                    img.src = 'data:image/svg+xml,<svg xmlns="http://www.w3.org/2000/svg" width="100" height="100"><rect width="100" height="100" fill="%23333"/><text x="50" y="50" text-anchor="middle" dominant-baseline="middle" fill="%23666" font-size="12">加载失败</text></svg>';
-                };
+        // 追加物品卡片，start 为第一项在 filteredData 中的索引
+        function appendItems(items, start) {
+            const container = document.getElementById('items-grid');
+            const fragment = document.createDocumentFragment();
 
-                imageContainer.appendChild(img);
+            items.forEach(item => {
+                fragment.appendChild(createItemCard(item));
+            });
+            container.appendChild(fragment);
 
-                // 名称（hover显示）
-                const name = document.createElement('div');
-                name.className = 'item-name';
-                name.textContent = item.data.name || item.data.name_en || item.id;
-                name.title = item.data.name || item.data.name_en || item.id;
+            updateDragAttributes();
+            updateLoadMoreStatus();
+        }
 
-                // ID（hover显示）
-                const id = document.createElement('div');
-                id.className = 'item-id';
-                // 如果是新数据，显示文件夹信息
-                if (item.is_new && item.data.folder_name) {
-                    id.textContent = `[${item.data.folder_name}] ${item.id}`;
-                } else if (item.is_recorded && item.data.added_date) {
-                    // 如果是已录入数据，显示录入月份
-                    id.textContent = `[${item.data.added_date}] ${item.id}`;
-                } else {
-                    id.textContent = item.id;
-                }
-                id.title = item.id;
+        function updateLoadMoreStatus() {
+            const status = document.getElementById('load-more');
+            if (!currentPath) {
+                status.textContent = '';
+            } else if (filteredData.length < totalItems) {
+                status.textContent = `已加载 ${filteredData.length} / ${totalItems} 项，向下滚动加载更多`;
+            } else {
+                status.textContent = totalItems > 0 ? `已全部加载（${totalItems} 项）` : '没有匹配的物品';
+            }
+        }
 
-                imageContainer.appendChild(name);
-                imageContainer.appendChild(id);
+        // 创建物品卡片
+        function createItemCard(item) {
+            const card = document.createElement('div');
+            card.className = 'item-card';
 
-                // 右下角三角形（史诗/传说）
-                if (rarity.includes('传说') || rarity.includes('史诗')) {
-                    const triangle = document.createElement('div');
-                    triangle.className = 'rarity-triangle';
-                    imageContainer.appendChild(triangle);
-                }
+            if (!item.has_image) {
+                card.classList.add('no-image');
+            }
 
-                card.appendChild(imageContainer);
+            // 新数据特殊标记
+            if (item.is_new) {
+                card.classList.add('new-item');
 
-                container.appendChild(card);
-            });
+                // 为新数据项添加右键菜单支持
+                card.addEventListener('contextmenu', (e) => {
+                    e.preventDefault();
+                    e.stopPropagation();
+                    currentContextItem = item;
 
-            // 更新分页信息
-            const totalPages = Math.ceil(filteredData.length / itemsPerPage);
-            document.getElementById('page-info').textContent = `第 ${currentPage} 页 / 共 ${totalPages} 页`;
-            document.getElementById('prev-page').disabled = currentPage === 1;
-            document.getElementById('next-page').disabled = currentPage >= totalPages;
-        }
+                    // 显示右键菜单
+                    contextMenu.style.left = e.pageX + 'px';
+                    contextMenu.style.top = e.pageY + 'px';
+                    contextMenu.classList.add('show');
+                });
+            }
 
-        // 搜索
-        document.getElementById('search-input').addEventListener('input', (e) => {
-            const query = e.target.value.toLowerCase();
+            // 已录入数据特殊标记
+            if (item.is_recorded) {
+                card.classList.add('recorded-item');
+            }
 
-            if (!query) {
-                filteredData = currentData;
+            // 根据稀有度添加边框颜色（支持中英文）
+            const rarity = item.data.rarityTypeString || '';
+            if (rarity.includes('传说') || rarity === 'legendary') {
+                card.classList.add('rarity-legendary');
+            } else if (rarity.includes('史诗') || rarity === 'epic') {
+                card.classList.add('rarity-epic');
+            } else if (rarity.includes('稀有') || rarity === 'rare') {
+                card.classList.add('rarity-rare');
+            } else if (!item.is_new && !item.is_recorded) {
+                // 新数据和已录入数据不添加普通稀有度颜色
+                card.classList.add('rarity-common');
+            }
+
+            // 图片容器
+            const imageContainer = document.createElement('div');
+            imageContainer.className = 'item-image-container';
+
+            const img = document.createElement('img');
+            img.className = 'item-image';
+            if (item.has_image) {
+                img.src = `/thumb/${item.image_path}?w=256`;
             } else {
-                filteredData = currentData.filter(item => {
-                    const name = (item.data.name || '').toLowerCase();
-                    const nameEn = (item.data.name_en || '').toLowerCase();
-                    const id = item.id.toLowerCase();
+                img.src = 'data:image/svg+xml,<svg xmlns="http://www.w3.org/2000/svg" width="100" height="100"><rect width="100" height="100" fill="%23333"/><text x="50" y="50" text-anchor="middle" dominant-baseline="middle" fill="%23666" font-size="12">无图片</text></svg>';
+            }
+            img.onerror = () => {
+                img.src = 'data:image/svg+xml,<svg xmlns="http://www.w3.org/2000/svg" width="100" height="100"><rect width="100" height="100" fill="%23333"/><text x="50" y="50" text-anchor="middle" dominant-baseline="middle" fill="%23666" font-size="12">加载失败</text></svg>';
+            };
 
-                    return name.includes(query) || nameEn.includes(query) || id.includes(query);
-                });
+            imageContainer.appendChild(img);
+
+            // 名称（hover显示）
+            const name = document.createElement('div');
+            name.className = 'item-name';
+            name.textContent = item.data.name || item.data.name_en || item.id;
+            name.title = item.data.name || item.data.name_en || item.id;
+
+            // ID（hover显示）
+            const id = document.createElement('div');
+            id.className = 'item-id';
+            // 如果是新数据，显示文件夹信息
+            if (item.is_new && item.data.folder_name) {
+                id.textContent = `[${item.data.folder_name}] ${item.id}`;
+            } else if (item.is_recorded && item.data.added_date) {
+                // 如果是已录入数据，显示录入月份
+                id.textContent = `[${item.data.added_date}] ${item.id}`;
+            } else {
+                id.textContent = item.id;
             }
+            id.title = item.id;
 
-            currentPage = 1;
-            updateStats();
-            renderItems();
-        });
+            imageContainer.appendChild(name);
+            imageContainer.appendChild(id);
 
-        // 分页
-        document.getElementById('prev-page').addEventListener('click', () => {
-            if (currentPage > 1) {
-                currentPage--;
-                renderItems();
-                document.querySelector('.items-container').scrollTop = 0;
+            // 右下角三角形（史诗/传说）
+            if (rarity.includes('传说') || rarity.includes('史诗')) {
+                const triangle = document.createElement('div');
+                triangle.className = 'rarity-triangle';
+                imageContainer.appendChild(triangle);
             }
+
+            card.appendChild(imageContainer);
+            return card;
+        }
+
+        // 搜索（输入停顿后再请求服务端）
+        let searchTimer = null;
+        document.getElementById('search-input').addEventListener('input', () => {
+            clearTimeout(searchTimer);
+            searchTimer = setTimeout(() => reloadItems(), 250);
         });
 
-        document.getElementById('next-page').addEventListener('click', () => {
-            const totalPages = Math.ceil(filteredData.length / itemsPerPage);
-            if (currentPage < totalPages) {
-                currentPage++;
-                renderItems();
-                document.querySelector('.items-container').scrollTop = 0;
-            }
+        // 稀有度/类型筛选与排序
+        ['rarity-filter', 'type-filter', 'sort-select'].forEach(id => {
+            document.getElementById(id).addEventListener('change', () => reloadItems());
         });
 
+        // 滚动加载：提示行进入可视区域时加载下一页
+        const loadMoreObserver = new IntersectionObserver((entries) => {
+            if (entries.some(entry => entry.isIntersecting)) {
+                loadMoreItems();
+            }
+        }, {root: document.querySelector('.items-container'), rootMargin: '400px'});
+        loadMoreObserver.observe(document.getElementById('load-more'));
+
         // ==================== 活动编辑器功能 ====================
         let activityPanelOpen = false;
         let currentActivityType = '';
         let currentActivityId = '';
+        let currentActivityVersion = '';  // 加载时的文件版本号，保存时用于冲突检测（新建为空）
+        let resolvedPoolItems = new WeakSet();  // 已按当前活动解析过图片路径的池子物品
         let poolsData = {}; // {poolName: [items]}
 
         // 打开活动面板
@@ -1867,7 +2939,6 @@ HTML_TEMPLATE = """
             panel.classList.add('active');
             document.body.classList.add('activity-panel-active');
             activityPanelOpen = true;
-            currentPage = 1;
             renderItems();
         });
 
@@ -1877,7 +2948,6 @@ HTML_TEMPLATE = """
             panel.classList.remove('active');
             document.body.classList.remove('activity-panel-active');
             activityPanelOpen = false;
-            currentPage = 1;
             renderItems();
         });
 
@@ -1932,6 +3002,7 @@ HTML_TEMPLATE = """
 
             currentActivityType = type;
             currentActivityId = id;
+            currentActivityVersion = '';
             poolsData = {};
 
             // 根据类型初始化池子
@@ -1981,6 +3052,7 @@ HTML_TEMPLATE = """
                 const data = await response.json();
                 currentActivityType = type;
                 currentActivityId = id;
+                currentActivityVersion = data._version || '';
 
                 document.getElementById('activity-name').value = data.metadata?.name || '';
                 document.getElementById('activity-date').value = data.metadata?.formattedDate || '';
@@ -2021,6 +3093,10 @@ HTML_TEMPLATE = """
                 // 显示对应的池子
                 showActivityPools(type);
 
+                // 服务端加载时已按活动ID解析过图片路径
+                resolvedPoolItems = new WeakSet();
+                Object.values(poolsData).forEach(items => items.forEach(item => resolvedPoolItems.add(item)));
+
                 updateAllPools();
             } catch (error) {
                 alert('加载活动失败: ' + error.message);
@@ -2072,16 +3148,29 @@ HTML_TEMPLATE = """
             }
 
             try {
-                const response = await fetch(`/api/activity/${currentActivityType}/${currentActivityId}`, {
+                const saveActivity = (payload) => fetch(`/api/activity/${currentActivityType}/${currentActivityId}`, {
                     method: 'POST',
                     headers: {'Content-Type': 'application/json'},
-                    body: JSON.stringify(activityData)
+                    body: JSON.stringify(payload)
                 });
 
+                let response = await saveActivity({...activityData, _version: currentActivityVersion});
+
+                // 文件已被其他页面修改：确认后强制覆盖（不带版本号）
+                if (response.status === 409) {
+                    if (!confirm('该活动已在其他地方被修改，是否仍然覆盖保存？\n（被覆盖的版本会保留在历史版本中）')) {
+                        return;
+                    }
+                    response = await saveActivity(activityData);
+                }
+
                 if (response.ok) {
+                    const result = await response.json();
+                    currentActivityVersion = result.version || '';
                     alert('保存成功！');
                 } else {
-                    alert('保存失败');
+                    const error = await response.json().catch(() => ({}));
+                    alert('保存失败' + (error.error ? ': ' + error.error : ''));
                 }
             } catch (error) {
                 alert('保存失败: ' + error.message);
@@ -2123,6 +3212,40 @@ HTML_TEMPLATE = """
             });
         }
 
+        // 批量解析池子中新加入物品的图片路径（含机密货物专用货币 {id}_{活动ID}.png 规则），一次请求完成
+        async function resolvePoolImages(poolName) {
+            const items = (poolsData[poolName] || []).filter(item => !resolvedPoolItems.has(item));
+            if (items.length === 0) return;
+            items.forEach(item => resolvedPoolItems.add(item));
+
+            try {
+                const response = await fetch('/api/resolve-images', {
+                    method: 'POST',
+                    headers: {'Content-Type': 'application/json'},
+                    body: JSON.stringify({
+                        activity_id: currentActivityId,
+                        items: items.map(item => [item.id, item.type, currentActivityId])
+                    })
+                });
+                if (!response.ok) return;
+
+                const result = await response.json();
+                let changed = false;
+                items.forEach((item, index) => {
+                    const imagePath = result.image_paths[index];
+                    if (imagePath && imagePath !== item.image_path) {
+                        item.image_path = imagePath;
+                        changed = true;
+                    }
+                });
+                if (changed) {
+                    updatePoolItems(poolName);
+                }
+            } catch (error) {
+                console.error('解析图片路径失败:', error);
+            }
+        }
+
         // 更新概率总和显示（辅助函数）
         function updateProbabilitySum(poolName) {
             const probabilitySpan = document.getElementById(`pool-${poolName}-probability`);
@@ -2148,6 +3271,9 @@ HTML_TEMPLATE = """
             const countSpan = document.getElementById(`pool-${poolName}-count`);
             const items = poolsData[poolName] || [];
 
+            // 新加入的物品异步补全图片路径
+            resolvePoolImages(poolName);
+
             countSpan.textContent = items.length;
 
             // 更新概率总和
@@ -2167,7 +3293,7 @@ HTML_TEMPLATE = """
                 // 图片
                 const img = document.createElement('img');
                 img.className = 'item-image';
-                img.src = item.image_path ? `/image/${item.image_path}` : 'data:image/svg+xml,<svg xmlns="http://www.w3.org/2000/svg" width="60" height="60"><rect width="60" height="60" fill="%23333"/></svg>';
+                img.src = item.image_path ? `/thumb/${item.image_path}?w=128` : 'data:image/svg+xml,<svg xmlns="http://www.w3.org/2000/svg" width="60" height="60"><rect width="60" height="60" fill="%23333"/></svg>';
                 img.onerror = () => {
                     img.src = 'data:image/svg+xml,<svg xmlns="http://www.w3.org/2000/svg" width="60" height="60"><rect width="60" height="60" fill="%23333"/></svg>';
                 };
@@ -2307,7 +3433,7 @@ HTML_TEMPLATE = """
 
                 const img = document.createElement('img');
                 if (item.image_path) {
-                    img.src = `/image/${item.image_path}`;
+                    img.src = `/thumb/${item.image_path}?w=128`;
                 } else {
                     img.src = 'data:image/svg+xml,<svg xmlns="http://www.w3.org/2000/svg" width="60" height="60"><rect width="60" height="60" fill="%23333"/></svg>';
                 }
@@ -2450,32 +3576,26 @@ HTML_TEMPLATE = """
             }
         });
 
-        // 修改 renderItems，添加draggable属性和数据索引
-        const originalRenderItems = renderItems;
-        renderItems = function() {
-            originalRenderItems();
+        // 为物品卡片设置draggable属性和数据索引（卡片顺序与 filteredData 一致）
+        function updateDragAttributes() {
+            const cards = document.getElementById('items-grid').querySelectorAll('.item-card');
 
             // 只在活动面板打开时启用拖拽
             if (activityPanelOpen && currentActivityType) {
-                const cards = itemsGrid.querySelectorAll('.item-card');
-                const start = (currentPage - 1) * itemsPerPage;
-
                 cards.forEach((card, index) => {
-                    const dataIndex = start + index;
-                    if (filteredData[dataIndex]) {
+                    if (filteredData[index]) {
                         card.setAttribute('draggable', 'true');
-                        card.dataset.itemIndex = dataIndex;
+                        card.dataset.itemIndex = index;
                     }
                 });
             } else {
                 // 面板关闭时移除拖拽
-                const cards = itemsGrid.querySelectorAll('.item-card');
                 cards.forEach(card => {
                     card.removeAttribute('draggable');
                     delete card.dataset.itemIndex;
                 });
             }
-        };
+        }
 
         // 拖放区域事件 - 为所有drop-zone设置事件
         function initializeDropZones() {
@@ -2727,7 +3847,7 @@ HTML_TEMPLATE = """
                     alert('已排除该项');
                     // 重新加载当前分类
                     if (currentCategory) {
-                        loadCategoryData(currentCategory.split(' - ').pop(), currentData[0]?.csv_path || '');
+                        reloadItems();
                     }
                 } else {
                     const error = await response.json();
@@ -2820,15 +3940,22 @@ def index():
     return render_template_string(HTML_TEMPLATE)
 
 @app.route('/api/categories')
+@conditional_json(catalog_stamp)
 def get_categories():
     """获取分类列表"""
     categories = scan_csv_structure()
     return jsonify(categories)
 
-@app.route('/api/items', methods=['POST'])
+@app.route('/api/items', methods=['GET', 'POST'])
+@conditional_json(catalog_stamp)
 def get_items():
-    """获取分类下的物品列表"""
-    data = request.json
+    """获取分类下的物品列表
+
+    参数可以放在POST的JSON中，也可以放在GET的查询字符串中（GET支持条件请求）。
+    请求中带 limit 时按 offset/limit 分页，并支持 query/rarity/type/sort 参数，
+    返回 {items, total, missing, offset, limit, types}；否则返回完整列表（旧格式）。
+    """
+    data = request.json if request.method == 'POST' else request.args.to_dict()
     csv_path = data.get('csv_path')
     category = data.get('category', '')
 
@@ -2839,10 +3966,10 @@ def get_items():
         # 提取文件夹名称
         folder_name = csv_path.replace("__new_data__", "")
 
+        entries = []
         if folder_name in new_items_by_folder:
-            result = []
             for item in new_items_by_folder[folder_name]["items"]:
-                result.append({
+                entries.append(build_item_entry({
                     'id': item['id'],
                     'data': {
                         'name': item['id'],
@@ -2852,28 +3979,22 @@ def get_items():
                     'image_path': item['image_path'],
                     'has_image': True,
                     'is_new': True
-                })
-            return jsonify(result)
-        else:
-            return jsonify([])
+                }))
 
     # 特殊处理：已录入数据
-    if csv_path and csv_path.startswith("__recorded_data__"):
-        config = load_new_data_config()
-        recorded_items = config.get('recorded_items', [])
-
+    elif csv_path and csv_path.startswith("__recorded_data__"):
         # 提取月份
         month = csv_path.replace("__recorded_data__", "")
 
         # 过滤该月份的数据
-        filtered_items = [item for item in recorded_items if item.get('added_date') == month]
+        filtered_items = new_data_store.recorded_items(month)
 
-        result = []
+        entries = []
         for item in filtered_items:
             # 查找对应的图片
             image_path, has_image = check_image_exists(item['id'], item.get('category', ''))
 
-            result.append({
+            entries.append(build_item_entry({
                 'id': item['id'],
                 'data': {
                     'name': item.get('name_cn', item['id']),
@@ -2885,29 +4006,17 @@ def get_items():
                 'image_path': image_path,
                 'has_image': has_image,
                 'is_recorded': True  # 标记为已录入数据
-            })
-
-        return jsonify(result)
+            }))
 
-    # 正常处理CSV数据
-    items = load_csv_data(csv_path)
-
-    # 检查图片并构建结果
-    result = []
-    for item in items:
-        item_id = item.get('id', '')
-        if not item_id:
-            continue
+    # 正常处理CSV数据（使用预先计算的物品索引）
+    else:
+        entries = item_list_index.get_entries(csv_path, category) if csv_path else []
 
-        image_path, has_image = check_image_exists(item_id, category)
-
-        result.append({
-            'id': item_id,
-            'data': item,
-            'image_path': image_path,
-            'has_image': has_image
-        })
+    if data.get('limit') is None:
+        return jsonify([e['item'] for e in entries])
 
+    result = query_item_entries(entries, data)
+    result['types'] = sorted({e['type'] for e in entries if e['type']})
     return jsonify(result)
 
 @app.route('/image/<path:filepath>')
@@ -2919,11 +4028,126 @@ def serve_image(filepath):
     except Exception as e:
         return str(e), 404
 
+@app.route('/thumb/<path:filepath>')
+def serve_thumbnail(filepath):
+    """提供缩略图：重定向到以内容哈希命名的缓存地址（参数 w=宽度，fmt=auto/webp/avif/png）"""
+    file_path = (BASE_DIR / filepath).resolve()
+    if BASE_DIR.resolve() not in file_path.parents or not file_path.is_file():
+        return '图片不存在', 404
+
+    # 未安装Pillow时直接返回原图
+    if Image is None:
+        return redirect(url_for('serve_image', filepath=filepath))
+
+    try:
+        width = int(request.args.get('w', 128))
+    except ValueError:
+        width = 128
+    # 取不小于请求宽度的最小档位（超过最大档位时取最大档位）
+    width = min(THUMBNAIL_WIDTHS, key=lambda w: (w < width, abs(w - width)))
+    fmt = ThumbnailCache.pick_format(request.args.get('fmt'), request.headers.get('Accept'))
+
+    try:
+        key = thumbnail_cache.cache_key(file_path, width, fmt)
+    except OSError as e:
+        return str(e), 404
+
+    # 跳转地址随内容变化，跳转本身不缓存；按格式协商时需标注 Vary
+    response = redirect(url_for('serve_thumbnail_cache', key=key, source=filepath))
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['Vary'] = 'Accept'
+    return response
+
+@app.route('/thumb-cache/<key>')
+def serve_thumbnail_cache(key):
+    """提供缓存的缩略图（内容哈希命名，永久缓存）"""
+    if request.if_none_match.contains(key):
+        response = app.response_class(status=304)
+    else:
+        filepath = request.args.get('source', '')
+        source_path = (BASE_DIR / filepath).resolve()
+        if BASE_DIR.resolve() not in source_path.parents or not source_path.is_file():
+            return '图片不存在', 404
+
+        try:
+            _, size_part = key.split('_', 1)
+            width, fmt = size_part.split('.', 1)
+        except ValueError:
+            return '无效的缩略图', 404
+        if fmt not in ThumbnailCache.MIME_TYPES or not width.isdigit():
+            return '无效的缩略图', 404
+
+        try:
+            cache_file = thumbnail_cache.get(source_path, int(width), fmt)
+        except OSError as e:
+            return str(e), 404
+        if cache_file.name != key:
+            # 源图已变化，旧地址失效
+            return redirect(url_for('serve_thumbnail', filepath=filepath, w=width, fmt=fmt))
+
+        response = send_file(cache_file, mimetype=ThumbnailCache.MIME_TYPES[fmt], conditional=False, etag=False)
+
+    response.set_etag(key)
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+
+def resolve_request_key(item, default_activity_id):
+    """批量解析请求中的一个物品 -> (id, type, activity_id)；格式不对时返回 None"""
+    if isinstance(item, (list, tuple)):
+        item_id, item_type, activity_id = (list(item) + [None, None, None])[:3]
+    elif isinstance(item, dict):
+        item_id, item_type, activity_id = item.get('id'), item.get('type'), item.get('activity_id')
+    else:
+        return None
+    # 只接受字符串/数字，其他（列表、对象等）既不可哈希也不是有效ID
+    if isinstance(item_id, bool) or not isinstance(item_id, (str, int)) or item_id == '':
+        return None
+    if item_type is not None and not isinstance(item_type, str):
+        return None
+    activity_id = activity_id or default_activity_id
+    if activity_id is not None and (isinstance(activity_id, bool) or not isinstance(activity_id, (str, int))):
+        return None
+    return item_id, item_type, activity_id
+
+@app.route('/api/resolve-images', methods=['POST'])
+def resolve_images():
+    """批量解析物品图片路径
+
+    请求: {"activity_id": 默认活动ID, "items": [{"id", "type", "activity_id"}, ...]}，
+    物品也可以写成 [id, type, activity_id] 数组；返回 {"image_paths": [...]}，顺序与请求一致，
+    找不到图片的为 null。重复的 (id, type, activity_id) 只解析一次。
+    """
+    try:
+        data = request.json or {}
+        default_activity_id = data.get('activity_id')
+
+        resolved = {}
+        image_paths = []
+        for item in data.get('items', []):
+            key = resolve_request_key(item, default_activity_id)
+            if key is None:
+                # 格式不对的物品返回 null，不影响同批其他物品
+                image_paths.append(None)
+                continue
+
+            if key not in resolved:
+                try:
+                    resolved[key] = generate_item_image_path(*key)
+                except Exception as e:
+                    print(f"解析物品图片失败 {key}: {e}")
+                    resolved[key] = None
+            image_paths.append(resolved[key])
+
+        return jsonify({'image_paths': image_paths})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/activity/<activity_type>/list', methods=['GET'])
 def list_activities(activity_type):
     """获取某个活动类型下的所有活动ID列表"""
     try:
-        activity_dir = BASE_DIR / "MW数据站爬虫" / "抽奖物品数据" / activity_type
+        activity_dir = ACTIVITY_DATA_DIR / activity_type
         if not activity_dir.exists():
             return jsonify([])
 
@@ -2937,18 +4161,64 @@ def list_activities(activity_type):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def activity_file_path(activity_type, activity_id):
+    """活动JSON文件路径"""
+    return ACTIVITY_DATA_DIR / activity_type / f"{activity_id}.json"
+
+def activity_history_dir(activity_file):
+    """活动历史版本目录（不会被活动列表的 *.json 扫描到）"""
+    return activity_file.parent / "历史版本"
+
+def backup_activity(activity_file):
+    """保存前把当前版本复制到历史目录，只保留最近 ACTIVITY_HISTORY_COUNT 份"""
+    if not activity_file.exists():
+        return
+
+    history_dir = activity_history_dir(activity_file)
+    history_dir.mkdir(parents=True, exist_ok=True)
+    shutil.copy2(activity_file, history_dir / f"{activity_file.stem}.{time.time_ns()}.json")
+
+    backups = sorted(history_dir.glob(f"{activity_file.stem}.*.json"), key=lambda p: p.name)
+    for old_backup in backups[:-ACTIVITY_HISTORY_COUNT]:
+        try:
+            old_backup.unlink()
+        except OSError:
+            pass
+
+def list_activity_history(activity_file):
+    """历史版本列表（最新的在前）"""
+    history_dir = activity_history_dir(activity_file)
+    if not history_dir.exists():
+        return []
+
+    history = []
+    prefix = activity_file.stem + '.'
+    for backup in history_dir.glob(f"{activity_file.stem}.*.json"):
+        timestamp = backup.name[len(prefix):-len('.json')]
+        if not timestamp.isdigit():
+            continue
+        history.append({
+            'backup': backup.name,
+            'saved_at': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(int(timestamp) / 1e9)),
+            'version': file_version(backup)
+        })
+    history.sort(key=lambda h: h['backup'], reverse=True)
+    return history
+
 @app.route('/api/activity/<activity_type>/<activity_id>', methods=['GET'])
+@conditional_json(lambda activity_type, activity_id: (
+    [image_index.current_version()], [activity_file_path(activity_type, activity_id)]))
 def get_activity(activity_type, activity_id):
     """加载活动JSON"""
     try:
-        activity_dir = BASE_DIR / "MW数据站爬虫" / "抽奖物品数据" / activity_type
-        activity_file = activity_dir / f"{activity_id}.json"
+        activity_file = activity_file_path(activity_type, activity_id)
 
         if not activity_file.exists():
             return jsonify({'error': '活动不存在'}), 404
 
-        with open(activity_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        with open(activity_file, 'rb') as f:
+            raw = f.read()
+        data = json.loads(raw.decode('utf-8'))
 
         # 为每个物品添加image_path（传递activity_id用于特殊货币）
         def add_image_paths(items):
@@ -2975,15 +4245,24 @@ def get_activity(activity_type, activity_id):
                 items = cargo.get('items', [])
                 add_image_paths(items)
 
+        # 返回内容版本号，保存时带回用于冲突检测
+        data['_version'] = hashlib.sha1(raw).hexdigest()[:16]
+
         return jsonify(data)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/activity/<activity_type>/<activity_id>', methods=['POST'])
 def save_activity(activity_type, activity_id):
-    """保存活动JSON"""
+    """保存活动JSON
+
+    请求中带 _version（加载时的版本号，新建活动为空字符串）时进行冲突检测：
+    文件已被其他页面修改则返回409，不覆盖。写入为原子替换，旧版本保存在历史目录。
+    """
     try:
         data = request.json
+        check_version = '_version' in data
+        expected_version = data.pop('_version', None) or None
 
         # 移除所有物品中的image_path字段（因为这是动态生成的）
         def remove_image_paths(items):
@@ -3007,21 +4286,61 @@ def save_activity(activity_type, activity_id):
                 items = cargo.get('items', [])
                 remove_image_paths(items)
 
-        activity_dir = BASE_DIR / "MW数据站爬虫" / "抽奖物品数据" / activity_type
-        activity_dir.mkdir(parents=True, exist_ok=True)
+        activity_file = activity_file_path(activity_type, activity_id)
+        activity_file.parent.mkdir(parents=True, exist_ok=True)
 
-        activity_file = activity_dir / f"{activity_id}.json"
+        with FileLock(activity_file):
+            current_version = file_version(activity_file)
+            if check_version and current_version != expected_version:
+                return jsonify({'error': '活动已被修改，请重新加载后再保存', 'version': current_version}), 409
 
-        with open(activity_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+            backup_activity(activity_file)
+            atomic_write_json(activity_file, data)
+            new_version = file_version(activity_file)
 
-        return jsonify({'success': True})
+        return jsonify({'success': True, 'version': new_version})
+    except TimeoutError as e:
+        return jsonify({'error': str(e)}), 503
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/activity/<activity_type>/<activity_id>/history', methods=['GET'])
+def get_activity_history(activity_type, activity_id):
+    """获取活动的历史版本列表"""
+    try:
+        return jsonify(list_activity_history(activity_file_path(activity_type, activity_id)))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/activity/<activity_type>/<activity_id>/rollback', methods=['POST'])
+def rollback_activity(activity_type, activity_id):
+    """回滚到指定历史版本（当前版本同样会先存入历史）"""
+    try:
+        backup_name = (request.json or {}).get('backup', '')
+        activity_file = activity_file_path(activity_type, activity_id)
+        backup_file = activity_history_dir(activity_file) / Path(backup_name).name
+
+        if not backup_name or not backup_file.name.startswith(activity_file.stem + '.') or not backup_file.exists():
+            return jsonify({'error': '历史版本不存在'}), 404
+
+        with open(backup_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        with FileLock(activity_file):
+            backup_activity(activity_file)
+            atomic_write_json(activity_file, data)
+            new_version = file_version(activity_file)
+
+        return jsonify({'success': True, 'version': new_version})
+    except TimeoutError as e:
+        return jsonify({'error': str(e)}), 503
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 # ==================== 物品类型映射 API ====================
 
 @app.route('/api/common-items', methods=['GET'])
+@conditional_json(lambda: ([image_index.current_version()], [ITEM_TYPE_MAPPING_FILE]))
 def get_common_items():
     """获取所有资源和战斗增益列表"""
     try:
@@ -3045,6 +4364,7 @@ def get_common_items():
 # ==================== 新数据管理 API ====================
 
 @app.route('/api/new-data-config', methods=['GET'])
+@conditional_json(lambda: ([], [NEW_DATA_CONFIG_FILE]))
 def get_new_data_config():
     """获取新数据管理配置"""
     try:
@@ -3063,10 +4383,7 @@ def add_excluded_item():
         if not item_id:
             return jsonify({'error': '缺少ID'}), 400
 
-        config = load_new_data_config()
-        if item_id not in config['excluded_items']:
-            config['excluded_items'].append(item_id)
-            save_new_data_config(config)
+        new_data_store.add_excluded(item_id)
 
         return jsonify({'success': True})
     except Exception as e:
@@ -3076,10 +4393,7 @@ def add_excluded_item():
 def remove_excluded_item(item_id):
     """移除排除项"""
     try:
-        config = load_new_data_config()
-        if item_id in config['excluded_items']:
-            config['excluded_items'].remove(item_id)
-            save_new_data_config(config)
+        new_data_store.remove_excluded(item_id)
 
         return jsonify({'success': True})
     except Exception as e:
@@ -3097,13 +4411,6 @@ def record_new_item():
             if not data.get(field):
                 return jsonify({'error': f'缺少必填字段: {field}'}), 400
 
-        config = load_new_data_config()
-
-        # 检查是否已存在
-        existing_ids = [item['id'] for item in config['recorded_items']]
-        if data['id'] in existing_ids:
-            return jsonify({'error': '该ID已经录入过'}), 400
-
         # 添加录入项
         recorded_item = {
             'id': data['id'],
@@ -3116,34 +4423,34 @@ def record_new_item():
             'rarity': data.get('rarity', '')  # 添加稀有度字段
         }
 
-        config['recorded_items'].append(recorded_item)
-        save_new_data_config(config)
+        # 检查是否已存在（与写入在同一事务中）
+        if not new_data_store.add_recorded(recorded_item):
+            return jsonify({'error': '该ID已经录入过'}), 400
 
         return jsonify({'success': True, 'item': recorded_item})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/new-data-config/recorded', methods=['GET'])
+@conditional_json(lambda: ([], [NEW_DATA_CONFIG_FILE]))
 def get_recorded_items():
     """获取所有已录入数据"""
     try:
-        config = load_new_data_config()
-        return jsonify(config.get('recorded_items', []))
+        return jsonify(new_data_store.recorded_items())
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/new-data-config/recorded/by-month', methods=['GET'])
+@conditional_json(lambda: ([], [NEW_DATA_CONFIG_FILE]))
 def get_recorded_items_by_month():
     """按月份获取已录入数据"""
     try:
         month = request.args.get('month')  # 格式: 2025.10
-        config = load_new_data_config()
-        recorded_items = config.get('recorded_items', [])
 
         if month:
-            filtered_items = [item for item in recorded_items if item.get('added_date') == month]
-            return jsonify(filtered_items)
+            return jsonify(new_data_store.recorded_items(month))
         else:
+            recorded_items = new_data_store.recorded_items()
             # 按月份分组
             by_month = {}
             for item in recorded_items:
@@ -3156,15 +4463,93 @@ def get_recorded_items_by_month():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-if __name__ == '__main__':
+# ==================== 启动 ====================
+
+def warm_indexes():
+    """接受请求前预先构建CSV目录索引、图片索引和各CSV的物品列表索引"""
+    csv_catalog.refresh()
+    image_index.poll()
+    new_data_store.recorded_month_counts()
+
+    csv_count = 0
+    for category in csv_catalog.category_tree().values():
+        if category["path"]:
+            item_list_index.get_entries(category["path"], category["name"])
+            csv_count += 1
+        for sub in category["subcategories"]:
+            item_list_index.get_entries(sub["path"], sub["name"])
+            csv_count += 1
+    return csv_count
+
+def run_waitress(host, port, threads):
+    """waitress：多线程WSGI服务器（Windows可用），静态文件通过 wsgi.file_wrapper 分块发送"""
+    from waitress import serve
+    serve(app, host=host, port=port, threads=threads)
+
+def run_gunicorn(host, port, workers, threads):
+    """gunicorn：多进程+多线程（仅Linux/macOS），静态文件通过 sendfile 发送
+
+    主进程预先构建索引后fork（写时复制共享），每个worker启动自己的文件监听。
+    """
+    from gunicorn.app.base import BaseApplication
+
+    class GuiApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', f"{host}:{port}")
+            self.cfg.set('workers', workers)
+            self.cfg.set('threads', threads)
+            self.cfg.set('worker_class', 'gthread')
+            self.cfg.set('preload_app', True)
+            self.cfg.set('sendfile', True)
+            self.cfg.set('post_fork', lambda server, worker: index_watcher.start())
+
+        def load(self):
+            return app
+
+    GuiApplication().run()
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="现代战舰 - 数据资源比对工具")
+    parser.add_argument('--server', choices=['dev', 'waitress', 'gunicorn'], default='dev',
+                        help="dev=Flask开发服务器（自动重载），waitress/gunicorn=生产模式")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=2, help="gunicorn 进程数")
+    parser.add_argument('--threads', type=int, default=8, help="每个进程的线程数")
+    parser.add_argument('--x-sendfile', action='store_true',
+                        help="图片交给前置的 nginx/Apache 通过 X-Sendfile 发送")
+    args = parser.parse_args()
+
     print("=" * 70)
     print("现代战舰 - 数据资源比对工具")
     print("=" * 70)
     print(f"\n数据目录: {DATA_DIR}")
     print(f"图片目录: {IMAGE_DIR}")
-    print("\n正在启动Web服务器...")
-    print("请在浏览器中访问: http://127.0.0.1:5000")
+    print("\n正在构建CSV和图片索引...")
+    csv_count = warm_indexes()
+    print(f"已索引 {csv_count} 个CSV、{len(csv_catalog.all_ids())} 个ID")
+
+    if args.x_sendfile:
+        app.config['USE_X_SENDFILE'] = True
+
+    # gunicorn 在每个worker中启动文件监听
+    if args.server != 'gunicorn':
+        watch_mode = index_watcher.start()
+        print(f"文件监听: {watch_mode}")
+
+    print(f"\n正在启动Web服务器（{args.server}）...")
+    print(f"请在浏览器中访问: http://{args.host}:{args.port}")
     print("\n按 Ctrl+C 停止服务器")
     print("=" * 70)
 
-    app.run(debug=True, host='127.0.0.1', port=5000)
+    if args.server == 'waitress':
+        run_waitress(args.host, args.port, args.threads)
+    elif args.server == 'gunicorn':
+        run_gunicorn(args.host, args.port, args.workers, args.threads)
+    else:
+        app.run(debug=True, host=args.host, port=args.port, threaded=True)
+
+if __name__ == '__main__':
+    main()
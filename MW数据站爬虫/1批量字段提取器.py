@@ -2,17 +2,18 @@
 MW数据站批量字段提取器
 读取本地HTML文件，解析侧边栏菜单结构，自动爬取所有页面的字段信息
 """
-import requests
-import re
-import json
-import html
 from pathlib import Path
 import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+from http_client import configure, http_get, cache_summary
+from vue_context import extract_component_context, extract_list_context
+
 
 BASE_URL = "https://mwstats.info"
 OUTPUT_BASE = Path(__file__).parent / "字段数据"
+# 并发页面数（请求间隔由 http_client 按主机限速）
+MAX_WORKERS = 3
 
 
 def fetch_menu_from_website():
@@ -24,28 +25,17 @@ def fetch_menu_from_website():
     url = f"{BASE_URL}/?lang=zh-hans"
     print(f"访问: {url}")
 
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-        'Accept-Language': 'zh-CN,zh;q=0.9',
-    }
-
     try:
-        response = requests.get(url, headers=headers, timeout=30)
+        response = http_get(url)
         response.raise_for_status()
-        response.encoding = 'utf-8'
 
         # 查找sidebar-menu的context数据
-        pattern = r'<sidebar-menu\s+v-bind:context="([^"]+)"'
-        match = re.search(pattern, response.text)
+        menu_data = extract_component_context(response.content, 'sidebar-menu')
 
-        if not match:
+        if not menu_data:
             print("未找到侧边栏菜单数据")
             return None
 
-        # 解码HTML实体
-        json_str = html.unescape(match.group(1))
-        menu_data = json.loads(json_str)
-
         print(f"成功获取菜单数据")
         return menu_data.get('items', [])
 
@@ -93,39 +83,12 @@ def extract_menu_urls(items, parent_path="", parent_title=""):
 
 def fetch_fields_from_url(url):
     """从URL提取字段信息（简化版，仅提取字段名）"""
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-        'Accept-Language': 'zh-CN,zh;q=0.9',
-    }
-
     try:
-        response = requests.get(url, headers=headers, timeout=30)
+        response = http_get(url)
         response.raise_for_status()
-        response.encoding = 'utf-8'
-
-        # 尝试多种组件模式
-        patterns = [
-            r'<ship-list\s+v-bind:context="([^"]+)"',
-            r'<weapon-list\s+v-bind:context="([^"]+)"',
-            r'<aircraft-list\s+v-bind:context="([^"]+)"',
-            r'<item-list\s+v-bind:context="([^"]+)"',
-            r'<(\w+)-list\s+v-bind:context="([^"]+)"',
-        ]
-
-        data = None
-        for pattern in patterns:
-            match = re.search(pattern, response.text)
-            if match:
-                if len(match.groups()) == 2:
-                    json_str = html.unescape(match.group(2))
-                else:
-                    json_str = html.unescape(match.group(1))
 
-                try:
-                    data = json.loads(json_str)
-                    break
-                except json.JSONDecodeError:
-                    continue
+        # 列表组件（ship-list / weapon-list / ... / 其他 *-list）的context数据
+        data = extract_list_context(response.content)
 
         if not data:
             return None
@@ -247,7 +210,8 @@ def main():
     start_time = time.time()
 
     # 使用线程池，但限制并发数避免被封
-    with ThreadPoolExecutor(max_workers=3) as executor:
+    configure(pool_size=MAX_WORKERS)
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
         futures = {
             executor.submit(process_single_url, title, url, file_path): (title, url)
             for title, url, file_path in all_urls
@@ -264,9 +228,6 @@ def main():
                 print(f"  [{title}] 异常: {e}")
                 failed_urls.append((title, url))
 
-            # 添加小延时
-            time.sleep(0.5)
-
     elapsed = time.time() - start_time
 
     print("\n" + "=" * 70)
@@ -275,6 +236,8 @@ def main():
     print(f"成功: {success_count}/{len(all_urls)}")
     print(f"耗时: {elapsed:.2f} 秒")
     print(f"保存位置: {OUTPUT_BASE}")
+    if cache_summary():
+        print(f"网页缓存: {cache_summary()}")
 
     if failed_urls:
         print(f"\n失败的页面 ({len(failed_urls)}):")
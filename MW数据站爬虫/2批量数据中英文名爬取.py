@@ -1,15 +1,17 @@
 """
 MW数据站批量数据爬取器
 读取字段数据文件夹，批量爬取所有页面的中英文数据并保存为CSV
+
+全部列表 × 中英文 × 页码作为一个异步任务运行（async_crawler.py）：
+所有请求共用一个并发上限和令牌桶限速，某个列表的两种语言都取完后立即合并保存
 """
-import requests
-import re
-import json
 import csv
-import html
+import asyncio
 from pathlib import Path
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from async_crawler import AsyncFetcher
+from vue_context import extract_list_page
 
 
 BASE_URL = "https://mwstats.info"
@@ -44,91 +46,52 @@ def read_field_file(field_file):
     return title, url, fields
 
 
-def fetch_page_data(url, page=1):
-    """获取单页数据"""
-    page_url = f"{url}&page={page}" if '?' in url else f"{url}?page={page}"
-
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-        'Accept-Language': 'zh-CN,zh;q=0.9',
-    }
-
-    response = requests.get(page_url, headers=headers, timeout=30)
-    response.raise_for_status()
-    response.encoding = 'utf-8'
-
-    # 查找list组件的context数据（通用模式）
-    patterns = [
-        r'<ship-list\s+v-bind:context="([^"]+)"',
-        r'<weapon-list\s+v-bind:context="([^"]+)"',
-        r'<aircraft-list\s+v-bind:context="([^"]+)"',
-        r'<item-list\s+v-bind:context="([^"]+)"',
-        r'<(\w+)-list\s+v-bind:context="([^"]+)"',
-    ]
-
-    for pattern in patterns:
-        match = re.search(pattern, response.text)
-        if match:
-            if len(match.groups()) == 2:
-                json_str = html.unescape(match.group(2))
-            else:
-                json_str = html.unescape(match.group(1))
-
-            try:
-                data = json.loads(json_str)
-                items_list = data.get('list', {}).get('items', [])
-                total = data.get('list', {}).get('total', 0)
-                return items_list, total
-            except json.JSONDecodeError:
-                continue
-
-    return None, 0
-
-
-def fetch_all_data(url, lang_name=""):
-    """爬取所有数据（并发爬取所有页面）"""
-    print(f"  [{lang_name}] 获取数据...")
+def page_url(url, page):
+    return f"{url}&page={page}" if '?' in url else f"{url}?page={page}"
 
-    try:
-        # 获取第一页
-        items_list, total = fetch_page_data(url, 1)
 
-        if items_list is None:
-            print(f"    获取失败")
-            return []
+def parse_page_data(page_content):
+    """从列表页中解析数据（页面原始字节或文本），返回 (items, total)，未找到时返回 (None, 0)"""
+    return extract_list_page(page_content)
 
-        per_page = len(items_list)
-        total_pages = (total + per_page - 1) // per_page
-        print(f"    总共 {total} 条, {total_pages} 页")
 
-        all_items = items_list.copy()
+async def fetch_page_data(fetcher, url, page=1):
+    """获取单页数据"""
+    return parse_page_data(await fetcher.get_content(page_url(url, page)))
 
-        # 如果只有一页，直接返回
-        if total_pages == 1:
-            return all_items
 
-        # 并发获取剩余页面
-        with ThreadPoolExecutor(max_workers=5) as executor:
-            futures = {
-                executor.submit(fetch_page_data, url, page): page
-                for page in range(2, total_pages + 1)
-            }
+async def fetch_all_data(fetcher, url, label=""):
+    """
+    爬取一个列表的所有数据
+    先取第1页得到总数，其余页面一次性交给调度器，与其他列表的请求一起排队并发获取
+    """
+    try:
+        items_list, total = await fetch_page_data(fetcher, url, 1)
+    except Exception as e:
+        print(f"  [{label}] 爬取失败: {e}")
+        return []
 
-            for future in as_completed(futures):
-                page = futures[future]
-                try:
-                    items, _ = future.result()
-                    if items:
-                        all_items.extend(items)
-                except Exception as e:
-                    print(f"    Page {page} 错误: {e}")
+    if items_list is None:
+        print(f"  [{label}] 获取失败")
+        return []
 
-        print(f"    完成: {len(all_items)} 条")
-        return all_items
+    per_page = len(items_list)
+    total_pages = (total + per_page - 1) // per_page if per_page else 1
+    print(f"  [{label}] 总共 {total} 条, {total_pages} 页")
 
-    except Exception as e:
-        print(f"    爬取失败: {e}")
-        return []
+    async def fetch_rest(page):
+        try:
+            items, _ = await fetch_page_data(fetcher, url, page)
+            return items or []
+        except Exception as e:
+            print(f"  [{label}] Page {page} 错误: {e}")
+            return []
+
+    # 按页码顺序拼接
+    pages = await asyncio.gather(*(fetch_rest(page) for page in range(2, total_pages + 1)))
+    all_items = items_list + [item for items in pages for item in items]
+    print(f"  [{label}] 完成: {len(all_items)} 条")
+    return all_items
 
 
 def find_id_field(items):
@@ -237,15 +200,14 @@ def save_to_csv(items, output_file):
     return True
 
 
-def process_single_page(field_file, relative_path):
+async def process_single_page(fetcher, field_file, relative_path):
     """处理单个字段文件"""
-    print(f"\n处理: {relative_path}")
-
     # 读取字段文件
     title, url, fields = read_field_file(field_file)
+    csv_name = str(relative_path).replace('_字段列表.txt', '.csv')
 
     if not url:
-        print(f"  跳过: 没有URL")
+        print(f"\n跳过 {csv_name}: 没有URL")
         return False
 
     # 构建中英文URL
@@ -257,27 +219,40 @@ def process_single_page(field_file, relative_path):
         url_en = url
 
     # 并发爬取中英文数据
-    with ThreadPoolExecutor(max_workers=2) as executor:
-        future_zh = executor.submit(fetch_all_data, url_zh, "中文")
-        future_en = executor.submit(fetch_all_data, url_en, "英文")
-
-        items_zh = future_zh.result()
-        items_en = future_en.result()
+    items_zh, items_en = await asyncio.gather(
+        fetch_all_data(fetcher, url_zh, f"{csv_name} 中文"),
+        fetch_all_data(fetcher, url_en, f"{csv_name} 英文"),
+    )
 
-    # 合并数据
+    # 合并数据（两种语言都取完后立即保存，不等其他列表）
+    print(f"\n处理: {csv_name}")
     if items_zh or items_en:
         print(f"  合并数据...")
         merged_items = merge_bilingual_data(items_zh, items_en)
-
-        # 保存CSV（将Path转为字符串再替换）
-        csv_name = str(relative_path).replace('_字段列表.txt', '.csv')
-        output_file = OUTPUT_DIR / csv_name
-        return save_to_csv(merged_items, output_file)
+        return save_to_csv(merged_items, OUTPUT_DIR / csv_name)
     else:
         print(f"  失败: 无数据")
         return False
 
 
+async def crawl_all(field_files):
+    """所有字段文件作为一个任务并发爬取，返回成功数量"""
+    success_count = 0
+    async with AsyncFetcher() as fetcher:
+        print(f"请求后端: {fetcher.backend}" + ("（离线重放，只用网页缓存）" if fetcher.offline else ""))
+        tasks = [
+            asyncio.create_task(process_single_page(fetcher, file_path, relative_path))
+            for file_path, relative_path in field_files
+        ]
+        for task in asyncio.as_completed(tasks):
+            if await task:
+                success_count += 1
+        print(f"\n请求数: {fetcher.stats['requests']}（重试 {fetcher.stats['retries']}）")
+        if fetcher.cache:
+            print(f"网页缓存: {fetcher.cache.summary()}")
+    return success_count
+
+
 def find_all_field_files():
     """查找所有字段列表文件"""
     field_files = []
@@ -329,16 +304,8 @@ def main():
     print("=" * 70)
 
     # 批量处理
-    success_count = 0
     start_time = time.time()
-
-    for file_path, relative_path in field_files:
-        if process_single_page(file_path, relative_path):
-            success_count += 1
-
-        # 添加延时避免请求过快
-        time.sleep(1)
-
+    success_count = asyncio.run(crawl_all(field_files))
     elapsed = time.time() - start_time
 
     print("\n" + "=" * 70)
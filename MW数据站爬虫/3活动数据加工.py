@@ -5,16 +5,20 @@
 """
 import csv
 from pathlib import Path
-import requests
-from bs4 import BeautifulSoup
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import time
 
+from gacha_pages import parse_event_gachas, parse_currency_name
+from http_cache import activity_ttl
+from http_client import configure, http_get, cache_summary
+
 
 # 路径配置
 INPUT_FILE = Path(__file__).parent / "爬取数据" / "活动.csv"
 OUTPUT_FILE = Path(__file__).parent / "抽奖活动.csv"
 BASE_URL = "https://mwstats.info"
+# 并发访问页面数
+MAX_WORKERS = 5
 
 
 def load_activities(input_file):
@@ -29,9 +33,10 @@ def load_activities(input_file):
     return activities, reader.fieldnames
 
 
-def fetch_gacha_info(url):
+def fetch_gacha_info(url, ttl=None):
     """
     访问活动URL，提取抽奖信息
+    ttl: 网页缓存有效期（已结束的活动永久缓存）
     返回: (gacha_type, gacha_1_url, gacha_2_url)
     """
     if not url:
@@ -49,55 +54,27 @@ def fetch_gacha_info(url):
             separator = '&' if '?' in full_url else '?'
             full_url = f"{full_url}{separator}lang=zh-hans"
 
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-            'Accept-Language': 'zh-CN,zh;q=0.9',
-        }
-
-        response = requests.get(full_url, headers=headers, timeout=30)
+        response = http_get(full_url, ttl=ttl)
         response.raise_for_status()
         response.encoding = 'utf-8'
 
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        # 查找<h2>抽奖</h2>或<h2>战利品箱</h2>区域
-        gacha_section = None
-        for h2 in soup.find_all('h2'):
-            h2_text = h2.get_text(strip=True)
-            if h2_text in ['抽奖', '战利品箱']:
-                # 向上查找包含gacha/lootboxes链接的容器
-                container = h2.parent
-                while container and container.parent and container.parent.name != 'body':
-                    container = container.parent
-                    # 检查是否包含gacha或lootboxes链接
-                    if container.find('a', href=lambda x: x and ('/gacha/' in x or '/lootboxes/' in x)):
-                        gacha_section = container
-                        break
-                break
-
-        if not gacha_section:
+        # <h2>抽奖</h2>或<h2>战利品箱</h2>区域中的gacha/lootboxes卡片
+        cards = parse_event_gachas(response.text)
+        if not cards:
             return None, None, None
 
         # 提取所有gacha/lootboxes链接和名称
         gacha_links = []
         gacha_names = []
+        for name, href in cards:
+            gacha_names.append(name)
 
-        # 查找所有gacha/lootboxes卡片
-        for link in gacha_section.find_all('a', href=True):
-            href = link['href']
-            if '/gacha/' in href or '/lootboxes/' in href:
-                # 提取gacha名称
-                name_tag = link.find('h2')
-                if name_tag:
-                    name = name_tag.get_text(strip=True)
-                    gacha_names.append(name)
-
-                    # 构建完整URL
-                    if href.startswith('/'):
-                        gacha_url = BASE_URL + href
-                    else:
-                        gacha_url = href
-                    gacha_links.append(gacha_url)
+            # 构建完整URL
+            if href.startswith('/'):
+                gacha_url = BASE_URL + href
+            else:
+                gacha_url = href
+            gacha_links.append(gacha_url)
 
         # 抽奖类型：取最后一个gacha的名称 + "类"
         gacha_type = None
@@ -140,9 +117,10 @@ def enrich_event_activities(activities):
     print(f"  找到 {len(event_activities)} 个活动，开始并行访问URL...")
 
     # 并行获取gacha信息
-    with ThreadPoolExecutor(max_workers=5) as executor:
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
         futures = {
-            executor.submit(fetch_gacha_info, activity.get('url', '')): activity
+            executor.submit(fetch_gacha_info, activity.get('url', ''),
+                            activity_ttl(activity.get('formattedDate'))): activity
             for activity in event_activities
         }
 
@@ -173,45 +151,25 @@ def enrich_event_activities(activities):
     print("  URL访问完成")
 
 
-def fetch_gacha_currency_type(gacha_url):
+def fetch_gacha_currency_type(gacha_url, ttl=None):
     """
     访问gacha URL，从"抽奖货币"容器获取真实的gacha_type
+    ttl: 网页缓存有效期（已结束的活动永久缓存）
     返回: gacha_type (如"筹码类"、"其它类")
     """
     if not gacha_url:
         return "其它类"
 
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-            'Accept-Language': 'zh-CN,zh;q=0.9',
-        }
 
-        response = requests.get(gacha_url, headers=headers, timeout=30)
+        response = http_get(gacha_url, ttl=ttl)
         response.raise_for_status()
         response.encoding = 'utf-8'
 
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        # 查找<h2>抽奖货币</h2>区域
-        for h2 in soup.find_all('h2'):
-            if h2.get_text(strip=True) == '抽奖货币':
-                # 查找battle-pass-module__text-primary（货币名称在这里）
-                # 从h2往上找到外层容器，然后找所有的battle-pass-module__text-primary
-                container = h2.parent
-                for _ in range(5):  # 最多向上找5层
-                    if container and container.parent:
-                        container = container.parent
-                    else:
-                        break
-
-                # 在容器中查找货币名称
-                currency_div = container.find('div', class_='battle-pass-module__text-primary')
-                if currency_div:
-                    currency_name = currency_div.get_text(strip=True)
-                    if currency_name:
-                        return f"{currency_name}类"
-                break
+        # <h2>抽奖货币</h2>区域中的货币名称
+        currency_name = parse_currency_name(response.text)
+        if currency_name:
+            return f"{currency_name}类"
 
         return "其它类"
 
@@ -246,9 +204,10 @@ def refine_special_gacha_types(activities):
     print(f"  找到 {len(special_activities)} 个特殊gacha，开始并行访问获取真实类型...")
 
     # 并行获取gacha货币类型
-    with ThreadPoolExecutor(max_workers=5) as executor:
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
         futures = {
-            executor.submit(fetch_gacha_currency_type, activity.get('gacha_1_url', '')): activity
+            executor.submit(fetch_gacha_currency_type, activity.get('gacha_1_url', ''),
+                            activity_ttl(activity.get('formattedDate'))): activity
             for activity in special_activities
         }
 
@@ -419,6 +378,7 @@ def main():
     print("=" * 70)
     print("活动数据加工脚本")
     print("=" * 70)
+    configure(pool_size=MAX_WORKERS)
 
     # 检查输入文件
     if not INPUT_FILE.exists():
@@ -499,6 +459,8 @@ def main():
         for gacha_type, count in sorted(gacha_type_count.items(), key=lambda x: -x[1]):
             print(f"  {gacha_type}: {count}")
 
+    if cache_summary():
+        print(f"\n网页缓存: {cache_summary()}")
     print("\n" + "=" * 70)
 
 
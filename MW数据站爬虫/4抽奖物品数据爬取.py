@@ -10,13 +10,18 @@
 - 机密货物类：双抽奖池（货运无人机+机密货物），输出到 cargo/ 目录
 """
 import csv
+import sys
 import json
-import requests
-from bs4 import BeautifulSoup
 from pathlib import Path
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import re
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from extract_manifest import folder_file_names
+from gacha_pages import parse_gacha_page
+from http_cache import activity_ttl
+from http_client import configure, http_get, cache_summary
+
 
 # 路径配置
 INPUT_FILE = Path(__file__).parent / "抽奖活动.csv"
@@ -30,6 +35,8 @@ EVENTHUB_DIR = Path(__file__).parent.parent / "MW解包有益资源" / "contents
 CURRENCY_DIR = Path(__file__).parent.parent / "MW解包有益资源" / "contentseparated_assets_content" / "textures" / "sprites" / "currency"
 ITEM_TYPE_MAPPING_FILE = Path(__file__).parent.parent / "物品类型映射.json"
 BASE_URL = "https://mwstats.info"
+# 并发访问页面数
+MAX_WORKERS = 5
 
 
 # 物品数据库（从爬取数据CSV加载）
@@ -292,9 +299,10 @@ def classify_item_type(name, url, type_str):
     return "其它"
 
 
-def fetch_gacha_data(url):
+def fetch_gacha_data(url, ttl=None):
     """
     访问gacha URL，提取完整数据
+    ttl: 网页缓存有效期（已结束的活动永久缓存）
     返回: (metadata, items_list)
     """
     if not url:
@@ -308,93 +316,49 @@ def fetch_gacha_data(url):
         else:
             full_url = url
 
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-            'Accept-Language': 'zh-CN,zh;q=0.9',
-        }
-
-        response = requests.get(full_url, headers=headers, timeout=30)
+        response = http_get(full_url, ttl=ttl)
         response.raise_for_status()
         response.encoding = 'utf-8'
 
-        soup = BeautifulSoup(response.text, 'html.parser')
+        # 解析页面（标题、<h2>抽奖货币</h2> 的筹码图片、<h2>物品</h2> 的物品卡片）
+        page = parse_gacha_page(response.text)
 
         # 提取metadata
         metadata = {}
 
         # 名称
-        title_tag = soup.find('h1')
-        if title_tag:
-            metadata['name'] = title_tag.get_text(strip=True)
-
-        # 查找<h2>抽奖货币</h2>区域，提取筹码图片
-        currency_image_url = None
-        for h2 in soup.find_all('h2'):
-            if h2.get_text(strip=True) == '抽奖货币':
-                container = h2.parent.parent
-                currency_container = container.find_next_sibling()
-                if currency_container:
-                    # 查找图片标签
-                    img_tag = currency_container.find('img')
-                    if img_tag:
-                        # 优先使用data-src，其次使用src
-                        currency_image_url = img_tag.get('data-src') or img_tag.get('src')
-                        if currency_image_url:
-                            # 如果是相对路径，补全为完整URL
-                            if currency_image_url.startswith('/'):
-                                currency_image_url = BASE_URL + currency_image_url
-                            # 提取原始URL（去除CDN参数）
-                            # 例如: https://mwstats.info/cdn-cgi/image/width=300%2Cformat=auto%2Cquality=85/images/sprites-2024-transparent/currency_gachacoins_fw25.webp?v=63491759
-                            # 转换为: https://mwstats.info/images/sprites-2024-transparent/currency_gachacoins_fw25.webp?v=63491759
-                            currency_image_url = re.sub(r'/cdn-cgi/image/[^/]+/', '/', currency_image_url)
-                            metadata['currency_gachacoins_image'] = currency_image_url
-                break
-
-        # 查找<h2>物品</h2>区域
-        items_container = None
-        for h2 in soup.find_all('h2'):
-            if h2.get_text(strip=True) == '物品':
-                container = h2.parent.parent
-                items_container = container.find_next_sibling()
-                break
-
-        if not items_container:
-            return metadata, []
+        if page['name'] is not None:
+            metadata['name'] = page['name']
+
+        # 筹码图片
+        currency_image_url = page['currency_image']
+        if currency_image_url:
+            # 如果是相对路径，补全为完整URL
+            if currency_image_url.startswith('/'):
+                currency_image_url = BASE_URL + currency_image_url
+            # 提取原始URL（去除CDN参数）
+            # 例如: https://mwstats.info/cdn-cgi/image/width=300%2Cformat=auto%2Cquality=85/images/sprites-2024-transparent/currency_gachacoins_fw25.webp?v=63491759
+            # 转换为: https://mwstats.info/images/sprites-2024-transparent/currency_gachacoins_fw25.webp?v=63491759
+            currency_image_url = re.sub(r'/cdn-cgi/image/[^/]+/', '/', currency_image_url)
+            metadata['currency_gachacoins_image'] = currency_image_url
 
         # 提取所有物品
         items = []
-        modules = items_container.find_all('a', class_='battle-pass-module')
 
-        for module in modules:
+        for module in page['items']:
             item = {}
 
             # 物品链接
-            href = module.get('href', '')
+            href = module['href']
             if href.startswith('/'):
                 item_url = BASE_URL + href
             else:
                 item_url = href
 
-            # 物品名称
-            name_div = module.find('div', class_='battle-pass-module__text-primary')
-            if name_div:
-                item_name = name_div.get_text(strip=True)
-            else:
-                item_name = ''
-
-            # 类型/稀有度信息
-            type_span = module.find('span', class_='battle-pass-module__text-secondary-name')
-            if type_span:
-                type_str = type_span.get_text(strip=True)
-            else:
-                type_str = ''
-
-            # 抽奖概率
-            prob_span = module.find('span', class_='battle-pass-module__text-secondary-points')
-            if prob_span:
-                prob_str = prob_span.get_text(strip=True)
-            else:
-                prob_str = ''
+            # 物品名称、类型/稀有度信息、抽奖概率
+            item_name = module['name']
+            type_str = module['type']
+            prob_str = module['probability']
 
             # 构建物品对象
             item['name'] = item_name
@@ -545,19 +509,28 @@ def parse_date_for_sorting(formatted_date):
     return (year, month)
 
 
+# 资源文件夹的文件名集合缓存（每个文件夹只读一次 _index.json 或列一次目录）
+# 统一小写: 解包文件保留游戏里的大小写（如 lootbox_activity_LA96_widget.png），gacha_id 是小写，
+# 与原来 Windows 上 Path.exists() 不区分大小写的行为一致
+_resource_files = {}
+
+
+def resource_file_exists(folder, file_name):
+    """检查解包资源文件夹中是否有该文件（不区分大小写）"""
+    key = str(folder)
+    if key not in _resource_files:
+        _resource_files[key] = {n.lower() for n in folder_file_names(folder)} if folder.exists() else set()
+    return file_name.lower() in _resource_files[key]
+
+
 def check_activity_gacha_exists(gacha_id):
     """
     检查activity_gacha资源文件是否存在
     返回: True如果存在background或widget文件，否则False
     """
-    if not ACTIVITIES_DIR.exists():
-        return False
-
     # 检查是否存在background或widget文件
-    background_file = ACTIVITIES_DIR / f"activity_gacha_{gacha_id}_background.png"
-    widget_file = ACTIVITIES_DIR / f"activity_gacha_{gacha_id}_widget.png"
-
-    return background_file.exists() or widget_file.exists()
+    return (resource_file_exists(ACTIVITIES_DIR, f"activity_gacha_{gacha_id}_background.png")
+            or resource_file_exists(ACTIVITIES_DIR, f"activity_gacha_{gacha_id}_widget.png"))
 
 
 def check_currency_gachacoins_exists(gacha_id):
@@ -565,13 +538,8 @@ def check_currency_gachacoins_exists(gacha_id):
     检查currency_gachacoins资源文件是否存在
     返回: True如果存在，否则False
     """
-    if not CURRENCY_DIR.exists():
-        return False
-
     # 检查是否存在currency_gachacoins文件
-    currency_file = CURRENCY_DIR / f"currency_gachacoins_{gacha_id}.png"
-
-    return currency_file.exists()
+    return resource_file_exists(CURRENCY_DIR, f"currency_gachacoins_{gacha_id}.png")
 
 
 def check_lootbox_activity_exists(gacha_id):
@@ -579,13 +547,8 @@ def check_lootbox_activity_exists(gacha_id):
     检查lootbox_activity资源文件是否存在
     返回: True如果存在widget文件，否则False
     """
-    if not ACTIVITIES_DIR.exists():
-        return False
-
     # 检查是否存在widget文件
-    widget_file = ACTIVITIES_DIR / f"lootbox_activity_{gacha_id}_widget.png"
-
-    return widget_file.exists()
+    return resource_file_exists(ACTIVITIES_DIR, f"lootbox_activity_{gacha_id}_widget.png")
 
 
 def check_bigevent_currency_gameplay_exists(gacha_id):
@@ -593,13 +556,8 @@ def check_bigevent_currency_gameplay_exists(gacha_id):
     检查bigevent_currency_gacha_gameplay资源文件是否存在
     返回: True如果存在，否则False
     """
-    if not CURRENCY_DIR.exists():
-        return False
-
     # 检查是否存在bigevent_currency_gacha_gameplay文件
-    currency_file = CURRENCY_DIR / f"bigevent_currency_gacha_gameplay_{gacha_id}.png"
-
-    return currency_file.exists()
+    return resource_file_exists(CURRENCY_DIR, f"bigevent_currency_gacha_gameplay_{gacha_id}.png")
 
 
 def check_bigevent_currency_rm_exists(gacha_id):
@@ -607,13 +565,8 @@ def check_bigevent_currency_rm_exists(gacha_id):
     检查bigevent_currency_gacha_rm资源文件是否存在
     返回: True如果存在，否则False
     """
-    if not CURRENCY_DIR.exists():
-        return False
-
     # 检查是否存在bigevent_currency_gacha_rm文件
-    currency_file = CURRENCY_DIR / f"bigevent_currency_gacha_rm_{gacha_id}.png"
-
-    return currency_file.exists()
+    return resource_file_exists(CURRENCY_DIR, f"bigevent_currency_gacha_rm_{gacha_id}.png")
 
 
 def check_eventhub_widget_exists(gacha_id):
@@ -621,13 +574,8 @@ def check_eventhub_widget_exists(gacha_id):
     检查eventhub event_*_widget资源文件是否存在
     返回: True如果存在，否则False
     """
-    if not EVENTHUB_DIR.exists():
-        return False
-
     # 检查是否存在event_*_widget文件
-    widget_file = EVENTHUB_DIR / f"event_{gacha_id}_widget.png"
-
-    return widget_file.exists()
+    return resource_file_exists(EVENTHUB_DIR, f"event_{gacha_id}_widget.png")
 
 
 def generate_index_json(activities_info):
@@ -715,7 +663,7 @@ def process_gacha(row):
 
     print(f"  [{name}] ({gacha_id})")
 
-    metadata, items = fetch_gacha_data(gacha_1_url)
+    metadata, items = fetch_gacha_data(gacha_1_url, activity_ttl(formatted_date))
 
     if metadata is None or items is None:
         print(f"    失败")
@@ -804,8 +752,8 @@ def process_flagship_gacha(row):
     print(f"  [{name}] ({gacha_id})")
 
     # 爬取两个宝箱的数据
-    container_metadata, container_items = fetch_gacha_data(gacha_1_url)
-    flagship_metadata, flagship_items = fetch_gacha_data(gacha_2_url)
+    container_metadata, container_items = fetch_gacha_data(gacha_1_url, activity_ttl(formatted_date))
+    flagship_metadata, flagship_items = fetch_gacha_data(gacha_2_url, activity_ttl(formatted_date))
 
     if container_metadata is None or flagship_metadata is None:
         print(f"    失败")
@@ -894,8 +842,8 @@ def process_cargo_gacha(row):
     print(f"  [{name}] ({gacha_id})")
 
     # 爬取两个货箱的数据
-    gameplay_metadata, gameplay_items = fetch_gacha_data(gacha_1_url)
-    rm_metadata, rm_items = fetch_gacha_data(gacha_2_url)
+    gameplay_metadata, gameplay_items = fetch_gacha_data(gacha_1_url, activity_ttl(formatted_date))
+    rm_metadata, rm_items = fetch_gacha_data(gacha_2_url, activity_ttl(formatted_date))
 
     if gameplay_metadata is None or rm_metadata is None:
         print(f"    失败")
@@ -995,6 +943,7 @@ def main():
     print("=" * 70)
     print("抽奖物品数据爬取脚本")
     print("=" * 70)
+    configure(pool_size=MAX_WORKERS)
 
     # 检查输入文件
     if not INPUT_FILE.exists():
@@ -1048,7 +997,7 @@ def main():
 
         success_count = 0
 
-        with ThreadPoolExecutor(max_workers=5) as executor:
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
             futures = {
                 executor.submit(process_gacha, row): row
                 for row in chip_gachas
@@ -1080,7 +1029,7 @@ def main():
 
         success_count = 0
 
-        with ThreadPoolExecutor(max_workers=5) as executor:
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
             futures = {
                 executor.submit(process_flagship_gacha, row): row
                 for row in flagship_gachas
@@ -1112,7 +1061,7 @@ def main():
 
         success_count = 0
 
-        with ThreadPoolExecutor(max_workers=5) as executor:
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
             futures = {
                 executor.submit(process_cargo_gacha, row): row
                 for row in cargo_gachas
@@ -1143,6 +1092,8 @@ def main():
     elif not chip_gachas and not flagship_gachas and not cargo_gachas:
         print("\n没有需要处理的抽奖活动")
 
+    if cache_summary():
+        print(f"\n网页缓存: {cache_summary()}")
     print("\n" + "=" * 70)
 
 
@@ -0,0 +1,164 @@
+"""
+异步抓取引擎
+所有请求（列表 × 语言 × 页码）经同一个调度器发出：
+  - 全局并发上限（asyncio.Semaphore）
+  - 令牌桶限速（每秒 RATE 个请求，允许 BURST 个突发）；收到 429 时清空令牌桶并按 Retry-After 暂停
+  - 429 / 5xx / 网络错误按 http_client 的指数退避规则重试
+  - 与 http_client 共用网页缓存和离线重放设置（http_cache.py）
+
+装了 httpx 时用 httpx.AsyncClient（pip install httpx）；
+没装时退回 http_client 的 requests 连接池，在线程中执行请求，调度方式不变。
+
+用法:
+    async with AsyncFetcher() as fetcher:
+        text = await fetcher.get_text(url)
+        data = await fetcher.get_content(url)   # 原始字节（交给 vue_context 时不必先解码）
+"""
+import time
+import asyncio
+
+import requests
+
+from http_cache import HttpCache, OfflineCacheMiss
+from http_client import (DEFAULT_HEADERS, TIMEOUT, MAX_RETRIES, RETRY_STATUS, RETRY_AFTER_MAX, CACHE_ENABLED,
+                         OFFLINE, backoff_delay, retry_after_seconds, configure)
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# 同时进行的请求数
+CONCURRENCY = 10
+# 令牌桶: 每秒请求数、突发上限
+RATE = 10.0
+BURST = 5
+
+
+# ==================== 令牌桶 ====================
+
+class TokenBucket:
+    """异步令牌桶；等待者按到达顺序依次取得令牌"""
+
+    def __init__(self, rate=RATE, burst=BURST):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        async with self._lock:
+            self._refill()
+            while self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+    def pause(self, seconds):
+        """清空令牌并透支 seconds 秒的量，之后的请求至少推迟这么久"""
+        self._refill()
+        self.tokens = min(self.tokens, 0.0) - seconds * self.rate
+
+
+# ==================== 抓取器 ====================
+
+class AsyncFetcher:
+    def __init__(self, concurrency=CONCURRENCY, rate=RATE, burst=BURST, max_retries=MAX_RETRIES,
+                 cache=CACHE_ENABLED, offline=OFFLINE):
+        self.max_retries = max_retries
+        self.offline = offline
+        self.cache = HttpCache() if cache or offline else None
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.bucket = TokenBucket(rate, burst)
+        self.stats = {'requests': 0, 'retries': 0}
+        if httpx is not None:
+            self.backend = "httpx"
+            self.client = httpx.AsyncClient(
+                headers=DEFAULT_HEADERS,
+                timeout=TIMEOUT,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+            )
+            self.retry_errors = (httpx.TransportError,)
+        else:
+            # 限速和缓存由这里负责，关掉 http_client 自身的按主机间隔和缓存
+            self.backend = "requests"
+            self.session = configure(pool_size=concurrency, min_interval=0, cache=False, offline=False).session
+            self.retry_errors = (requests.ConnectionError, requests.Timeout)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        if self.backend == "httpx":
+            await self.client.aclose()
+        if self.cache:
+            self.cache.close()
+
+    async def _request(self, url, headers):
+        if self.backend == "httpx":
+            return await self.client.get(url, headers=headers)
+        return await asyncio.to_thread(self.session.get, url, headers=headers, timeout=TIMEOUT)
+
+    async def get_content(self, url, ttl=None):
+        """
+        获取页面原始字节，先查缓存
+        重试用尽后: 网络错误抛出最后的异常，HTTP 错误状态抛出 raise_for_status 的异常；
+        离线模式缓存缺失时抛出 OfflineCacheMiss
+        """
+        cache = self.cache
+        entry = cache.lookup(url) if cache else None
+        if entry is not None and (self.offline or cache.is_fresh(url, entry, ttl)):
+            cache.count('hit')
+            return entry['body']
+        if self.offline:
+            cache.count('miss')
+            raise OfflineCacheMiss(f"离线模式下缓存中没有: {url}")
+
+        headers = HttpCache.validation_headers(entry) if entry is not None else {}
+        response = await self._fetch(url, headers)
+        if entry is not None and response.status_code == 304:
+            cache.touch(url)
+            return entry['body']
+        response.raise_for_status()
+        if cache and response.status_code == 200:
+            cache.store(url, response.headers, response.content)
+        return response.content
+
+    async def get_text(self, url, ttl=None):
+        """获取页面文本（按 UTF-8 解码）"""
+        return (await self.get_content(url, ttl)).decode('utf-8', errors='replace')
+
+    async def _fetch(self, url, headers):
+        """带重试的请求，返回最后一次的响应"""
+        for attempt in range(self.max_retries + 1):
+            await self.bucket.acquire()
+            async with self.semaphore:
+                self.stats['requests'] += 1
+                try:
+                    response = await self._request(url, headers)
+                except self.retry_errors:
+                    if attempt >= self.max_retries:
+                        raise
+                    delay = backoff_delay(attempt)
+                else:
+                    if response.status_code not in RETRY_STATUS or attempt >= self.max_retries:
+                        return response
+                    delay = retry_after_seconds(response)
+                    if delay is None:
+                        delay = backoff_delay(attempt)
+                    delay = min(delay, RETRY_AFTER_MAX)
+                    if response.status_code == 429:
+                        self.bucket.pause(delay)
+            # 退避等待时不占并发名额
+            self.stats['retries'] += 1
+            await asyncio.sleep(delay)
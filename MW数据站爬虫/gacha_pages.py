@@ -0,0 +1,396 @@
+"""
+活动/抽奖页面解析
+3活动数据加工.py 和 4抽奖物品数据爬取.py 原来用 BeautifulSoup(html.parser) 解析整页，
+再多次 soup.find_all('h2') 找区域。这里把页面结构的解析集中起来:
+  - 解析后端可替换: selectolax（最快）> lxml > BeautifulSoup（原实现，始终可用），按安装情况自动选择
+  - 区域标题（抽奖 / 战利品箱 / 抽奖货币 / 物品）一次遍历全部找到
+  - 各后端包装成同样的节点接口，提取逻辑只写一份，结果与原 BeautifulSoup 实现一致
+
+加速后端: pip install selectolax（或 pip install lxml）
+
+基准测试（默认使用 页面样本/ 里的页面；--cache 改用网页缓存中的页面）:
+    python gacha_pages.py [--fixtures 目录 | --cache] [--export 目录] [--limit 200]
+页面样本/ 是按站点页面结构缩减的样本，测出的耗时只反映这些样本；真实页面用 --export 从网页缓存导出后再测
+"""
+import re
+import sys
+import time
+import argparse
+from pathlib import Path
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as SelectolaxParser
+except ImportError:
+    try:
+        from selectolax.parser import HTMLParser as SelectolaxParser
+    except ImportError:
+        SelectolaxParser = None
+
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+# None: 自动选择最快的可用后端；也可以固定为 "selectolax" / "lxml" / "bs4"
+PARSER_BACKEND = None
+# 基准测试默认的页面目录
+FIXTURES_DIR = Path(__file__).parent / "页面样本"
+
+
+# ==================== 节点接口 ====================
+# 每个后端提供: name, parent, text(), get(属性), next_sibling(), find(标签, 类名), find_all(标签, 类名)
+# text() 等同于 BeautifulSoup 的 get_text(strip=True)；find/find_all 只查找后代
+
+class SelectolaxNode:
+    __slots__ = ('node',)
+
+    def __init__(self, node):
+        self.node = node
+
+    @staticmethod
+    def wrap(node):
+        return SelectolaxNode(node) if node is not None else None
+
+    @property
+    def name(self):
+        return self.node.tag
+
+    @property
+    def parent(self):
+        parent = self.node.parent
+        # 文档节点之上不再有元素
+        if parent is None or not parent.tag or not parent.tag[0].isalpha():
+            return None
+        return SelectolaxNode(parent)
+
+    def text(self):
+        return self.node.text(deep=True, separator='', strip=True)
+
+    def get(self, attr):
+        return self.node.attributes.get(attr)
+
+    def next_sibling(self):
+        node = self.node.next
+        while node is not None and not (node.tag and node.tag[0].isalpha()):
+            node = node.next
+        return self.wrap(node)
+
+    @staticmethod
+    def _selector(tag, class_name):
+        return f"{tag}.{class_name}" if class_name else tag
+
+    def find(self, tag, class_name=None):
+        return self.wrap(self.node.css_first(self._selector(tag, class_name)))
+
+    def find_all(self, tag, class_name=None):
+        return [SelectolaxNode(n) for n in self.node.css(self._selector(tag, class_name))]
+
+
+class LxmlNode:
+    __slots__ = ('el',)
+
+    def __init__(self, el):
+        self.el = el
+
+    @staticmethod
+    def wrap(el):
+        return LxmlNode(el) if el is not None else None
+
+    @property
+    def name(self):
+        return self.el.tag
+
+    @property
+    def parent(self):
+        return self.wrap(self.el.getparent())
+
+    def text(self):
+        return ''.join(s.strip() for s in self.el.xpath('.//text()'))
+
+    def get(self, attr):
+        return self.el.get(attr)
+
+    def next_sibling(self):
+        el = self.el.getnext()
+        # 注释也是 lxml 元素，跳过
+        while el is not None and not isinstance(el.tag, str):
+            el = el.getnext()
+        return self.wrap(el)
+
+    def find_all(self, tag, class_name=None):
+        found = []
+        for el in self.el.iterdescendants(tag):
+            if class_name is None or class_name in (el.get('class') or '').split():
+                found.append(LxmlNode(el))
+        return found
+
+    def find(self, tag, class_name=None):
+        for el in self.el.iterdescendants(tag):
+            if class_name is None or class_name in (el.get('class') or '').split():
+                return LxmlNode(el)
+        return None
+
+
+class SoupNode:
+    __slots__ = ('tag',)
+
+    def __init__(self, tag):
+        self.tag = tag
+
+    @staticmethod
+    def wrap(tag):
+        return SoupNode(tag) if tag is not None else None
+
+    @property
+    def name(self):
+        return self.tag.name
+
+    @property
+    def parent(self):
+        return self.wrap(self.tag.parent)
+
+    def text(self):
+        return self.tag.get_text(strip=True)
+
+    def get(self, attr):
+        return self.tag.get(attr)
+
+    def next_sibling(self):
+        return self.wrap(self.tag.find_next_sibling())
+
+    def find(self, tag, class_name=None):
+        if class_name:
+            return self.wrap(self.tag.find(tag, class_=class_name))
+        return self.wrap(self.tag.find(tag))
+
+    def find_all(self, tag, class_name=None):
+        if class_name:
+            return [SoupNode(t) for t in self.tag.find_all(tag, class_=class_name)]
+        return [SoupNode(t) for t in self.tag.find_all(tag)]
+
+
+def available_backends():
+    backends = []
+    if SelectolaxParser is not None:
+        backends.append("selectolax")
+    if lxml is not None:
+        backends.append("lxml")
+    backends.append("bs4")
+    return backends
+
+
+def parse_document(page_text, backend=None):
+    """解析整页，返回根节点（节点接口见上）"""
+    backend = backend or PARSER_BACKEND or available_backends()[0]
+    if backend == "selectolax":
+        return SelectolaxNode(SelectolaxParser(page_text).root)
+    if backend == "lxml":
+        return LxmlNode(lxml.html.document_fromstring(page_text))
+    from bs4 import BeautifulSoup
+    return SoupNode(BeautifulSoup(page_text, 'html.parser'))
+
+
+def find_headings(doc, tag, texts):
+    """一次遍历找到各标题（每种文字取第一个），返回按出现顺序排列的 {文字: 节点}"""
+    wanted = set(texts)
+    found = {}
+    for node in doc.find_all(tag):
+        text = node.text()
+        if text in wanted and text not in found:
+            found[text] = node
+            if len(found) == len(wanted):
+                break
+    return found
+
+
+def section_after(heading):
+    """标题所在块（标题的祖父节点）之后的兄弟元素，页面的内容区域都是这样排布的"""
+    parent = heading.parent
+    block = parent.parent if parent is not None else None
+    return block.next_sibling() if block is not None else None
+
+
+# ==================== 页面提取 ====================
+
+def is_gacha_href(href):
+    return bool(href) and ('/gacha/' in href or '/lootboxes/' in href)
+
+
+def parse_event_gachas(page_text, backend=None):
+    """
+    活动页中 <h2>抽奖</h2> 或 <h2>战利品箱</h2> 区域的抽奖卡片
+    返回 [(名称, href)]，没有抽奖区域时返回 []
+    """
+    doc = parse_document(page_text, backend)
+    headings = find_headings(doc, 'h2', ('抽奖', '战利品箱'))
+    if not headings:
+        return []
+    h2 = next(iter(headings.values()))
+
+    # 向上查找包含gacha/lootboxes链接的容器
+    section = None
+    container = h2.parent
+    while container is not None and container.parent is not None and container.parent.name != 'body':
+        container = container.parent
+        if any(is_gacha_href(a.get('href')) for a in container.find_all('a')):
+            section = container
+            break
+    if section is None:
+        return []
+
+    cards = []
+    for link in section.find_all('a'):
+        href = link.get('href')
+        if is_gacha_href(href):
+            name_tag = link.find('h2')
+            if name_tag is not None:
+                cards.append((name_tag.text(), href))
+    return cards
+
+
+def parse_currency_name(page_text, backend=None):
+    """抽奖页 <h2>抽奖货币</h2> 区域的货币名称，找不到时返回 None"""
+    doc = parse_document(page_text, backend)
+    h2 = find_headings(doc, 'h2', ('抽奖货币',)).get('抽奖货币')
+    if h2 is None:
+        return None
+    # 从h2往上找到外层容器（最多5层），货币名称在 battle-pass-module__text-primary 里
+    container = h2.parent
+    for _ in range(5):
+        if container is not None and container.parent is not None:
+            container = container.parent
+        else:
+            break
+    if container is None:
+        return None
+    currency_div = container.find('div', 'battle-pass-module__text-primary')
+    return currency_div.text() if currency_div is not None else None
+
+
+def parse_gacha_page(page_text, backend=None):
+    """
+    抽奖页的原始数据:
+    {'name': 标题, 'currency_image': 货币图片地址, 'items': [{'href', 'name', 'type', 'probability'}]}
+    找不到的字段为 None，没有物品区域时 items 为 []
+    """
+    doc = parse_document(page_text, backend)
+    page = {'name': None, 'currency_image': None, 'items': []}
+
+    title_tag = doc.find('h1')
+    if title_tag is not None:
+        page['name'] = title_tag.text()
+
+    headings = find_headings(doc, 'h2', ('抽奖货币', '物品'))
+
+    if '抽奖货币' in headings:
+        currency_block = section_after(headings['抽奖货币'])
+        img_tag = currency_block.find('img') if currency_block is not None else None
+        if img_tag is not None:
+            # 优先使用data-src，其次使用src
+            page['currency_image'] = img_tag.get('data-src') or img_tag.get('src')
+
+    if '物品' in headings:
+        items_block = section_after(headings['物品'])
+        if items_block is not None:
+            for module in items_block.find_all('a', 'battle-pass-module'):
+                name_div = module.find('div', 'battle-pass-module__text-primary')
+                type_span = module.find('span', 'battle-pass-module__text-secondary-name')
+                prob_span = module.find('span', 'battle-pass-module__text-secondary-points')
+                page['items'].append({
+                    'href': module.get('href') or '',
+                    'name': name_div.text() if name_div is not None else '',
+                    'type': type_span.text() if type_span is not None else '',
+                    'probability': prob_span.text() if prob_span is not None else '',
+                })
+    return page
+
+
+# ==================== 基准测试 ====================
+
+def load_fixture_pages(fixtures_dir=FIXTURES_DIR, limit=None):
+    """[(名称, 页面文本)]: 来自目录中的 .html 文件；fixtures_dir 为 None 时读取网页缓存中的活动/抽奖页面"""
+    pages = []
+    if fixtures_dir:
+        for path in sorted(Path(fixtures_dir).glob('*.html'))[:limit]:
+            pages.append((path.name, path.read_text(encoding='utf-8')))
+        return pages
+
+    from http_cache import CACHE_FILE, HttpCache
+    if not Path(CACHE_FILE).exists():
+        return pages
+    cache = HttpCache()
+    rows = cache.conn.execute(
+        "SELECT url FROM responses WHERE url LIKE '%/gacha/%' OR url LIKE '%/lootboxes/%' OR url LIKE '%/events/%' "
+        "ORDER BY url").fetchall()
+    for (url,) in rows[:limit]:
+        pages.append((url, cache.lookup(url)['body'].decode('utf-8', errors='replace')))
+    cache.close()
+    return pages
+
+
+def page_kind(name):
+    """活动页 / 抽奖页（导出的文件名以 event_ 开头）"""
+    return 'event' if '/events/' in name or name.startswith('event_') else 'gacha'
+
+
+def parse_for_benchmark(kind, page_text, backend):
+    if kind == 'event':
+        return parse_event_gachas(page_text, backend)
+    return parse_gacha_page(page_text, backend), parse_currency_name(page_text, backend)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="活动/抽奖页面解析基准测试（对比各解析后端）")
+    parser.add_argument('--fixtures', default=str(FIXTURES_DIR), help='保存的 .html 页面目录（默认 页面样本/）')
+    parser.add_argument('--cache', action='store_true', help='改用网页缓存中的活动/抽奖页面')
+    parser.add_argument('--export', default=None, help='把网页缓存中的页面导出为 .html 到该目录后退出')
+    parser.add_argument('--limit', type=int, default=None, help='最多测试的页面数')
+    args = parser.parse_args()
+
+    # 导出总是读取网页缓存
+    from_cache = args.cache or args.export
+    pages = load_fixture_pages(None if from_cache else args.fixtures, args.limit)
+    if not pages:
+        if from_cache:
+            print("网页缓存中没有可用页面: 先运行一次 3活动数据加工.py / 4抽奖物品数据爬取.py 填充网页缓存")
+        else:
+            print(f"目录中没有 .html 页面: {args.fixtures}")
+        sys.exit(1)
+
+    if args.export:
+        out_dir = Path(args.export)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        for name, page_text in pages:
+            kind = page_kind(name)
+            file_name = f"{kind}_" + re.sub(r'[^\w.-]+', '_', name.split('://', 1)[-1])[-120:] + ".html"
+            (out_dir / file_name).write_text(page_text, encoding='utf-8')
+        print(f"已导出 {len(pages)} 个页面: {out_dir}")
+        return
+
+    backends = available_backends()
+    print(f"页面: {len(pages)} 个，解析后端: {', '.join(backends)}")
+
+    baseline = {}
+    timings = {}
+    for backend in reversed(backends):  # bs4 先跑，作为对照结果
+        mismatches = 0
+        started = time.perf_counter()
+        for name, page_text in pages:
+            result = parse_for_benchmark(page_kind(name), page_text, backend)
+            if backend == "bs4":
+                baseline[name] = result
+            elif result != baseline[name]:
+                mismatches += 1
+                if mismatches <= 3:
+                    print(f"  [{backend}] 结果与 bs4 不一致: {name}")
+        timings[backend] = (time.perf_counter() - started, mismatches)
+
+    bs4_time = timings["bs4"][0]
+    print(f"\n{'后端':<12}{'每页(ms)':>10}{'加速':>8}{'不一致':>8}")
+    for backend in backends:
+        elapsed, mismatches = timings[backend]
+        print(f"{backend:<12}{elapsed / len(pages) * 1000:>10.2f}{bs4_time / elapsed:>7.1f}x{mismatches:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+网页响应缓存（SQLite）
+重新运行爬虫时大部分历史活动/抽奖页面不会再变，没必要每次重新下载：
+  - 以完整 URL（含 lang= 等参数）为键，保存正文、ETag、Last-Modified
+  - 缓存未过期直接使用；过期后带 If-None-Match / If-Modified-Since 重新验证，304 时继续用缓存
+  - 有效期按 URL 类别（TTL_RULES），调用方也可以单独指定（如已结束的活动永久缓存）
+  - 离线重放: 完全不联网，只用缓存运行整个流程（缓存里没有的页面按网络错误处理）
+
+离线重放可以把 http_client.OFFLINE 改为 True，或者运行前设置环境变量 MW_CRAWL_OFFLINE=1。
+"""
+import re
+import time
+import zlib
+import sqlite3
+import datetime
+import threading
+from pathlib import Path
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+CACHE_FILE = Path(__file__).parent / "网页缓存.db"
+# 永久缓存（不再重新验证）
+FOREVER = float('inf')
+# 按 URL 类别的有效期（秒），按顺序匹配第一条
+TTL_RULES = [
+    (re.compile(r'[?&]page=\d+'), 6 * 3600),            # 列表分页
+    (re.compile(r'/(gacha|lootboxes)/'), 7 * 24 * 3600),  # 抽奖/宝箱页面
+    (re.compile(r'/events/'), 24 * 3600),                 # 活动页面
+]
+DEFAULT_TTL = 6 * 3600
+
+
+class OfflineCacheMiss(requests.ConnectionError):
+    """离线模式下缓存里没有该页面（按网络错误处理，调用方原有的异常处理照常生效）"""
+
+
+def ttl_for_url(url):
+    for pattern, ttl in TTL_RULES:
+        if pattern.search(url):
+            return ttl
+    return DEFAULT_TTL
+
+
+def activity_ttl(formatted_date):
+    """
+    按活动月份（如 "2025年9月"）给出有效期: 早于上个月的活动已经结束，页面不会再变，永久缓存；
+    无法解析或近期的活动返回 None（按 URL 类别）
+    """
+    match = re.match(r'(\d{4})年(\d{1,2})月', formatted_date or '')
+    if not match:
+        return None
+    today = datetime.date.today()
+    months_ago = (today.year - int(match.group(1))) * 12 + today.month - int(match.group(2))
+    return FOREVER if months_ago >= 2 else None
+
+
+def cached_response(url, entry):
+    """把缓存条目包装成 requests.Response，调用方无需区分是否来自缓存"""
+    response = requests.Response()
+    response.status_code = 200
+    response.reason = 'OK'
+    response.url = url
+    response._content = entry['body']
+    headers = {'X-Cache': 'HIT'}
+    if entry['content_type']:
+        headers['Content-Type'] = entry['content_type']
+    if entry['etag']:
+        headers['ETag'] = entry['etag']
+    if entry['last_modified']:
+        headers['Last-Modified'] = entry['last_modified']
+    response.headers = CaseInsensitiveDict(headers)
+    return response
+
+
+class HttpCache:
+    """线程安全；只缓存 200 响应"""
+
+    def __init__(self, path=CACHE_FILE):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                content_type TEXT,
+                body BLOB NOT NULL,
+                stored_at REAL NOT NULL,
+                checked_at REAL NOT NULL
+            )
+        """)
+        self.stats = {'hit': 0, 'revalidated': 0, 'stored': 0, 'miss': 0}
+
+    def count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def lookup(self, url):
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT etag, last_modified, content_type, body, stored_at, checked_at FROM responses WHERE url = ?",
+                (url,)).fetchone()
+        if row is None:
+            return None
+        return {
+            'etag': row[0],
+            'last_modified': row[1],
+            'content_type': row[2],
+            'body': zlib.decompress(row[3]),
+            'stored_at': row[4],
+            'checked_at': row[5],
+        }
+
+    @staticmethod
+    def is_fresh(url, entry, ttl=None):
+        if ttl is None:
+            ttl = ttl_for_url(url)
+        return time.time() - entry['checked_at'] < ttl
+
+    @staticmethod
+    def validation_headers(entry):
+        headers = {}
+        if entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def store(self, url, headers, body):
+        """保存 200 响应（headers 为响应头，requests 和 httpx 的都可以）"""
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, headers.get('ETag'), headers.get('Last-Modified'), headers.get('Content-Type'),
+                 zlib.compress(body), now, now))
+            self.stats['stored'] += 1
+
+    def touch(self, url):
+        """304: 内容未变，只更新验证时间"""
+        with self._lock:
+            self.conn.execute("UPDATE responses SET checked_at = ? WHERE url = ?", (time.time(), url))
+            self.stats['revalidated'] += 1
+
+    def summary(self):
+        s = self.stats
+        return f"缓存命中 {s['hit']}，重新验证未变 {s['revalidated']}，新下载 {s['stored']}，离线缺失 {s['miss']}"
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
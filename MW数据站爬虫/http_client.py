@@ -0,0 +1,206 @@
+"""
+MW数据站爬虫共用的 HTTP 客户端
+各阶段脚本原来各自 requests.get()，每个请求都重新建立 TCP/TLS 连接，偶发的 5xx 或超时直接丢页。
+这里统一提供:
+  - 保持连接的 Session，连接池大小与并发线程数一致
+  - 429 / 5xx / 连接错误 / 超时按指数退避重试（带随机抖动），优先遵守 Retry-After
+  - 按主机限速：同一主机两次请求之间至少间隔 MIN_INTERVAL 秒；收到 429 时整个主机暂停
+  - 响应缓存与离线重放（见 http_cache.py）
+
+用法:
+    from http_client import configure, http_get
+    configure(pool_size=MAX_WORKERS)   # 可选，在创建线程池前调用
+    response = http_get(url)
+    response = http_get(url, ttl=FOREVER)   # 指定缓存有效期（默认按 URL 类别，FOREVER 见 http_cache）
+"""
+import os
+import time
+import random
+import threading
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from http_cache import HttpCache, OfflineCacheMiss, cached_response
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept-Language': 'zh-CN,zh;q=0.9',
+}
+TIMEOUT = 30
+# 连接池大小（同时进行的请求数）
+POOL_SIZE = 8
+# 重试
+MAX_RETRIES = 4
+RETRY_STATUS = {429, 500, 502, 503, 504}
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30.0
+# Retry-After 超过这个秒数时按上限等待
+RETRY_AFTER_MAX = 120.0
+# 同一主机两次请求之间的最小间隔（秒）
+MIN_INTERVAL = 0.1
+# 响应缓存；离线重放只用缓存、不联网
+CACHE_ENABLED = True
+OFFLINE = os.environ.get('MW_CRAWL_OFFLINE') == '1'
+
+
+# ==================== 按主机限速 ====================
+
+class HostRateLimiter:
+    """每个主机维护下一个可用时间点，请求线程依次占用时间片（线程安全）"""
+
+    def __init__(self, min_interval=MIN_INTERVAL):
+        self.min_interval = min_interval
+        self._next_time = {}
+        self._lock = threading.Lock()
+
+    def wait(self, host):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_time.get(host, 0.0))
+            self._next_time[host] = start + self.min_interval
+        if start > now:
+            time.sleep(start - now)
+
+    def pause(self, host, seconds):
+        """主机限流（429）时，之后的所有请求至少推迟 seconds 秒"""
+        with self._lock:
+            self._next_time[host] = max(self._next_time.get(host, 0.0), time.monotonic() + seconds)
+
+
+# ==================== 客户端 ====================
+
+def retry_after_seconds(response):
+    """解析 Retry-After（秒数或 HTTP 日期），没有或无法解析时返回 None"""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt):
+    """第 attempt 次重试前的等待: 指数增长，抖动到 [一半, 全部] 之间，避免各线程同时重试"""
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt))
+    return random.uniform(delay / 2, delay)
+
+
+class CrawlerClient:
+    def __init__(self, pool_size=POOL_SIZE, max_retries=MAX_RETRIES, min_interval=MIN_INTERVAL,
+                 cache=CACHE_ENABLED, offline=OFFLINE):
+        self.max_retries = max_retries
+        self.offline = offline
+        self.cache = HttpCache() if cache or offline else None
+        self.limiter = HostRateLimiter(min_interval)
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        # pool_block: 线程数多于连接数时排队等连接，而不是临时开新连接再丢弃
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, pool_block=True)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.stats = {'requests': 0, 'retries': 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def get(self, url, timeout=TIMEOUT, ttl=None, **kwargs):
+        """
+        GET 请求（先查缓存），可重试的错误自动重试；返回最后一次的响应（调用方照常 raise_for_status）
+        重试用尽仍是连接错误/超时时抛出最后的异常；离线模式缓存缺失时抛出 OfflineCacheMiss
+        ttl: 缓存有效期（秒），None 表示按 URL 类别
+        """
+        cache = self.cache
+        entry = cache.lookup(url) if cache else None
+        if entry is not None and (self.offline or cache.is_fresh(url, entry, ttl)):
+            cache.count('hit')
+            return cached_response(url, entry)
+        if self.offline:
+            cache.count('miss')
+            raise OfflineCacheMiss(f"离线模式下缓存中没有: {url}")
+
+        headers = dict(kwargs.pop('headers', None) or {})
+        if entry is not None:
+            headers.update(HttpCache.validation_headers(entry))
+        response = self._get(url, timeout, headers=headers, **kwargs)
+
+        if entry is not None and response.status_code == 304:
+            cache.touch(url)
+            return cached_response(url, entry)
+        if cache and response.status_code == 200:
+            cache.store(url, response.headers, response.content)
+        return response
+
+    def _get(self, url, timeout, **kwargs):
+        host = urlsplit(url).netloc
+        for attempt in range(self.max_retries + 1):
+            self.limiter.wait(host)
+            self._count('requests')
+            try:
+                response = self.session.get(url, timeout=timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.max_retries:
+                    raise
+                delay = backoff_delay(attempt)
+            else:
+                if response.status_code not in RETRY_STATUS or attempt >= self.max_retries:
+                    return response
+                delay = retry_after_seconds(response)
+                if delay is None:
+                    delay = backoff_delay(attempt)
+                delay = min(delay, RETRY_AFTER_MAX)
+                if response.status_code == 429:
+                    self.limiter.pause(host, delay)
+                response.close()
+            self._count('retries')
+            time.sleep(delay)
+
+    def close(self):
+        self.session.close()
+        if self.cache:
+            self.cache.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def configure(pool_size=POOL_SIZE, max_retries=MAX_RETRIES, min_interval=MIN_INTERVAL,
+              cache=CACHE_ENABLED, offline=OFFLINE):
+    """按并发线程数创建共用客户端（替换已有的）"""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = CrawlerClient(pool_size, max_retries, min_interval, cache, offline)
+        if offline:
+            print("离线重放模式: 只使用网页缓存，不发出网络请求")
+    return _client
+
+
+def get_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = CrawlerClient()
+        return _client
+
+
+def http_get(url, **kwargs):
+    return get_client().get(url, **kwargs)
+
+
+def cache_summary():
+    """共用客户端的缓存统计（未启用缓存时返回 None）"""
+    if _client is None or _client.cache is None:
+        return None
+    return _client.cache.summary()
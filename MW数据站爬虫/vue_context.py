@@ -0,0 +1,118 @@
+"""
+页面内嵌 Vue 组件数据（v-bind:context）提取
+mwstats.info 的列表页/菜单把全部数据放在 <ship-list v-bind:context="...">、<sidebar-menu v-bind:context="..."> 属性里，
+经 HTML 实体转义的 JSON 往往有几 MB。原来每页最多用五个正则在整页文本上搜索，再 html.unescape + json.loads。
+
+这里直接在响应的原始字节上查找（不先把整页解码成字符串）:
+  - bytes.find 一次扫描找出所有 "v-bind:context=" 属性，按组件名筛选，只切出属性值
+  - 属性里只有 &quot; &amp; &lt; &gt; &#039; 等常见实体时用 bytes.replace 反转义（C 实现），有其他实体才退回 html.unescape
+  - 装了 orjson 时用 orjson 解析（pip install orjson），否则用 json
+"""
+import re
+import json
+import html
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+CONTEXT_ATTR = b'v-bind:context="'
+# 列表组件的优先顺序（页面上有多个列表组件时，与原来正则的尝试顺序一致）；其他 *-list 排在最后
+LIST_COMPONENTS = ('ship-list', 'weapon-list', 'aircraft-list', 'item-list')
+# Vue 模板属性常见的实体（&amp; 必须最后替换）
+COMMON_ENTITIES = (
+    (b'&quot;', b'"'),
+    (b'&#039;', b"'"),
+    (b'&#39;', b"'"),
+    (b'&#x27;', b"'"),
+    (b'&lt;', b'<'),
+    (b'&gt;', b'>'),
+    (b'&amp;', b'&'),
+)
+# 组件名: 属性前面的 "<标签名 空白"
+TAG_BEFORE_ATTR = re.compile(rb'<([\w-]+)\s+$')
+# 向前查找标签名的最大字节数
+TAG_LOOKBEHIND = 128
+
+
+def find_contexts(data):
+    """
+    一次扫描找出页面中所有 v-bind:context 属性（属性必须紧跟在标签名之后，与原正则一致）
+    返回 [(组件名, 属性值起点, 终点)]，不复制属性内容
+    """
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    found = []
+    pos = data.find(CONTEXT_ATTR)
+    while pos != -1:
+        start = pos + len(CONTEXT_ATTR)
+        end = data.find(b'"', start)
+        if end == -1:
+            break
+        match = TAG_BEFORE_ATTR.search(data, max(0, pos - TAG_LOOKBEHIND), pos)
+        if match and end > start:
+            found.append((match.group(1).decode('ascii', errors='replace'), start, end))
+        pos = data.find(CONTEXT_ATTR, end + 1)
+    return found
+
+
+def unescape_attr(raw):
+    """属性值（bytes）反转义为 JSON 文本（bytes）"""
+    known = sum(raw.count(entity) for entity, _ in COMMON_ENTITIES)
+    if known != raw.count(b'&'):
+        # 有其他命名/数字实体，交给 html.unescape
+        return html.unescape(raw.decode('utf-8', errors='replace')).encode('utf-8')
+    for entity, char in COMMON_ENTITIES:
+        if entity in raw:
+            raw = raw.replace(entity, char)
+    return raw
+
+
+def loads(json_bytes):
+    if orjson is not None:
+        return orjson.loads(json_bytes)
+    return json.loads(json_bytes)
+
+
+def decode_context(data, start, end):
+    """解析一个属性值，JSON 无效时返回 None"""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    try:
+        return loads(unescape_attr(data[start:end]))
+    except ValueError:  # orjson.JSONDecodeError 与 json.JSONDecodeError 都是 ValueError
+        return None
+
+
+def extract_component_context(data, component):
+    """指定组件（如 sidebar-menu）的 context 数据，找不到或无法解析时返回 None"""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    for name, start, end in find_contexts(data):
+        if name == component:
+            return decode_context(data, start, end)
+    return None
+
+
+def extract_list_context(data):
+    """页面中列表组件（*-list）的 context 数据，按 LIST_COMPONENTS 优先顺序尝试，都无效时返回 None"""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    candidates = [c for c in find_contexts(data) if c[0].endswith('-list')]
+    rank = {name: i for i, name in enumerate(LIST_COMPONENTS)}
+    candidates.sort(key=lambda c: rank.get(c[0], len(LIST_COMPONENTS)))
+    for _, start, end in candidates:
+        context = decode_context(data, start, end)
+        if context is not None:
+            return context
+    return None
+
+
+def extract_list_page(data):
+    """列表页的 (list.items, list.total)，未找到时返回 (None, 0)"""
+    context = extract_list_context(data)
+    if not isinstance(context, dict):
+        return None, 0
+    list_data = context.get('list', {})
+    return list_data.get('items', []), list_data.get('total', 0)
@@ -1,8 +1,11 @@
-import UnityPy
 import os
+import sys
+from fnmatch import fnmatch
 from pathlib import Path
-from concurrent.futures import ProcessPoolExecutor, as_completed
-from multiprocessing import cpu_count
+
+# 共用模块在上级工具目录
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from extract_engine import ExtractSpec, ExtractJob, run_jobs, parse_engine_args
 
 # 路径配置
 BASE_PATH = r"Modern Warships_Data\StreamingAssets\aa\w64"
@@ -38,94 +41,66 @@ SEARCH_CONFIG = {
 # activities.spriteatlas 中需要提取的activity_gacha资源
 ACTIVITIES_SPRITEATLAS_PATH = "contentseparated_assets_content/textures/sprites/activities.spriteatlas.bundle"
 
-def extract_bundle_task(args):
-    """并行提取任务包装函数"""
-    bundle_path, output_dir, is_spriteatlas, bundle_name, force_lowercase, is_eventhub = args
-
-    try:
-        env = UnityPy.load(bundle_path)
-        extracted_count = 0
-        skipped_count = 0
-
-        for obj in env.objects:
-            if obj.type.name in ["Texture2D", "Sprite"]:
-                try:
-                    data = obj.read()
-                    if hasattr(data, 'image'):
-                        img = data.image
-                        img_name = getattr(data, 'name', None) or getattr(data, 'm_Name', None) or f"unnamed_{obj.path_id}"
-
-                        # eventhub 特殊处理：提取 event_*_gacha*、event_*_background 和 event_*_widget 资源
-                        if is_eventhub:
-                            if not img_name.startswith('event_'):
-                                continue
-
-                            # gacha、background 和 widget 资源都输出到 eventhub 目录
-                            if 'gacha' in img_name or 'background' in img_name.lower() or 'widget' in img_name.lower():
-                                img_path = os.path.join(output_dir, f"{img_name}.png")
-                            else:
-                                continue
-                        # spriteatlas 每个sprite单独保存
-                        elif is_spriteatlas:
-                            # 如果需要强制小写，转换文件名
-                            if force_lowercase:
-                                img_name = img_name.lower()
-
-                            img_path = os.path.join(output_dir, f"{img_name}.png")
-                        # 其他直接用包名
-                        else:
-                            img_path = os.path.join(output_dir, f"{bundle_name}.png")
-
-                        # 检查文件是否已存在
-                        if os.path.exists(img_path):
-                            skipped_count += 1
-                            continue
-
-                        img.save(img_path)
-                        extracted_count += 1
-                except Exception as e:
-                    continue
-
-        return (bundle_name, extracted_count, skipped_count, None)
-
-    except Exception as e:
-        return (bundle_name, 0, 0, str(e))
-
-def extract_activity_gacha_from_spriteatlas(spriteatlas_path, output_dir):
-    """从activities.spriteatlas中提取所有活动相关资源"""
-    try:
-        env = UnityPy.load(str(spriteatlas_path))
-        extracted_count = 0
-        skipped_count = 0
-
-        for obj in env.objects:
-            if obj.type.name in ["Texture2D", "Sprite"]:
-                try:
-                    data = obj.read()
-                    name = getattr(data, 'name', None) or getattr(data, 'm_Name', None)
-
-                    # 提取所有活动相关的资源（activity开头或lootbox_activity开头）
-                    if name and (name.lower().startswith('activity') or name.startswith('lootbox_activity')):
-                        if hasattr(data, 'image'):
-                            img = data.image
-                            img_path = os.path.join(output_dir, f"{name}.png")
-
-                            # 检查文件是否已存在
-                            if os.path.exists(img_path):
-                                skipped_count += 1
-                                continue
-
-                            img.save(img_path)
-                            extracted_count += 1
-                except:
-                    continue
-
-        return extracted_count, skipped_count
-
-    except Exception as e:
-        return 0, 0
+def is_spriteatlas_rule(patterns):
+    return any('.spriteatlas.bundle' in p for p in patterns)
+
+def matches_search_rule(patterns, file_name):
+    """包文件名是否符合 SEARCH_CONFIG 中某个目录的规则"""
+    if is_spriteatlas_rule(patterns):
+        return file_name in patterns
+    for pattern in patterns:
+        if fnmatch(file_name, f"{pattern}*.bundle"):
+            # 对于lootbox_activity，只保留widget和background
+            if pattern == "lootbox_activity_" and not ('widget' in file_name or 'background' in file_name):
+                continue
+            return True
+    return False
+
+def search_rules_for(rel_path):
+    """
+    w64 下的相对路径（/ 分隔）会被哪些提取规则处理，返回规则名列表
+    （补丁计划用，包文件不存在时也能判断）
+    """
+    folder, _, file_name = rel_path.rpartition('/')
+    folder = folder or "."
+    rules = []
+    patterns = SEARCH_CONFIG.get(folder)
+    if patterns and matches_search_rule(patterns, file_name):
+        rules.append(folder)
+    if rel_path == ACTIVITIES_SPRITEATLAS_PATH:
+        rules.append("activities.spriteatlas")
+    return rules
+
+def sprite_file_name(name, img, path_id, job):
+    """spriteatlas 每个sprite单独保存，可按需强制小写"""
+    img_name = name or f"unnamed_{path_id}"
+    if job.extra.get('force_lowercase'):
+        img_name = img_name.lower()
+    return f"{img_name}.png"
+
+def bundle_file_name(name, img, path_id, job):
+    """其他直接用包名"""
+    return f"{job.extra['bundle_name']}.png"
+
+def is_eventhub_resource(name, job):
+    """eventhub 只提取 event_*_gacha*、event_*_background 和 event_*_widget 资源"""
+    if not name or not name.startswith('event_'):
+        return False
+    return 'gacha' in name or 'background' in name.lower() or 'widget' in name.lower()
+
+def is_activity_resource(name, job):
+    """activities.spriteatlas 中所有活动相关的资源（activity开头或lootbox_activity开头）"""
+    return bool(name) and (name.lower().startswith('activity') or name.startswith('lootbox_activity'))
+
+# 提取规则（已存在的文件不覆盖，bundle内容变化时才覆盖）
+SPRITEATLAS_SPEC = ExtractSpec("extract_all_events", output_name=sprite_file_name, skip_existing=True)
+EVENTHUB_SPEC = ExtractSpec("extract_all_events", name_filter=is_eventhub_resource, skip_existing=True)
+BUNDLE_SPEC = ExtractSpec("extract_all_events", output_name=bundle_file_name, skip_existing=True)
+ACTIVITY_GACHA_SPEC = ExtractSpec("extract_all_events:activity_gacha", name_filter=is_activity_resource, skip_existing=True)
 
 def main():
+    options = parse_engine_args("MW资源提取工具 - 活动+UI资源")
+
     print("=" * 70)
     print("MW资源提取工具 - 活动+UI资源 (并行提取)")
     print("=" * 70)
@@ -139,15 +114,12 @@ def main():
         print(f"ERROR: 找不到游戏目录: {base_path}")
         return
 
-    # 获取CPU核心数
-    workers = cpu_count()
     print(f"\n游戏目录: {base_path}")
-    print(f"输出目录: {output_base}")
-    print(f"并行线程: {workers} 个\n")
+    print(f"输出目录: {output_base}\n")
     print("开始扫描...\n")
 
     # 收集所有提取任务
-    tasks = []
+    jobs = []
     folder_info = {}  # 记录每个文件夹的信息
 
     for folder_name, patterns in SEARCH_CONFIG.items():
@@ -156,25 +128,17 @@ def main():
             continue
 
         bundles = []
-        is_spriteatlas = False
 
         # 检查是否是spriteatlas类型
-        if any('.spriteatlas.bundle' in p for p in patterns):
-            is_spriteatlas = True
+        is_spriteatlas = is_spriteatlas_rule(patterns)
+        if is_spriteatlas:
             for pattern in patterns:
                 bundle_file = folder_path / pattern
                 if bundle_file.exists():
                     bundles.append(bundle_file)
         else:
             # 活动资源，按前缀查找
-            for pattern in patterns:
-                found_bundles = list(folder_path.glob(f"{pattern}*.bundle"))
-
-                # 对于lootbox_activity，只保留widget和background
-                if pattern == "lootbox_activity_":
-                    found_bundles = [b for b in found_bundles if 'widget' in b.name or 'background' in b.name]
-
-                bundles.extend(found_bundles)
+            bundles = sorted(b for b in folder_path.glob("*.bundle") if matches_search_rule(patterns, b.name))
 
         if not bundles:
             continue
@@ -200,78 +164,37 @@ def main():
             is_eventhub = "eventhub_" in bundle_name
 
             if is_spriteatlas:
-                bundle_output = output_dir / bundle_name
-                os.makedirs(bundle_output, exist_ok=True)
-                tasks.append((str(bundle_path), str(bundle_output), True, bundle_name, force_lowercase, False))
+                jobs.append(ExtractJob(bundle_path, output_dir / bundle_name, SPRITEATLAS_SPEC,
+                                       label=bundle_name, force_lowercase=force_lowercase))
             elif is_eventhub:
                 # eventhub资源提取gacha和background到同一目录
-                tasks.append((str(bundle_path), str(output_dir), False, bundle_name, False, True))
-            else:
-                tasks.append((str(bundle_path), str(output_dir), False, bundle_name, force_lowercase, False))
-
-    total_files = len(tasks)
-    if total_files == 0:
-        print("\n未找到任何资源")
-        return
-
-    print(f"\n{'=' * 70}")
-    print(f"开始并行提取 {total_files} 个包...\n")
-
-    # 并行提取
-    completed = 0
-    total_extracted = 0
-    total_skipped = 0
-
-    with ProcessPoolExecutor(max_workers=workers) as executor:
-        futures = {executor.submit(extract_bundle_task, task): task for task in tasks}
-
-        for future in as_completed(futures):
-            bundle_name, count, skipped, error = future.result()
-            completed += 1
-
-            if error:
-                print(f"[{completed}/{total_files}] ✗ {bundle_name} - {error}")
-            elif count > 0 or skipped > 0:
-                status = f"✓ {bundle_name} (提取 {count} 张"
-                if skipped > 0:
-                    status += f", 跳过 {skipped} 张"
-                status += ")"
-                print(f"[{completed}/{total_files}] {status}")
-                total_extracted += count
-                total_skipped += skipped
+                jobs.append(ExtractJob(bundle_path, output_dir, EVENTHUB_SPEC, label=bundle_name))
             else:
-                print(f"[{completed}/{total_files}] ✗ {bundle_name} (无内容)")
+                jobs.append(ExtractJob(bundle_path, output_dir, BUNDLE_SPEC, label=bundle_name, bundle_name=bundle_name))
 
     # 特别处理：从activities.spriteatlas中提取所有活动资源
-    print(f"\n{'=' * 70}")
-    print("特别提取: activities.spriteatlas 中的所有活动资源")
-    print("=" * 70)
-
     spriteatlas_path = base_path / ACTIVITIES_SPRITEATLAS_PATH
     if spriteatlas_path.exists():
+        print(f"📁 特别提取: {spriteatlas_path.name} 中的所有活动资源")
         activities_output_dir = output_base / "contentseparated_assets_activities"
-        os.makedirs(activities_output_dir, exist_ok=True)
-
-        print(f"正在扫描: {spriteatlas_path.name}")
-        activity_count, activity_skipped = extract_activity_gacha_from_spriteatlas(spriteatlas_path, str(activities_output_dir))
-
-        if activity_count > 0 or activity_skipped > 0:
-            status = f"✓ 提取了 {activity_count} 个活动资源"
-            if activity_skipped > 0:
-                status += f"，跳过 {activity_skipped} 个"
-            print(status)
-            total_extracted += activity_count
-            total_skipped += activity_skipped
-        else:
-            print("✗ spriteatlas 中未找到活动资源")
+        jobs.append(ExtractJob(spriteatlas_path, activities_output_dir, ACTIVITY_GACHA_SPEC,
+                               label="activities.spriteatlas (活动资源)"))
     else:
         print(f"✗ 未找到: {ACTIVITIES_SPRITEATLAS_PATH}")
 
+    if not jobs:
+        print("\n未找到任何资源")
+        return
+
+    print(f"\n{'=' * 70}")
+    print(f"开始并行提取 {len(jobs)} 个包...\n")
+
+    stats = run_jobs(jobs, **options)
+
     # 统计
     print(f"\n{'=' * 70}")
     print(f"提取完成!")
-    print(f"  新提取: {total_extracted} 个文件")
-    print(f"  跳过: {total_skipped} 个文件（已存在）")
+    stats.print_summary()
     print(f"保存位置: {output_base}")
     print("=" * 70)
 
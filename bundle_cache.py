@@ -0,0 +1,217 @@
+"""
+解包缓存清单
+记录每个bundle提取时的内容指纹，以及导出了哪些对象、写到了哪里。
+游戏更新后绝大多数bundle字节不变，重跑提取脚本时这些bundle直接整体跳过，
+只有内容变化过（或导出文件被删掉）的bundle才会重新 UnityPy.load 解码。
+
+指纹判断顺序：
+  1. 大小 + 修改时间与记录一致 → 未变化（不读文件）
+  2. 大小一致但修改时间变了 → 计算内容哈希（xxhash，未安装时用 blake2b）再比较
+  3. 其他情况 → 已变化，需要重新提取
+"""
+import os
+import json
+import time
+import hashlib
+from pathlib import Path
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+# 清单文件放在工具目录下，所有提取脚本共用一份
+CACHE_FILE = Path(__file__).parent / "解包缓存清单.json"
+CACHE_FORMAT_VERSION = 1
+# 游戏根目录，导出路径尽量以相对路径记录，目录整体搬家后清单仍然有效
+GAME_ROOT = Path(__file__).parent.parent
+HASH_CHUNK_SIZE = 4 * 1024 * 1024
+# 每记录这么多条就落盘一次，中途中断也不会丢掉全部进度
+AUTOSAVE_EVERY = 50
+
+
+def _new_hasher():
+    if xxhash is not None:
+        return 'xxh3', xxhash.xxh3_128()
+    return 'blake2b', hashlib.blake2b(digest_size=16)
+
+
+def hash_file(path):
+    """计算文件内容哈希，返回带算法前缀的字符串"""
+    algo, hasher = _new_hasher()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(HASH_CHUNK_SIZE)
+            if not chunk:
+                break
+            hasher.update(chunk)
+    return f"{algo}:{hasher.hexdigest()}"
+
+
+def hash_bytes(data):
+    """计算内存数据的哈希（格式同 hash_file）"""
+    algo, hasher = _new_hasher()
+    hasher.update(data)
+    return f"{algo}:{hasher.hexdigest()}"
+
+
+def to_record_path(path):
+    """导出路径转为相对游戏根目录的路径（不在根目录下时保留绝对路径）"""
+    path = os.path.abspath(path)
+    try:
+        rel = os.path.relpath(path, GAME_ROOT)
+    except ValueError:  # Windows 下跨盘符
+        return path.replace('\\', '/')
+    if rel.startswith('..'):
+        return path.replace('\\', '/')
+    return rel.replace('\\', '/')
+
+
+def from_record_path(path):
+    if os.path.isabs(path):
+        return path
+    return str(GAME_ROOT / path)
+
+
+class BundleCache:
+    """
+    提取缓存清单
+    条目键为 "规则名|bundle路径"，同一个bundle被不同脚本/不同输出规则提取时互不影响。
+    值: {size, mtime_ns, hash, outputs: [[path_id, 对象名, 导出路径], ...], time}
+    """
+
+    def __init__(self, cache_file=CACHE_FILE):
+        self.cache_file = Path(cache_file)
+        self.entries = {}
+        self._dirty = set()
+        self._removed = set()
+        self._unsaved = 0
+        self.load()
+
+    # -------------------- 读写 --------------------
+
+    def _read_disk(self):
+        if not self.cache_file.exists():
+            return {}
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"解包缓存清单读取失败，将重新建立: {e}")
+            return {}
+        if data.get('version') != CACHE_FORMAT_VERSION:
+            return {}
+        return data.get('entries', {})
+
+    def load(self):
+        self.entries = self._read_disk()
+        self._dirty.clear()
+        self._removed.clear()
+
+    def save(self):
+        """落盘：先合并磁盘上其他脚本写入的条目，再原子替换"""
+        if not self._dirty and not self._removed:
+            return
+        merged = self._read_disk()
+        for key in self._removed:
+            merged.pop(key, None)
+        for key in self._dirty:
+            if key in self.entries:
+                merged[key] = self.entries[key]
+        self.entries = merged
+
+        tmp_path = self.cache_file.with_name(self.cache_file.name + f".{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': CACHE_FORMAT_VERSION, 'entries': merged}, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.cache_file)
+        self._dirty.clear()
+        self._removed.clear()
+        self._unsaved = 0
+
+    # -------------------- 查询/记录 --------------------
+
+    @staticmethod
+    def make_key(rule, bundle_path):
+        return f"{rule}|{os.path.abspath(bundle_path)}"
+
+    def check(self, rule, bundle_path, verify_outputs=True):
+        """
+        判断bundle在该规则下是否需要重新提取
+        返回 (fresh, stamp)：fresh=True 表示可整体跳过；
+        stamp 为当前文件指纹，提取完成后原样传给 record()
+        """
+        key = self.make_key(rule, bundle_path)
+        st = os.stat(bundle_path)
+        stamp = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'hash': None}
+        entry = self.entries.get(key)
+        if not entry:
+            return False, stamp
+
+        if entry.get('size') != st.st_size:
+            return False, stamp
+
+        if entry.get('mtime_ns') != st.st_mtime_ns:
+            # 大小相同但时间变了（补丁工具重写/复制过），用内容哈希确认
+            stamp['hash'] = hash_file(bundle_path)
+            if stamp['hash'] != entry.get('hash'):
+                return False, stamp
+            entry['mtime_ns'] = st.st_mtime_ns
+            self._mark_dirty(key)
+        else:
+            stamp['hash'] = entry.get('hash')
+
+        if verify_outputs and not self._outputs_exist(entry):
+            return False, stamp
+        return True, stamp
+
+    def _outputs_exist(self, entry):
+        for output in entry.get('outputs', []):
+            if not os.path.exists(from_record_path(output[2])):
+                return False
+        return True
+
+    def record(self, rule, bundle_path, outputs, stamp=None):
+        """
+        记录一次成功提取
+        outputs: [(path_id, 对象名, 导出路径), ...]
+        """
+        key = self.make_key(rule, bundle_path)
+        if stamp is None:
+            st = os.stat(bundle_path)
+            stamp = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'hash': None}
+        if not stamp.get('hash'):
+            stamp['hash'] = hash_file(bundle_path)
+
+        self.entries[key] = {
+            'size': stamp['size'],
+            'mtime_ns': stamp['mtime_ns'],
+            'hash': stamp['hash'],
+            'outputs': [[path_id, name, to_record_path(path)] for path_id, name, path in outputs],
+            'time': int(time.time()),
+        }
+        self._mark_dirty(key)
+
+    def invalidate(self, rule, bundle_path):
+        key = self.make_key(rule, bundle_path)
+        if self.entries.pop(key, None) is not None:
+            self._dirty.discard(key)
+            self._removed.add(key)
+
+    def has_entry(self, rule, bundle_path):
+        return self.make_key(rule, bundle_path) in self.entries
+
+    def outputs(self, rule, bundle_path):
+        """返回上次记录的导出列表 [(path_id, 对象名, 绝对路径), ...]"""
+        entry = self.entries.get(self.make_key(rule, bundle_path))
+        if not entry:
+            return []
+        return [(o[0], o[1], from_record_path(o[2])) for o in entry.get('outputs', [])]
+
+    def _mark_dirty(self, key):
+        self._dirty.add(key)
+        self._removed.discard(key)
+        self._unsaved += 1
+        if self._unsaved >= AUTOSAVE_EVERY:
+            self.save()
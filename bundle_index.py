@@ -0,0 +1,527 @@
+"""
+资源包索引数据库
+一次性扫描 StreamingAssets/aa/w64 下所有 bundle（以及 Modern Warships_Data 下的 .assets），
+记录每个对象的 (bundle路径, 哈希, path_id, 类型, 名称, 大小, 纹理尺寸/格式) 到 SQLite，
+名称和包路径建立 FTS5 全文索引。之后"哪个包里有 la96 background"只需查库，不用再打开几千个包。
+
+游戏更新后再次运行 update 只会重新扫描大小/修改时间变化且内容哈希也变化的包。
+
+用法:
+    python bundle_index.py update [--workers N]
+    python bundle_index.py query la96 background [--type Texture2D] [--bundles] [--limit 200]
+    python bundle_index.py stats
+"""
+import gc
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from multiprocessing import cpu_count
+
+from bundle_cache import hash_file
+from extract_engine import peek_object_name, object_name, texture_size
+from memory_budget import MemoryBudget, estimate_working_set, load_environment, budget_from_gb
+
+# 索引库放在工具目录下
+INDEX_DB_FILE = Path(__file__).parent / "资源包索引.db"
+# 游戏根目录，库中路径都相对于它记录
+GAME_ROOT = Path(__file__).parent.parent
+
+# 需要索引的位置: (相对游戏根目录的目录, 通配符, 是否递归)
+INDEX_ROOTS = [
+    ("Modern Warships_Data/StreamingAssets/aa/w64", "*.bundle", True),
+    ("Modern Warships_Data", "*.assets", False),
+]
+
+# Addressables 目录（记录其中引用的bundle列表，供补丁计划对比）
+CATALOG_FILE = "Modern Warships_Data/StreamingAssets/aa/catalog.json"
+# 读取纹理尺寸/格式的类型（其余类型只窥探名称）
+TEXTURE_TYPES = ("Texture2D", "Sprite")
+# 每写入这么多个包提交一次
+COMMIT_EVERY = 200
+# FTS5 trigram 分词要求关键词至少3个字符，更短的用 LIKE 查询
+MIN_FTS_TERM_LENGTH = 3
+
+
+# ==================== 子进程: 扫描单个包 ====================
+
+def texture_format_name(data):
+    fmt = getattr(data, 'm_TextureFormat', None)
+    if fmt is None:
+        return None
+    if isinstance(fmt, int):
+        try:
+            from UnityPy.enums import TextureFormat
+            return TextureFormat(fmt).name
+        except Exception:
+            return str(fmt)
+    return getattr(fmt, 'name', str(fmt))
+
+
+def index_bundle(args):
+    """扫描一个包的所有对象；内容哈希与库中一致时不加载，直接返回 same=True"""
+    bundle_path, known_hash = args
+    try:
+        return _index_bundle(bundle_path, known_hash)
+    finally:
+        gc.collect()
+
+
+def _index_bundle(bundle_path, known_hash):
+    result = {'path': bundle_path, 'hash': None, 'same': False, 'objects': [], 'error': None}
+    try:
+        result['hash'] = hash_file(bundle_path)
+        if known_hash and result['hash'] == known_hash:
+            result['same'] = True
+            return result
+
+        env = load_environment(bundle_path)
+        for obj in env.objects:
+            try:
+                type_name = obj.type.name
+                name = peek_object_name(obj)
+                width = height = fmt = None
+                if type_name in TEXTURE_TYPES:
+                    data = obj.read()
+                    name = name or object_name(data)
+                    size = texture_size(data)
+                    if size:
+                        width, height = size
+                    fmt = texture_format_name(data)
+                result['objects'].append((obj.path_id, type_name, name, obj.byte_size, width, height, fmt))
+            except Exception:
+                continue
+    except Exception as e:
+        result['error'] = str(e)
+    return result
+
+
+def catalog_bundles(catalog_path):
+    """
+    读取 Addressables catalog.json 中引用的全部bundle，返回 w64 下的相对路径集合
+    （内部ID形如 {UnityEngine.AddressableAssets.Addressables.RuntimePath}\\StandaloneWindows64\\xxx.bundle）
+    文件不存在或格式无法识别时返回 None
+    """
+    try:
+        with open(catalog_path, 'r', encoding='utf-8') as f:
+            catalog = json.load(f)
+    except (OSError, ValueError):
+        return None
+    internal_ids = catalog.get('m_InternalIds')
+    if not isinstance(internal_ids, list):
+        return None
+
+    bundles = set()
+    for internal_id in internal_ids:
+        if not isinstance(internal_id, str) or not internal_id.endswith('.bundle'):
+            continue
+        path = internal_id.replace('\\', '/')
+        for marker in ('/w64/', '/StandaloneWindows64/'):
+            if marker in path:
+                path = path.rsplit(marker, 1)[1]
+                break
+        else:
+            path = path.rsplit('}', 1)[-1].lstrip('/')
+        bundles.add(path)
+    return bundles
+
+
+# ==================== 索引库 ====================
+
+def index_key(path):
+    """文件路径 → 库中记录的路径（相对游戏根目录，/ 分隔）"""
+    path = os.path.abspath(path)
+    try:
+        rel = os.path.relpath(path, GAME_ROOT)
+    except ValueError:
+        return path.replace('\\', '/')
+    if rel.startswith('..'):
+        return path.replace('\\', '/')
+    return rel.replace('\\', '/')
+
+
+class BundleIndex:
+    """bundle/对象索引（SQLite + FTS5）"""
+
+    def __init__(self, db_file=INDEX_DB_FILE):
+        self.db_file = Path(db_file)
+        self.conn = sqlite3.connect(str(self.db_file))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._init_schema()
+        row = self.conn.execute("SELECT value FROM meta WHERE key='fts'").fetchone()
+        self.fts = bool(row and row[0] == 'trigram')
+
+    @classmethod
+    def open_existing(cls, db_file=INDEX_DB_FILE):
+        """索引库存在时打开，否则返回 None（供提取脚本做可选加速）"""
+        if not Path(db_file).exists():
+            return None
+        try:
+            return cls(db_file)
+        except sqlite3.Error as e:
+            print(f"资源包索引打开失败，忽略: {e}")
+            return None
+
+    def _init_schema(self):
+        conn = self.conn
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS bundles (
+                id INTEGER PRIMARY KEY,
+                path TEXT UNIQUE NOT NULL,
+                size INTEGER,
+                mtime_ns INTEGER,
+                hash TEXT,
+                object_count INTEGER,
+                error TEXT,
+                indexed_at INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS objects (
+                id INTEGER PRIMARY KEY,
+                bundle_id INTEGER NOT NULL,
+                path_id INTEGER,
+                type TEXT,
+                name TEXT,
+                size INTEGER,
+                width INTEGER,
+                height INTEGER,
+                format TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_objects_bundle ON objects(bundle_id);
+            CREATE INDEX IF NOT EXISTS idx_objects_type ON objects(type);
+        """)
+        if conn.execute("SELECT 1 FROM meta WHERE key='fts'").fetchone() is None:
+            # trigram 分词支持任意子串匹配（SQLite 3.34+），不支持时退回 LIKE 查询
+            try:
+                conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS objects_fts USING fts5(name, bundle, tokenize='trigram')")
+                fts = 'trigram'
+            except sqlite3.Error:
+                fts = 'none'
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('fts', ?)", (fts,))
+        conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    # -------------------- 增量更新 --------------------
+
+    def collect_files(self, base_dir=GAME_ROOT, roots=INDEX_ROOTS):
+        """当前磁盘上应被索引的文件 {库中路径: Path}"""
+        files = {}
+        for rel_dir, pattern, recursive in roots:
+            root = Path(base_dir) / rel_dir
+            if not root.exists():
+                continue
+            matches = root.rglob(pattern) if recursive else root.glob(pattern)
+            for path in matches:
+                if path.is_file():
+                    files[index_key(path)] = path
+        return files
+
+    def _replace_objects(self, bundle_id, bundle_key, objects):
+        conn = self.conn
+        if self.fts:
+            conn.execute("DELETE FROM objects_fts WHERE rowid IN (SELECT id FROM objects WHERE bundle_id=?)", (bundle_id,))
+        conn.execute("DELETE FROM objects WHERE bundle_id=?", (bundle_id,))
+        conn.executemany(
+            "INSERT INTO objects (bundle_id, path_id, type, name, size, width, height, format) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(bundle_id,) + tuple(obj) for obj in objects]
+        )
+        if self.fts:
+            conn.execute(
+                "INSERT INTO objects_fts (rowid, name, bundle) SELECT id, COALESCE(name, ''), ? FROM objects WHERE bundle_id=?",
+                (bundle_key, bundle_id)
+            )
+
+    def _delete_bundle(self, bundle_id):
+        if self.fts:
+            self.conn.execute("DELETE FROM objects_fts WHERE rowid IN (SELECT id FROM objects WHERE bundle_id=?)", (bundle_id,))
+        self.conn.execute("DELETE FROM objects WHERE bundle_id=?", (bundle_id,))
+        self.conn.execute("DELETE FROM bundles WHERE id=?", (bundle_id,))
+
+    @staticmethod
+    def _scan(todo, workers, memory_budget):
+        """并行扫描，按内存预算控制同时加载的文件（大 .assets 文件会单独运行）；按完成顺序产出结果"""
+        budget = MemoryBudget(memory_budget)
+        queue = [(args, estimate_working_set(args[0])) for args in todo]
+        running = {}
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            while queue or running:
+                for item in list(queue):
+                    if len(running) >= workers:
+                        break
+                    if budget.try_reserve(item[1]):
+                        queue.remove(item)
+                        running[executor.submit(index_bundle, item[0])] = item
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    args, estimate = running.pop(future)
+                    budget.release(estimate)
+                    yield future.result()
+
+    def update(self, base_dir=GAME_ROOT, workers=None, roots=INDEX_ROOTS, memory_budget=None):
+        """增量更新索引，返回统计字典；memory_budget 为同时扫描的估算内存上限（字节）"""
+        started = time.time()
+        conn = self.conn
+        files = self.collect_files(base_dir, roots)
+        existing = {
+            row[0]: row[1:]
+            for row in conn.execute("SELECT path, id, size, mtime_ns, hash FROM bundles")
+        }
+
+        stats = {'files': len(files), 'unchanged': 0, 'touched': 0, 'indexed': 0, 'failed': 0, 'removed': 0}
+
+        # 已删除的包
+        for key in set(existing) - set(files):
+            self._delete_bundle(existing[key][0])
+            stats['removed'] += 1
+
+        # 大小+修改时间没变的包不用看；变了的交给子进程（内容哈希相同则只更新时间）
+        todo = []
+        stats_by_path = {}
+        for key, path in files.items():
+            st = path.stat()
+            stats_by_path[str(path)] = (key, st)
+            row = existing.get(key)
+            if row and row[1] == st.st_size and row[2] == st.st_mtime_ns:
+                stats['unchanged'] += 1
+                continue
+            todo.append((str(path), row[3] if row and row[1] == st.st_size else None))
+
+        print(f"索引文件: {len(files)} 个（未变化 {stats['unchanged']}，待检查 {len(todo)}，已删除 {stats['removed']}）")
+
+        if todo:
+            workers = max(1, min(workers or cpu_count(), len(todo)))
+            pending = 0
+            for done, result in enumerate(self._scan(todo, workers, memory_budget), 1):
+                key, st = stats_by_path[result['path']]
+                now = int(time.time())
+
+                if result['same']:
+                    conn.execute("UPDATE bundles SET size=?, mtime_ns=? WHERE path=?", (st.st_size, st.st_mtime_ns, key))
+                    stats['touched'] += 1
+                else:
+                    conn.execute(
+                        "INSERT INTO bundles (path, size, mtime_ns, hash, object_count, error, indexed_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                        "ON CONFLICT(path) DO UPDATE SET size=excluded.size, mtime_ns=excluded.mtime_ns, "
+                        "hash=excluded.hash, object_count=excluded.object_count, error=excluded.error, "
+                        "indexed_at=excluded.indexed_at",
+                        (key, st.st_size, st.st_mtime_ns, result['hash'], len(result['objects']), result['error'], now)
+                    )
+                    bundle_id = conn.execute("SELECT id FROM bundles WHERE path=?", (key,)).fetchone()[0]
+                    self._replace_objects(bundle_id, key, result['objects'])
+                    if result['error']:
+                        stats['failed'] += 1
+                        print(f"  ✗ {key} - {result['error']}")
+                    else:
+                        stats['indexed'] += 1
+
+                pending += 1
+                if pending >= COMMIT_EVERY:
+                    conn.commit()
+                    pending = 0
+                if done % 100 == 0:
+                    print(f"  已处理 {done}/{len(todo)} 个...")
+
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('updated_at', ?)", (str(int(time.time())),))
+        catalog = catalog_bundles(Path(base_dir) / CATALOG_FILE)
+        if catalog is not None:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('catalog_bundles', ?)",
+                         (json.dumps(sorted(catalog), ensure_ascii=False),))
+        conn.commit()
+        stats['elapsed'] = time.time() - started
+        return stats
+
+    # -------------------- 查询 --------------------
+
+    def search(self, keywords, types=None, limit=None):
+        """
+        按关键词查找对象：每个关键词都要出现在对象名或所在包路径中（不区分大小写）
+        返回 [(bundle路径, path_id, 类型, 名称, 大小, 宽, 高, 格式), ...]
+        """
+        terms = [k for k in keywords if k]
+        params = []
+        select = ("SELECT b.path, o.path_id, o.type, o.name, o.size, o.width, o.height, o.format "
+                  "FROM objects o JOIN bundles b ON b.id = o.bundle_id")
+
+        if terms and self.fts and all(len(k) >= MIN_FTS_TERM_LENGTH for k in terms):
+            sql = select + " JOIN objects_fts f ON f.rowid = o.id WHERE objects_fts MATCH ?"
+            params.append(' AND '.join('"' + k.replace('"', '""') + '"' for k in terms))
+        else:
+            conditions = []
+            for k in terms:
+                pattern = '%' + k.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+                conditions.append("(o.name LIKE ? ESCAPE '\\' OR b.path LIKE ? ESCAPE '\\')")
+                params.extend([pattern, pattern])
+            sql = select + (" WHERE " + " AND ".join(conditions) if conditions else " WHERE 1")
+
+        if types:
+            sql += " AND o.type IN (%s)" % ','.join('?' * len(types))
+            params.extend(types)
+        sql += " ORDER BY b.path, o.name"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        return self.conn.execute(sql, params).fetchall()
+
+    def find_bundles(self, keywords, types=None):
+        """按关键词查找包含匹配对象的包，返回去重后的包路径列表"""
+        return list(dict.fromkeys(row[0] for row in self.search(keywords, types)))
+
+    def bundle_rows(self):
+        """全部已索引的包 {库中路径: (id, 大小, 修改时间, 哈希)}"""
+        return {row[0]: row[1:] for row in self.conn.execute("SELECT path, id, size, mtime_ns, hash FROM bundles")}
+
+    def indexed_objects(self, bundle_id):
+        """库中记录的包内对象（不检查是否过期）[(path_id, 类型, 名称, 大小, 宽, 高), ...]"""
+        return self.conn.execute(
+            "SELECT path_id, type, name, size, width, height FROM objects WHERE bundle_id=?", (bundle_id,)
+        ).fetchall()
+
+    def catalog_snapshot(self):
+        """上次更新索引时 catalog.json 引用的bundle集合，未记录时返回 None"""
+        row = self.conn.execute("SELECT value FROM meta WHERE key='catalog_bundles'").fetchone()
+        return set(json.loads(row[0])) if row else None
+
+    def bundle_objects(self, bundle_path):
+        """
+        返回包内对象 [(类型, 名称, 宽, 高), ...]；
+        包未被索引、索引已过期（大小/修改时间变化）或扫描出错时返回 None
+        """
+        row = self.conn.execute(
+            "SELECT id, size, mtime_ns, error FROM bundles WHERE path=?", (index_key(bundle_path),)
+        ).fetchone()
+        if not row or row[3]:
+            return None
+        try:
+            st = os.stat(bundle_path)
+        except OSError:
+            return None
+        if st.st_size != row[1] or st.st_mtime_ns != row[2]:
+            return None
+        return self.conn.execute("SELECT type, name, width, height FROM objects WHERE bundle_id=?", (row[0],)).fetchall()
+
+    def may_contain(self, bundle_path, spec, job):
+        """
+        按索引判断包里是否可能有符合提取规则的对象
+        无法确定（未索引/已过期）时返回 True，保证不会漏提
+        """
+        objects = self.bundle_objects(bundle_path)
+        if objects is None:
+            return True
+        for type_name, name, width, height in objects:
+            if type_name not in spec.types:
+                continue
+            if spec.name_filter and name is not None and not spec.name_filter(name, job):
+                continue
+            if spec.size_filter and width is not None and height is not None and not spec.size_filter(width, height, job):
+                continue
+            return True
+        return False
+
+    def summary(self):
+        conn = self.conn
+        bundles = conn.execute("SELECT COUNT(*), SUM(size), SUM(error IS NOT NULL) FROM bundles").fetchone()
+        objects = conn.execute("SELECT COUNT(*) FROM objects").fetchone()[0]
+        by_type = conn.execute(
+            "SELECT type, COUNT(*) FROM objects GROUP BY type ORDER BY COUNT(*) DESC LIMIT 15"
+        ).fetchall()
+        updated = conn.execute("SELECT value FROM meta WHERE key='updated_at'").fetchone()
+        return {
+            'bundles': bundles[0] or 0,
+            'bytes': bundles[1] or 0,
+            'failed': bundles[2] or 0,
+            'objects': objects,
+            'by_type': by_type,
+            'updated_at': int(updated[0]) if updated else None,
+        }
+
+
+# ==================== 命令行 ====================
+
+def print_search_results(rows, bundles_only=False):
+    if bundles_only:
+        seen = []
+        for row in rows:
+            if row[0] not in seen:
+                seen.append(row[0])
+                print(row[0])
+        return len(seen)
+
+    current = None
+    for path, path_id, type_name, name, size, width, height, fmt in rows:
+        if path != current:
+            print(f"\n[BUNDLE] {path}")
+            current = path
+        detail = f"  {type_name}: {name or '(无名)'}"
+        if width and height:
+            detail += f" ({width}x{height}{', ' + fmt if fmt else ''})"
+        print(detail)
+    return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="资源包索引数据库")
+    sub = parser.add_subparsers(dest='command')
+
+    update_parser = sub.add_parser('update', help='增量更新索引')
+    update_parser.add_argument('--workers', type=int, default=None, help='并行进程数（默认CPU核心数）')
+    update_parser.add_argument('--mem-budget-gb', type=float, default=None,
+                               help='同时扫描文件的估算内存上限GB，0 表示不限制（默认物理内存的60%%）')
+
+    query_parser = sub.add_parser('query', help='按关键词查询对象')
+    query_parser.add_argument('keywords', nargs='+', help='关键词（全部匹配，匹配对象名或包路径）')
+    query_parser.add_argument('--type', action='append', dest='types', help='限定对象类型，可重复')
+    query_parser.add_argument('--bundles', action='store_true', help='只列出包路径')
+    query_parser.add_argument('--limit', type=int, default=500, help='最多返回条数（0 不限）')
+
+    sub.add_parser('stats', help='查看索引概况')
+
+    args = parser.parse_args()
+    if not args.command:
+        parser.print_help()
+        return
+
+    if args.command == 'update':
+        print("=" * 70)
+        print("更新资源包索引")
+        print("=" * 70)
+        index = BundleIndex()
+        stats = index.update(workers=args.workers, memory_budget=budget_from_gb(args.mem_budget_gb))
+        index.close()
+        print(f"\n完成: 新索引 {stats['indexed']}，内容未变 {stats['touched']}，"
+              f"未变化 {stats['unchanged']}，失败 {stats['failed']}，删除 {stats['removed']}")
+        print(f"耗时: {stats['elapsed']:.1f}s")
+        print(f"索引库: {INDEX_DB_FILE}")
+        return
+
+    index = BundleIndex.open_existing()
+    if index is None:
+        print(f"索引库不存在，请先运行: python {Path(__file__).name} update")
+        sys.exit(1)
+
+    if args.command == 'query':
+        started = time.perf_counter()
+        rows = index.search(args.keywords, args.types, args.limit or None)
+        elapsed = (time.perf_counter() - started) * 1000
+        count = print_search_results(rows, args.bundles)
+        print(f"\n共 {count} 条（{elapsed:.1f} ms）")
+    elif args.command == 'stats':
+        info = index.summary()
+        print(f"包: {info['bundles']} 个（{info['bytes'] / 1024 / 1024:.1f} MB，扫描失败 {info['failed']}）")
+        print(f"对象: {info['objects']} 个")
+        for type_name, count in info['by_type']:
+            print(f"  {type_name}: {count}")
+        if info['updated_at']:
+            print(f"最后更新: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(info['updated_at']))}")
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,368 @@
+"""
+提取图片去重
+同一个图标常在多个包里各有一份（activities 图集、offers 包、eventhub 包……），
+各提取脚本分别写出，同步目录和 OSS 里就存了多份相同的图。
+
+对解码后的像素计算:
+  - 精确哈希: RGBA 像素完全相同即为重复（PNG 压缩参数不同也能识别）
+  - 感知哈希（dHash 64位）: 汉明距离很小的图只列出供人工确认，不自动合并
+
+每组精确重复的图保留一份（规范文件），其余为别名，写入 纹理去重映射.json；
+--apply hardlink 把别名替换为指向规范文件的硬链接（所有文件名照常可用，磁盘只存一份）。
+同步脚本读取映射，上传 OSS 时别名改为 OSS 软链接，不再重复上传。
+
+像素哈希按 (大小, 修改时间) 缓存在 纹理去重缓存.json，重复运行只解码新增/变化的图。
+
+用法:
+    python dedup_textures.py [目录 ...] [--apply hardlink] [--similar 4] [--workers N]
+"""
+import os
+import json
+import time
+import argparse
+from pathlib import Path
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import cpu_count
+
+from PIL import Image
+
+from bundle_cache import hash_bytes, to_record_path, from_record_path
+from extract_manifest import refresh_folder_index
+
+GAME_ROOT = Path(__file__).parent.parent
+# 默认扫描的目录（靠前的目录里的文件优先作为规范文件）
+DEFAULT_ROOTS = [
+    Path(__file__).parent / "MW解包有益资源",
+    GAME_ROOT / "MW资源",
+]
+MAPPING_FILE = Path(__file__).parent / "纹理去重映射.json"
+HASH_CACHE_FILE = Path(__file__).parent / "纹理去重缓存.json"
+HASH_CACHE_VERSION = 1
+# 感知哈希默认相似阈值（汉明距离），分 8 段比较，阈值不能超过 7
+DEFAULT_SIMILAR_DISTANCE = 4
+DHASH_BANDS = 8
+
+
+# ==================== 子进程: 计算哈希 ====================
+
+def dhash(img):
+    """差值哈希: 缩成 9x8 灰度，比较相邻像素明暗，得到64位整数"""
+    gray = img.convert('L').resize((9, 8), Image.LANCZOS)
+    pixels = list(gray.getdata())
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            value = (value << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return value
+
+
+def hash_image(path):
+    """返回 (path, 像素哈希, 感知哈希, 宽, 高)；无法读取时哈希为 None"""
+    try:
+        with Image.open(path) as img:
+            rgba = img.convert('RGBA')
+        width, height = rgba.size
+        pixel_hash = hash_bytes(f"{width}x{height}:".encode() + rgba.tobytes())
+        # 透明区域的颜色值没有意义，先叠到黑底上再算感知哈希
+        background = Image.new('RGBA', rgba.size, (0, 0, 0, 255))
+        perceptual = dhash(Image.alpha_composite(background, rgba))
+        return path, pixel_hash, perceptual, width, height
+    except Exception:
+        return path, None, None, 0, 0
+
+
+# ==================== 哈希缓存 ====================
+
+def load_hash_cache():
+    if not HASH_CACHE_FILE.exists():
+        return {}
+    try:
+        with open(HASH_CACHE_FILE, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get('version') != HASH_CACHE_VERSION:
+        return {}
+    return data.get('files', {})
+
+
+def save_hash_cache(files):
+    tmp_path = HASH_CACHE_FILE.with_name(HASH_CACHE_FILE.name + f".{os.getpid()}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': HASH_CACHE_VERSION, 'files': files}, f, ensure_ascii=False)
+    os.replace(tmp_path, HASH_CACHE_FILE)
+
+
+def collect_images(roots):
+    """
+    收集各目录下的PNG: [(记录路径, Path, stat)]，按目录优先级排序
+    目录可能相互包含（默认的 MW资源 就包含 MW解包有益资源）: 与前面目录相同或在其内部的目录直接跳过，
+    其余按实际路径去重，同一文件只收集一次（计入优先级最高的目录）
+    """
+    images = []
+    scanned = []
+    seen = set()
+    for priority, root in enumerate(roots):
+        root = Path(root)
+        if not root.exists():
+            print(f"  跳过不存在的目录: {root}")
+            continue
+        resolved = root.resolve()
+        if any(resolved == done or done in resolved.parents for done in scanned):
+            print(f"  跳过已包含在前面目录中的目录: {root}")
+            continue
+        scanned.append(resolved)
+        for path in root.rglob("*.png"):
+            if not path.is_file():
+                continue
+            real = os.path.normcase(str(path.resolve()))
+            if real in seen:
+                continue
+            seen.add(real)
+            images.append((priority, to_record_path(path), path, path.stat()))
+    images.sort(key=lambda item: (item[0], item[1].count('/'), len(item[1]), item[1]))
+    return [(key, path, st) for _, key, path, st in images]
+
+
+def compute_hashes(images, workers):
+    """返回 {记录路径: [大小, 修改时间, 像素哈希, 感知哈希, 宽, 高]}，只解码缓存中没有或已变化的图"""
+    cache = load_hash_cache()
+    result = {}
+    todo = []
+    for key, path, st in images:
+        cached = cache.get(key)
+        if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            result[key] = cached
+        else:
+            todo.append((key, path, st))
+
+    print(f"图片: {len(images)} 张（缓存命中 {len(result)}，需要解码 {len(todo)}）")
+    if todo:
+        by_path = {str(path): (key, st) for key, path, st in todo}
+        workers = max(1, min(workers or cpu_count(), len(todo)))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            paths = [str(path) for _, path, _ in todo]
+            for done, (path, pixel_hash, perceptual, width, height) in enumerate(
+                    executor.map(hash_image, paths, chunksize=16), 1):
+                if pixel_hash is None:
+                    continue
+                key, st = by_path[path]
+                result[key] = [st.st_size, st.st_mtime_ns, pixel_hash, perceptual, width, height]
+                if done % 500 == 0:
+                    print(f"  已解码 {done}/{len(todo)} 张...")
+
+    save_hash_cache(result)
+    return result
+
+
+# ==================== 分组 ====================
+
+def exact_groups(images, hashes):
+    """像素完全相同的分组: [(规范记录路径, [别名记录路径...])]，规范文件取排序最靠前的"""
+    groups = defaultdict(dict)
+    for key, _, _ in images:
+        info = hashes.get(key)
+        if info:
+            groups[info[2]][key] = None  # 有序去重，别名不会与规范文件相同
+    groups = [list(keys) for keys in groups.values()]
+    return [(keys[0], keys[1:]) for keys in groups if len(keys) > 1]
+
+
+def similar_pairs(hashes, canonical_keys, max_distance):
+    """
+    感知哈希相近但像素不同的图对 [(距离, a, b)]
+    64位分成8段，距离不超过7的两个哈希至少有一段完全相同，只比较同段相同的候选
+    """
+    buckets = defaultdict(list)
+    for key in canonical_keys:
+        value = hashes[key][3]
+        for band in range(DHASH_BANDS):
+            buckets[(band, (value >> (band * 8)) & 0xFF)].append(key)
+
+    pairs = {}
+    for keys in buckets.values():
+        for i, a in enumerate(keys):
+            for b in keys[i + 1:]:
+                pair = (a, b) if a < b else (b, a)
+                if pair in pairs:
+                    continue
+                distance = bin(hashes[a][3] ^ hashes[b][3]).count('1')
+                if distance <= max_distance:
+                    pairs[pair] = distance
+    return sorted((distance, a, b) for (a, b), distance in pairs.items())
+
+
+# ==================== 应用 ====================
+
+def same_file(a, b):
+    try:
+        return os.path.samefile(a, b)
+    except OSError:
+        return False
+
+
+def replace_with_hardlink(canonical, alias):
+    """把别名文件替换为指向规范文件的硬链接（先建临时链接再原子替换）"""
+    tmp_path = f"{alias}.{os.getpid()}.link.tmp"
+    try:
+        os.link(canonical, tmp_path)
+        os.replace(tmp_path, alias)
+        return True
+    except OSError as e:
+        print(f"  ✗ 无法建立硬链接 {alias}: {e}")
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return False
+
+
+def current_pixel_hash(path, hash_cache=None):
+    """文件当前的像素哈希: (大小, 修改时间) 与哈希缓存一致时直接用缓存，否则解码"""
+    if hash_cache:
+        cached = hash_cache.get(to_record_path(path))
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            return cached[2]
+    return hash_image(path)[1]
+
+
+def alias_still_valid(alias, canonical, pixel_hash, hash_cache=None):
+    """
+    映射生成后文件可能被重新提取（提取脚本先写临时文件再替换，硬链接会断开），
+    别名和规范文件仍是同一文件、或两者的像素哈希都仍与映射一致时才可以共用一份
+    hash_cache: load_hash_cache() 的结果，未变化的文件不必重新解码
+    """
+    if same_file(alias, canonical):
+        return True
+    if not pixel_hash:
+        return False
+    return (current_pixel_hash(alias, hash_cache) == pixel_hash
+            and current_pixel_hash(canonical, hash_cache) == pixel_hash)
+
+
+def load_alias_map(mapping_file=MAPPING_FILE):
+    """
+    读取去重映射，返回 {别名绝对路径（normcase）: (规范文件绝对路径, 像素哈希)}（供同步脚本使用）
+    映射可能已过期，使用前用 alias_still_valid 确认
+    """
+    if not Path(mapping_file).exists():
+        return {}
+    try:
+        with open(mapping_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    aliases = {}
+    for group in data.get('groups', []):
+        canonical = os.path.abspath(from_record_path(group['canonical']))
+        for alias in group['aliases']:
+            alias_key = os.path.normcase(os.path.abspath(from_record_path(alias)))
+            # 旧版映射里可能有别名等于规范文件自身的条目
+            if alias_key != os.path.normcase(canonical):
+                aliases[alias_key] = (canonical, group.get('hash'))
+    return aliases
+
+
+def main():
+    parser = argparse.ArgumentParser(description="提取图片去重（精确 + 感知哈希）")
+    parser.add_argument('roots', nargs='*', help='要扫描的目录（默认 MW解包有益资源 和 MW资源）')
+    parser.add_argument('--apply', choices=['none', 'hardlink'], default='none',
+                        help='none: 只报告并写映射（默认）；hardlink: 别名替换为硬链接')
+    parser.add_argument('--similar', type=int, default=DEFAULT_SIMILAR_DISTANCE, choices=range(0, 8), metavar='0-7',
+                        help=f'列出感知哈希距离不超过该值的相似图，0 表示不检查（默认 {DEFAULT_SIMILAR_DISTANCE}）')
+    parser.add_argument('--workers', type=int, default=None, help='解码进程数（默认CPU核心数）')
+    parser.add_argument('--limit', type=int, default=30, help='每类最多列出条数')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("提取图片去重")
+    print("=" * 70)
+
+    started = time.time()
+    roots = [Path(root) for root in args.roots] or DEFAULT_ROOTS
+    images = collect_images(roots)
+    if not images:
+        print("没有找到图片")
+        return
+    hashes = compute_hashes(images, args.workers)
+    sizes = {key: st.st_size for key, _, st in images}
+
+    groups = exact_groups(images, hashes)
+    alias_count = sum(len(aliases) for _, aliases in groups)
+    reclaimable = 0
+    already_linked = 0
+    for canonical, aliases in groups:
+        for alias in aliases:
+            if same_file(from_record_path(canonical), from_record_path(alias)):
+                already_linked += sizes[alias]
+            else:
+                reclaimable += sizes[alias]
+
+    print(f"\n精确重复: {len(groups)} 组，{alias_count} 个别名文件")
+    for canonical, aliases in sorted(groups, key=lambda g: -sizes[g[0]] * len(g[1]))[:args.limit]:
+        print(f"  {canonical}  ({sizes[canonical] / 1024:.0f} KB × {len(aliases) + 1})")
+        for alias in aliases:
+            print(f"    = {alias}")
+
+    tmp_path = MAPPING_FILE.with_name(MAPPING_FILE.name + f".{os.getpid()}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'generated_at': int(time.time()),
+            'groups': [
+                {'canonical': canonical, 'aliases': aliases, 'hash': hashes[canonical][2], 'bytes': sizes[canonical]}
+                for canonical, aliases in groups
+            ],
+        }, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, MAPPING_FILE)
+    print(f"\n映射已写入: {MAPPING_FILE}")
+
+    if args.apply == 'hardlink' and reclaimable:
+        linked = saved = 0
+        touched_folders = set()
+        for canonical, aliases in groups:
+            canonical_path = from_record_path(canonical)
+            for alias in aliases:
+                alias_path = from_record_path(alias)
+                if same_file(canonical_path, alias_path):
+                    continue
+                if replace_with_hardlink(canonical_path, alias_path):
+                    linked += 1
+                    saved += sizes[alias]
+                    touched_folders.add(os.path.dirname(alias_path))
+                    # 硬链接后修改时间随规范文件，同步更新哈希缓存，下次不必重新解码
+                    st = os.stat(alias_path)
+                    hashes[alias] = [st.st_size, st.st_mtime_ns] + hashes[alias][2:]
+        save_hash_cache(hashes)
+        # 文件名没变，让各文件夹的 _index.json 继续有效
+        for folder in touched_folders:
+            refresh_folder_index(folder)
+        print(f"硬链接: {linked} 个别名，节省 {saved / 1024 / 1024:.1f} MB")
+        already_linked += saved
+        reclaimable -= saved
+
+    if args.similar:
+        canonical_keys = [key for key, _, _ in images if key in hashes]
+        aliases = {alias for _, group_aliases in groups for alias in group_aliases}
+        canonical_keys = [key for key in canonical_keys if key not in aliases]
+        pairs = similar_pairs(hashes, canonical_keys, args.similar)
+        print(f"\n感知相似（距离 ≤ {args.similar}，像素不同，需人工确认）: {len(pairs)} 对")
+        for distance, a, b in pairs[:args.limit]:
+            print(f"  [{distance}] {a} ({hashes[a][4]}x{hashes[a][5]})")
+            print(f"      {b} ({hashes[b][4]}x{hashes[b][5]})")
+
+    total = sum(sizes.values())
+    print(f"\n总计: {len(images)} 张 / {total / 1024 / 1024:.1f} MB")
+    print(f"  已共享存储（硬链接）: {already_linked / 1024 / 1024:.1f} MB")
+    print(f"  仍可节省: {reclaimable / 1024 / 1024:.1f} MB"
+          + ("（使用 --apply hardlink 合并）" if reclaimable and args.apply == 'none' else ""))
+    print(f"耗时: {time.time() - started:.1f}s")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,8 @@
-import UnityPy
 import os
 from pathlib import Path
 
+from extract_engine import ExtractSpec, ExtractJob, run_jobs, parse_engine_args, glob_bundles
+
 # 路径配置
 BASE_PATH = r"Modern Warships_Data\StreamingAssets\aa\w64"
 OUTPUT_PATH = r"MW资源\extracted_ag97"
@@ -14,42 +15,37 @@ SEARCH_DIRS = [
     "contentseparated_assets_flags",
 ]
 
-def extract_bundle(bundle_path, output_dir, category=""):
-    """提取bundle中的图片"""
-    bundle_name = os.path.basename(bundle_path).replace('.png.bundle', '').replace('.bundle', '')
+def bundle_category(name):
+    """根据包名判断类型"""
+    if 'background' in name:
+        return "背景"
+    elif 'widget' in name:
+        return "组件"
+    elif 'thumbnail' in name:
+        return "缩略图"
+    elif 'camo' in name:
+        return "迷彩"
+    elif 'flag' in name:
+        return "旗帜"
+    return "其他"
+
+def ag97_output_name(name, img, path_id, job):
+    """文件名: "包名 - 类型"，包内对象名不同时追加 _对象名"""
+    bundle_name = os.path.basename(job.bundle_path).replace('.png.bundle', '').replace('.bundle', '')
 
     # 根据类型添加中文后缀
-    if category:
-        final_name = f"{bundle_name} - {category}"
-    else:
-        final_name = bundle_name
-
-    try:
-        env = UnityPy.load(bundle_path)
-        extracted = False
-
-        for obj in env.objects:
-            if obj.type.name in ["Texture2D", "Sprite"]:
-                try:
-                    data = obj.read()
-
-                    if hasattr(data, 'image'):
-                        img = data.image
-                        img_name = getattr(data, 'name', None) or getattr(data, 'm_Name', None) or final_name
-                        img_path = os.path.join(output_dir, f"{final_name}_{img_name}.png" if img_name != final_name else f"{final_name}.png")
-                        img.save(img_path)
-                        extracted = True
+    category = job.extra.get('category')
+    final_name = f"{bundle_name} - {category}" if category else bundle_name
 
-                except Exception as e:
-                    continue
+    img_name = name or final_name
+    return f"{final_name}_{img_name}.png" if img_name != final_name else f"{final_name}.png"
 
-        return extracted
-
-    except Exception as e:
-        print(f"  ERROR: {e}")
-        return False
+# 提取规则
+AG97_SPEC = ExtractSpec("extract_ag97", output_name=ag97_output_name)
 
 def main():
+    options = parse_engine_args("AG97活动资源提取工具")
+
     print("=" * 60)
     print("AG97活动资源提取工具 (AG97 Event Resources)")
     print("=" * 60)
@@ -74,7 +70,7 @@ def main():
         dir_path = base_path / search_dir
         if dir_path.exists():
             # 查找所有包含 ag97 的文件
-            bundles = list(dir_path.glob("*ag97*.bundle"))
+            bundles = glob_bundles(dir_path, "*ag97*.bundle")
             if bundles:
                 print(f"\n在 {search_dir} 找到 {len(bundles)} 个文件")
                 all_bundles.extend(bundles)
@@ -86,8 +82,16 @@ def main():
     print(f"\n总共找到 {len(all_bundles)} 个 AG97 相关文件")
     print("\n开始提取...\n")
 
+    jobs = []
+    for bundle_path in sorted(all_bundles):
+        name = bundle_path.stem.replace('.png', '')
+        category = bundle_category(name)
+        jobs.append(ExtractJob(bundle_path, output_dir, AG97_SPEC, label=f"[{category}] {name}", category=category))
+
+    stats = run_jobs(jobs, **options)
+
     # 分类统计
-    stats = {
+    category_stats = {
         "背景": 0,
         "组件": 0,
         "缩略图": 0,
@@ -95,38 +99,17 @@ def main():
         "旗帜": 0,
         "其他": 0
     }
-
-    for bundle_path in sorted(all_bundles):
-        name = bundle_path.stem.replace('.png', '')
-
-        # 判断类型
-        if 'background' in name:
-            category = "背景"
-        elif 'widget' in name:
-            category = "组件"
-        elif 'thumbnail' in name:
-            category = "缩略图"
-        elif 'camo' in name:
-            category = "迷彩"
-        elif 'flag' in name:
-            category = "旗帜"
-        else:
-            category = "其他"
-
-        print(f"[{category}] {name}")
-        success = extract_bundle(str(bundle_path), str(output_dir), category)
-
-        if success:
-            print(f"  + Success")
-            stats[category] += 1
-        else:
-            print(f"  - Failed")
+    job_categories = {job.bundle_path: job.extra['category'] for job in jobs}
+    for result in stats.results:
+        if result['outputs']:
+            category_stats[job_categories[result['bundle']]] += 1
 
     print("\n" + "=" * 60)
     print(f"提取完成!")
-    for cat, count in stats.items():
+    for cat, count in category_stats.items():
         if count > 0:
             print(f"  {cat}: {count} 个")
+    stats.print_summary()
     print(f"\n总计: {len(all_bundles)} 个文件")
     print(f"保存位置: {output_dir}")
     print("=" * 60)
@@ -0,0 +1,671 @@
+"""
+通用bundle提取引擎
+各提取脚本只描述"提哪些包、提哪些对象、文件怎么命名"（ExtractSpec + ExtractJob），
+加载/解码/保存、多进程并行、内存预算、超时、解包缓存、提取清单和统计都由这里统一完成。
+
+用法:
+    spec = ExtractSpec("extract_ui", output_name=sprite_file_name)
+    jobs = [ExtractJob(path, out_dir, spec) for path in bundles]
+    stats = run_jobs(jobs, **parse_engine_args("说明"))
+
+注意: spec 里的回调会被传到子进程，必须是模块级函数（不能用 lambda）
+"""
+import gc
+import io
+import os
+import time
+import argparse
+import threading
+from pathlib import Path
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import cpu_count
+
+from PIL import Image
+
+from bundle_cache import BundleCache, hash_bytes
+from extract_manifest import RunManifest
+from sprite_atlas import AtlasCropper, DEFAULT_ATLAS_CACHE_MB
+from memory_budget import MemoryBudget, estimate_working_set, load_environment, budget_from_gb, format_bytes
+
+# 单个bundle的默认超时（秒），超时的任务会连同进程池一起被终止重建
+DEFAULT_TIMEOUT = 600
+# 检查完成/超时的轮询间隔（秒）
+POLL_INTERVAL = 1.0
+# PNG压缩级别（Pillow 默认 6）；快速模式用 1，文件略大但压缩快数倍
+DEFAULT_PNG_LEVEL = 6
+FAST_PNG_LEVEL = 1
+# 每个子进程内的编码/写盘线程数，以及最多排队等待编码的图片数（限制内存占用）
+DEFAULT_ENCODE_THREADS = 2
+DEFAULT_ENCODE_QUEUE = 8
+# 子进程崩溃时同一任务最多重试的次数
+# 进程池崩溃时无法区分是哪个任务导致的，在途任务都会重试，且重试时单独运行以便确认元凶
+MAX_CRASH_RETRIES = 1
+# 队首任务超出内存预算时，往后最多看这么多个任务找放得下的
+ADMISSION_LOOKAHEAD = 32
+
+
+# ==================== 任务描述 ====================
+
+class ExtractSpec:
+    """
+    一类提取规则
+    name: 规则名（同时作为解包缓存的规则键）
+    types: 处理的对象类型
+    name_filter(name, job) -> bool: 按对象名筛选，None 表示不过滤；
+        在 obj.read() 之前只窥探对象名来判断，不匹配的对象不做完整解析和纹理解码
+    size_filter(width, height, job) -> bool: 按纹理尺寸筛选，在解码之前判断，None 表示不过滤
+    image_filter(img, job) -> bool: 按解码后的图片筛选，None 表示不过滤
+    output_name(name, img, path_id, job) -> str|None: 相对 job.output_dir 的文件名，返回 None 跳过该对象
+    skip_existing: 目标文件已存在时不覆盖（bundle内容变化时仍会覆盖）
+    use_cache: 是否使用解包缓存跳过未变化的bundle
+    """
+
+    def __init__(self, name, types=("Texture2D", "Sprite"), name_filter=None, size_filter=None, image_filter=None,
+                 output_name=None, skip_existing=False, use_cache=True):
+        self.name = name
+        self.types = tuple(types)
+        self.name_filter = name_filter
+        self.size_filter = size_filter
+        self.image_filter = image_filter
+        self.output_name = output_name or default_output_name
+        self.skip_existing = skip_existing
+        self.use_cache = use_cache
+
+
+class EncodeOptions:
+    """图片编码参数（由 run_jobs 设置到每个任务上，随任务传给子进程）"""
+
+    def __init__(self, png_level=DEFAULT_PNG_LEVEL, fast=False, threads=DEFAULT_ENCODE_THREADS,
+                 queue_size=DEFAULT_ENCODE_QUEUE):
+        self.png_level = png_level
+        self.fast = fast
+        self.threads = threads
+        self.queue_size = max(1, queue_size)
+
+    def save_kwargs(self, path):
+        ext = os.path.splitext(path)[1].lower()
+        if ext == '.png':
+            return {'compress_level': FAST_PNG_LEVEL if self.fast else self.png_level}
+        if ext == '.webp':
+            return {'method': 0 if self.fast else 4}
+        return {}
+
+
+class ExtractJob:
+    """单个bundle的提取任务，extra 存放规则回调需要的附加信息（如分类、显示名）"""
+
+    def __init__(self, bundle_path, output_dir, spec, label=None, **extra):
+        self.bundle_path = str(bundle_path)
+        self.output_dir = str(output_dir)
+        self.spec = spec
+        self.label = label or Path(bundle_path).name
+        self.extra = extra
+        self.overwrite = False  # 由引擎根据解包缓存设置
+        self.encode = EncodeOptions()
+        self.atlas_cache_bytes = DEFAULT_ATLAS_CACHE_MB * 1024 * 1024  # 0 表示不启用图集裁剪
+        self.use_mmap = True
+        self.memory_estimate = 0  # 由引擎按文件大小估算
+        self.crashes = 0
+
+    def __repr__(self):
+        return f"ExtractJob({self.label})"
+
+
+def default_output_name(name, img, path_id, job):
+    """默认命名: 对象名.png，无名对象用 unnamed_<path_id>"""
+    return f"{name or f'unnamed_{path_id}'}.png"
+
+
+def glob_bundles(root, patterns, recursive=False):
+    """按通配符收集bundle文件（去重并排序）"""
+    root = Path(root)
+    if isinstance(patterns, str):
+        patterns = [patterns]
+    found = set()
+    for pattern in patterns:
+        matches = root.rglob(pattern) if recursive else root.glob(pattern)
+        found.update(p for p in matches if p.is_file())
+    return sorted(found)
+
+
+# ==================== 子进程工作函数 ====================
+
+def object_name(data):
+    return getattr(data, 'name', None) or getattr(data, 'm_Name', None)
+
+
+# 序列化数据以 m_Name 开头的类型（旧版 UnityPy 没有 peek_name 时只对这些类型直接读首字段）
+NAMED_OBJECT_TYPES = {
+    "Texture2D", "Sprite", "SpriteAtlas", "TextAsset", "AudioClip", "Material", "Mesh",
+    "Shader", "AnimationClip", "Font", "AnimatorController", "AnimatorOverrideController",
+}
+
+
+def peek_object_name(obj):
+    """
+    只读取对象名，不解析整个对象；失败返回 None（调用方应退回完整读取）
+    新版 UnityPy 提供 peek_name()；旧版直接读第一个字段——
+    Texture2D/Sprite 等 NamedObject 的序列化数据都以 m_Name 开头
+    """
+    peek_name = getattr(obj, 'peek_name', None)
+    if peek_name is not None:
+        try:
+            return peek_name()
+        except Exception:
+            pass
+    if obj.type.name not in NAMED_OBJECT_TYPES:
+        return None
+    try:
+        obj.reset()
+        return obj.reader.read_aligned_string()
+    except Exception:
+        return None
+    finally:
+        try:
+            obj.reset()
+        except Exception:
+            pass
+
+
+def texture_size(data):
+    """解码前取纹理尺寸（Texture2D 的 m_Width/m_Height，Sprite 的 m_Rect），取不到返回 None"""
+    width = getattr(data, 'm_Width', None)
+    height = getattr(data, 'm_Height', None)
+    if width is None or height is None:
+        rect = getattr(data, 'm_Rect', None)
+        if rect is None:
+            return None
+        width = getattr(rect, 'width', None)
+        height = getattr(rect, 'height', None)
+        if width is None or height is None:
+            return None
+    return int(width), int(height)
+
+
+class ImageWriter:
+    """
+    子进程内的编码/写盘线程池
+    纹理解码在子进程主线程继续进行，PNG/WebP 压缩和写盘交给线程（Pillow 编码时释放 GIL），
+    排队图片数有上限，解码过快时会阻塞等待，避免大图集堆积占满内存
+    """
+
+    def __init__(self, options):
+        self.options = options
+        self.executor = ThreadPoolExecutor(max_workers=options.threads) if options.threads > 0 else None
+        self.slots = threading.BoundedSemaphore(options.queue_size)
+        self.pending = []
+
+    def _save(self, img, path):
+        """先编码到内存再一次写盘，顺便得到内容哈希（写清单用，不必再读回文件）"""
+        try:
+            ext = os.path.splitext(path)[1].lower()
+            buffer = io.BytesIO()
+            img.save(buffer, format=Image.registered_extensions().get(ext, 'PNG'), **self.options.save_kwargs(path))
+            content = buffer.getvalue()
+            # 先写临时文件再替换: 去重时建立的硬链接不会被改写（不影响同一份数据的其他文件名）
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp_path, 'wb') as f:
+                    f.write(content)
+                os.replace(tmp_path, path)
+            except Exception:
+                # 写盘/替换失败时不留下临时文件
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            return {'width': img.width, 'height': img.height, 'hash': hash_bytes(content),
+                    'time': time.strftime('%Y-%m-%dT%H:%M:%S')}
+        finally:
+            if self.executor is not None:
+                self.slots.release()
+
+    def submit(self, img, path, output):
+        if self.executor is None:
+            # 不开线程时同步保存
+            try:
+                self.pending.append((None, output, self._save(img, path)))
+            except Exception as e:
+                self.pending.append((None, output, e))
+            return
+        self.slots.acquire()
+        try:
+            future = self.executor.submit(self._save, img, path)
+        except Exception:
+            self.slots.release()
+            raise
+        self.pending.append((future, output, None))
+
+    def finish(self):
+        """等待全部写完，返回 [(output, 文件信息, 错误或None), ...]"""
+        finished = []
+        for future, output, saved in self.pending:
+            info, error = None, None
+            if future is not None:
+                try:
+                    info = future.result()
+                except Exception as e:
+                    error = e
+            elif isinstance(saved, Exception):
+                error = saved
+            else:
+                info = saved
+            finished.append((output, info, error))
+        self.pending = []
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+        return finished
+
+
+def decode_image(obj, name, data, cropper):
+    """
+    取对象图像；启用图集裁剪时每张图集页只解码一次:
+    Sprite 从缓存的图集页裁剪，图集页 Texture2D 本身复用已解码的页并登记到缓存
+    """
+    if cropper is None:
+        return data.image
+    type_name = obj.type.name
+    if type_name == "Sprite":
+        img = cropper.sprite_image(data)
+        return img if img is not None else data.image
+    if type_name == "Texture2D":
+        img = cropper.cached_texture(obj)
+        if img is None:
+            img = data.image
+            cropper.remember_texture(obj, name, img)
+        return img
+    return data.image
+
+
+def run_job(job):
+    """在子进程中执行: 加载bundle，筛选、解码图片，交给写盘线程保存"""
+    try:
+        return _run_job(job)
+    finally:
+        # UnityPy 的对象之间有循环引用，不主动回收时整个环境会在子进程里留到下一次GC
+        gc.collect()
+
+
+def _run_job(job):
+    spec = job.spec
+    started = time.time()
+    result = {
+        'bundle': job.bundle_path,
+        'label': job.label,
+        'extracted': 0,
+        'skipped': 0,
+        'filtered': 0,
+        'failed': 0,
+        'atlas_pages': 0,
+        'atlas_sprites': 0,
+        'outputs': [],
+        'records': [],
+        'error': None,
+        'elapsed': 0.0,
+    }
+
+    def add_record(output, info, status):
+        path_id, name, path = output
+        result['records'].append({'path_id': path_id, 'object': name, 'output': path, 'status': status, **info})
+
+    def add_failure(output, error):
+        """对象未能导出: 计入失败数并写一条 error 记录（有失败的bundle不写解包缓存，下次重新提取）"""
+        result['failed'] += 1
+        add_record(output, {'width': None, 'height': None, 'hash': None,
+                            'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'error': str(error)}, 'error')
+
+    writer = ImageWriter(job.encode)
+    cropper = AtlasCropper(job.atlas_cache_bytes) if job.atlas_cache_bytes else None
+    try:
+        env = load_environment(job.bundle_path, job.use_mmap)
+        made_dirs = set()
+        # 本任务已占用的输出路径: 多个对象映射到同一文件时只保存第一个（写盘是异步的，不能只看文件是否存在）
+        claimed = set()
+
+        for obj in env.objects:
+            if obj.type.name not in spec.types:
+                continue
+            name, img_path = None, None
+            try:
+                # 名称预筛: 只窥探对象名，不匹配的对象跳过完整解析和解码
+                if spec.name_filter:
+                    peeked = peek_object_name(obj)
+                    if peeked is not None and not spec.name_filter(peeked, job):
+                        result['filtered'] += 1
+                        continue
+
+                data = obj.read()
+                name = object_name(data)
+                if spec.name_filter and not spec.name_filter(name, job):
+                    continue
+                if not hasattr(data, 'image'):
+                    continue
+                if spec.size_filter:
+                    size = texture_size(data)
+                    if size is not None and not spec.size_filter(size[0], size[1], job):
+                        result['filtered'] += 1
+                        continue
+                img = decode_image(obj, name, data, cropper)
+                if spec.image_filter and not spec.image_filter(img, job):
+                    continue
+
+                file_name = spec.output_name(name, img, obj.path_id, job)
+                if not file_name:
+                    continue
+                img_path = os.path.join(job.output_dir, file_name)
+                output = (obj.path_id, name, img_path)
+
+                if img_path in claimed:
+                    result['skipped'] += 1
+                    continue
+                claimed.add(img_path)
+                if spec.skip_existing and not job.overwrite and os.path.exists(img_path):
+                    result['outputs'].append(output)
+                    add_record(output, {'width': img.width, 'height': img.height, 'hash': None,
+                                        'time': time.strftime('%Y-%m-%dT%H:%M:%S')}, 'skipped')
+                    result['skipped'] += 1
+                    continue
+
+                folder = os.path.dirname(img_path)
+                if folder not in made_dirs:
+                    os.makedirs(folder, exist_ok=True)
+                    made_dirs.add(folder)
+                writer.submit(img, img_path, output)
+            except Exception as e:
+                # 单个对象解析/解码/命名失败不影响其他对象，但要记下来（bundle不写缓存，下次重试）
+                add_failure((obj.path_id, name, img_path), e)
+    except Exception as e:
+        result['error'] = str(e)
+    finally:
+        for output, info, error in writer.finish():
+            if error is None:
+                result['outputs'].append(output)
+                add_record(output, info, 'extracted')
+                result['extracted'] += 1
+            else:
+                add_failure(output, f"写入失败: {error}")
+        if cropper is not None:
+            result['atlas_pages'] = cropper.decoded_pages
+            result['atlas_sprites'] = cropper.cropped_sprites
+            cropper.clear()
+
+    result['elapsed'] = time.time() - started
+    return result
+
+
+# ==================== 调度 ====================
+
+class EngineStats:
+    """一次提取的汇总统计"""
+
+    def __init__(self, total=0):
+        self.total = total
+        self.completed = 0
+        self.unchanged = 0
+        self.index_skipped = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.extracted = 0
+        self.skipped = 0
+        self.filtered = 0
+        self.object_failures = 0
+        self.atlas_pages = 0
+        self.atlas_sprites = 0
+        self.bundle_seconds = 0.0
+        self.started = time.time()
+        self.results = []
+
+    def add(self, result):
+        self.completed += 1
+        self.results.append(result)
+        self.bundle_seconds += result.get('elapsed', 0.0)
+        if result.get('timeout'):
+            self.timed_out += 1
+        elif result.get('error'):
+            self.failed += 1
+        self.extracted += result.get('extracted', 0)
+        self.skipped += result.get('skipped', 0)
+        self.filtered += result.get('filtered', 0)
+        self.object_failures += result.get('failed', 0)
+        self.atlas_pages += result.get('atlas_pages', 0)
+        self.atlas_sprites += result.get('atlas_sprites', 0)
+
+    def print_summary(self):
+        wall = time.time() - self.started
+        print(f"  bundle: {self.total} 个（处理 {self.completed} / 未变化跳过 {self.unchanged}"
+              f" / 失败 {self.failed} / 超时 {self.timed_out}）")
+        print(f"  图片: 新提取 {self.extracted} 张，已存在跳过 {self.skipped} 张")
+        if self.object_failures:
+            print(f"  失败: {self.object_failures} 个对象未能导出（所在bundle未写入解包缓存，下次会重新提取）")
+        if self.filtered:
+            print(f"  预筛: {self.filtered} 个对象未解析/未解码即跳过")
+        if self.atlas_sprites:
+            print(f"  图集: 解码 {self.atlas_pages} 张图集页，直接裁剪 {self.atlas_sprites} 个Sprite")
+        if self.index_skipped:
+            print(f"  索引: {self.index_skipped} 个bundle中没有符合条件的对象，未打开")
+        if wall > 0 and self.completed:
+            print(f"  耗时: {wall:.1f}s（单包累计 {self.bundle_seconds:.1f}s，并行加速 {self.bundle_seconds / wall:.1f}x）")
+
+
+def print_result(result, index, total, show_outputs=False):
+    """默认的单包进度输出"""
+    prefix = f"[{index}/{total}]"
+    if result.get('timeout'):
+        print(f"{prefix} ✗ {result['label']} - 超时")
+    elif result.get('error'):
+        print(f"{prefix} ✗ {result['label']} - {result['error']}")
+    elif result['extracted'] or result['skipped'] or result.get('failed'):
+        mark = "!" if result.get('failed') else "✓"
+        status = f"{mark} {result['label']} (提取 {result['extracted']} 张"
+        if result['skipped']:
+            status += f", 跳过 {result['skipped']} 张"
+        if result.get('failed'):
+            status += f", 失败 {result['failed']} 个"
+        print(f"{prefix} {status})")
+        if show_outputs:
+            for _, name, path in result['outputs']:
+                print(f"    + {os.path.basename(path)}")
+        for record in result.get('records', []):
+            if record['status'] == 'error':
+                target = os.path.basename(record['output']) if record['output'] else record['object']
+                print(f"    ✗ {target}: {record['error']}")
+    else:
+        print(f"{prefix} - {result['label']} (无内容)")
+
+
+def _kill_pool(executor):
+    """终止进程池中的全部子进程（用于超时/崩溃后重建）"""
+    processes = getattr(executor, '_processes', None) or {}
+    for process in list(processes.values()):
+        try:
+            process.terminate()
+        except Exception:
+            pass
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def run_jobs(jobs, workers=None, timeout=DEFAULT_TIMEOUT, use_cache=True, use_index=True, encode=None,
+             atlas_cache_mb=DEFAULT_ATLAS_CACHE_MB, memory_budget=None, use_mmap=True, manifest=True,
+             manifest_name=None, on_result=None, show_outputs=False):
+    """
+    并行执行提取任务
+    memory_budget: 同时在途任务的估算内存上限（字节），None 表示不限制；
+        按文件大小估算每个任务的工作集，放不下时等待，超大文件单独运行
+    manifest: 写运行清单（解包清单/时间_脚本名.jsonl）并合并各输出文件夹的 _index.json
+    有资源包索引（bundle_index.py）时，按索引跳过不含符合条件对象的bundle
+    同时在途的任务数不超过 workers（有界队列），因此提交时间近似于开始时间，可以据此判断超时；
+    超时或子进程崩溃时终止整个进程池并重建，其余在途任务重新排队。
+    """
+    jobs = list(jobs)
+    workers = max(1, workers or cpu_count())
+    encode = encode or EncodeOptions()
+    for job in jobs:
+        job.encode = encode
+        job.atlas_cache_bytes = int(atlas_cache_mb * 1024 * 1024)
+        job.use_mmap = use_mmap
+    stats = EngineStats(len(jobs))
+    cache = BundleCache() if use_cache else None
+    index = None
+    if use_index and any(job.spec.name_filter or job.spec.size_filter for job in jobs):
+        from bundle_index import BundleIndex
+        index = BundleIndex.open_existing()
+    stamps = {}
+
+    # 解包缓存: 未变化的bundle直接跳过
+    queue = deque()
+    for job in jobs:
+        if cache is not None and job.spec.use_cache:
+            fresh, stamp = cache.check(job.spec.name, job.bundle_path)
+            if fresh:
+                stats.unchanged += 1
+                continue
+            stamps[(job.spec.name, job.bundle_path)] = stamp
+            job.overwrite = cache.has_entry(job.spec.name, job.bundle_path)
+        if index is not None and (job.spec.name_filter or job.spec.size_filter):
+            if not index.may_contain(job.bundle_path, job.spec, job):
+                stats.index_skipped += 1
+                continue
+        queue.append(job)
+    if index is not None:
+        index.close()
+
+    pending_total = len(queue)
+    if stats.unchanged or stats.index_skipped:
+        print(f"未变化跳过 {stats.unchanged} 个bundle，索引排除 {stats.index_skipped} 个，需要提取 {pending_total} 个")
+    if not queue:
+        return stats
+
+    workers = min(workers, pending_total)
+    budget = MemoryBudget(memory_budget)
+    for job in queue:
+        job.memory_estimate = estimate_working_set(job.bundle_path)
+    if memory_budget:
+        largest = max(job.memory_estimate for job in queue)
+        print(f"并行进程: {workers} 个，内存预算 {format_bytes(memory_budget)}（单任务估算最大 {format_bytes(largest)}）\n")
+    else:
+        print(f"并行进程: {workers} 个\n")
+    run_manifest = RunManifest(manifest_name) if manifest else None
+
+    def failed_result(job, error, **extra):
+        result = {'bundle': job.bundle_path, 'label': job.label, 'extracted': 0, 'skipped': 0,
+                  'outputs': [], 'error': error, 'elapsed': 0.0}
+        result.update(extra)
+        return result
+
+    def next_admissible():
+        """取下一个内存预算内放得下的任务；崩溃重试的任务只在空闲时单独运行"""
+        for position, job in enumerate(queue):
+            if position > ADMISSION_LOOKAHEAD:
+                break
+            if job.crashes and running:
+                continue
+            if budget.try_reserve(job.memory_estimate):
+                del queue[position]
+                return job
+        return None
+
+    def finish(job, result):
+        budget.release(job.memory_estimate)
+        stats.add(result)
+        # 有对象导出失败时不写缓存，否则下次会当作未变化跳过，缺的图永远补不回来
+        if cache is not None and job.spec.use_cache and not result.get('error') and not result.get('failed'):
+            cache.record(job.spec.name, job.bundle_path, result['outputs'], stamps.get((job.spec.name, job.bundle_path)))
+        if run_manifest is not None:
+            run_manifest.add_result(job.spec.name, result)
+        if on_result:
+            on_result(result, stats.completed, pending_total)
+        else:
+            print_result(result, stats.completed, pending_total, show_outputs)
+
+    executor = ProcessPoolExecutor(max_workers=workers)
+    running = {}  # future -> (job, 提交时间)
+    try:
+        while queue or running:
+            while queue and len(running) < workers:
+                # 崩溃重试的任务单独运行
+                if queue[0].crashes and running:
+                    break
+                if any(job.crashes for job, _ in running.values()):
+                    break
+                job = next_admissible()
+                if job is None:
+                    break
+                running[executor.submit(run_job, job)] = (job, time.monotonic())
+
+            done, _ = wait(list(running), timeout=POLL_INTERVAL, return_when=FIRST_COMPLETED)
+            broken = False
+            for future in done:
+                job, _ = running.pop(future)
+                try:
+                    finish(job, future.result())
+                except BrokenProcessPool:
+                    broken = True
+                    job.crashes += 1
+                    if job.crashes > MAX_CRASH_RETRIES:
+                        finish(job, failed_result(job, '子进程崩溃'))
+                    else:
+                        budget.release(job.memory_estimate)
+                        queue.appendleft(job)
+
+            expired = []
+            if timeout:
+                now = time.monotonic()
+                expired = [f for f, (_, submitted) in running.items() if now - submitted > timeout]
+
+            if broken or expired:
+                for future in expired:
+                    job, submitted = running.pop(future)
+                    finish(job, failed_result(job, f'超过 {timeout}s', timeout=True,
+                                              elapsed=time.monotonic() - submitted))
+                # 其余在途任务放回队首，重建进程池
+                for future, (job, _) in running.items():
+                    budget.release(job.memory_estimate)
+                    queue.appendleft(job)
+                running.clear()
+                _kill_pool(executor)
+                executor = ProcessPoolExecutor(max_workers=workers)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        if cache is not None:
+            cache.save()
+        if run_manifest is not None:
+            run_manifest.close()
+            if run_manifest.count:
+                print(f"提取清单: {run_manifest.path}")
+
+    return stats
+
+
+# ==================== 命令行参数 ====================
+
+def parse_engine_args(description=None, argv=None):
+    """各提取脚本共用的命令行参数，返回可直接传给 run_jobs 的字典"""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--workers', type=int, default=None, help='并行进程数（默认CPU核心数）')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help='单个bundle超时秒数，0 表示不限')
+    parser.add_argument('--no-cache', action='store_true', help='忽略解包缓存，全部重新提取')
+    parser.add_argument('--no-index', action='store_true', help='不使用资源包索引预筛bundle')
+    parser.add_argument('--no-manifest', action='store_true', help='不写提取清单和文件夹索引')
+    parser.add_argument('--png-level', type=int, default=DEFAULT_PNG_LEVEL, choices=range(0, 10), metavar='0-9',
+                        help=f'PNG压缩级别（默认 {DEFAULT_PNG_LEVEL}）')
+    parser.add_argument('--fast-png', action='store_true', help=f'快速编码模式（PNG压缩级别 {FAST_PNG_LEVEL}）')
+    parser.add_argument('--encode-threads', type=int, default=DEFAULT_ENCODE_THREADS,
+                        help=f'每个进程的编码/写盘线程数，0 表示在解码线程中同步保存（默认 {DEFAULT_ENCODE_THREADS}）')
+    parser.add_argument('--mem-budget-gb', type=float, default=None,
+                        help='同时在途任务的估算内存上限GB，0 表示不限制（默认物理内存的60%%）')
+    parser.add_argument('--no-mmap', action='store_true', help='大文件不使用内存映射读取')
+    parser.add_argument('--atlas-cache-mb', type=float, default=DEFAULT_ATLAS_CACHE_MB,
+                        help=f'每个bundle图集页缓存上限MB，0 表示不按图集裁剪（默认 {DEFAULT_ATLAS_CACHE_MB}）')
+    args = parser.parse_args(argv)
+    return {
+        'workers': args.workers,
+        'timeout': args.timeout or None,
+        'use_cache': not args.no_cache,
+        'use_index': not args.no_index,
+        'manifest': not args.no_manifest,
+        'encode': EncodeOptions(png_level=args.png_level, fast=args.fast_png, threads=args.encode_threads),
+        'atlas_cache_mb': args.atlas_cache_mb,
+        'memory_budget': budget_from_gb(args.mem_budget_gb),
+        'use_mmap': not args.no_mmap,
+    }
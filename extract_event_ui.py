@@ -1,7 +1,8 @@
-import UnityPy
 import os
 from pathlib import Path
 
+from extract_engine import ExtractSpec, ExtractJob, run_jobs, parse_engine_args
+
 # 活动UI路径
 EVENT_UI_PATH = r"Modern Warships_Data\StreamingAssets\aa\w64\contentseparated_assets_ui\eventhub"
 OUTPUT_PATH = r"MW资源\extracted_events"
@@ -50,49 +51,16 @@ EVENT_NAMES = {
     "me97tr": "中东活动97土耳其 (Middle East TR)",
 }
 
-def extract_event_bundle(bundle_path, output_dir):
-    """提取活动UI bundle"""
-    bundle_name = os.path.basename(bundle_path).replace('.bundle', '')
-
-    # 获取翻译名称
-    display_name = EVENT_NAMES.get(bundle_name, bundle_name)
-    folder_name = f"{bundle_name} - {EVENT_NAMES[bundle_name]}" if bundle_name in EVENT_NAMES else bundle_name
-
-    print(f"\n提取活动: {display_name}")
-
-    # 创建输出目录
-    output_folder = os.path.join(output_dir, folder_name)
-    os.makedirs(output_folder, exist_ok=True)
-
-    try:
-        env = UnityPy.load(bundle_path)
-        extracted_count = 0
-
-        for obj in env.objects:
-            if obj.type.name in ["Texture2D", "Sprite"]:
-                try:
-                    data = obj.read()
-
-                    if hasattr(data, 'image'):
-                        img = data.image
-                        img_name = getattr(data, 'name', None) or getattr(data, 'm_Name', None) or f"unnamed_{obj.path_id}"
-                        img_path = os.path.join(output_folder, f"{img_name}.png")
+# 提取规则: 活动UI: 每个活动的图片保存到 "包名 - 活动名" 文件夹
+EVENT_UI_SPEC = ExtractSpec("extract_event_ui")
 
-                        img.save(img_path)
-                        extracted_count += 1
-                        print(f"  + {img_name}.png")
-
-                except Exception as e:
-                    continue
-
-        print(f"完成! 提取 {extracted_count} 张图片")
-        return extracted_count
-
-    except Exception as e:
-        print(f"ERROR: {e}")
-        return 0
+def event_folder_name(bundle_path):
+    bundle_name = os.path.basename(bundle_path).replace('.bundle', '')
+    return f"{bundle_name} - {EVENT_NAMES[bundle_name]}" if bundle_name in EVENT_NAMES else bundle_name
 
 def main():
+    options = parse_engine_args("月中活动 UI 提取工具")
+
     print("=" * 60)
     print("月中活动 UI 提取工具")
     print("=" * 60)
@@ -111,15 +79,18 @@ def main():
     event_bundles = list(event_dir.glob("*.bundle"))
     print(f"\n找到 {len(event_bundles)} 个活动UI包\n")
 
-    total_extracted = 0
-
+    jobs = []
     for bundle_path in sorted(event_bundles):
-        count = extract_event_bundle(str(bundle_path), str(output_dir))
-        total_extracted += count
+        bundle_name = bundle_path.name.replace('.bundle', '')
+        # 获取翻译名称
+        display_name = EVENT_NAMES.get(bundle_name, bundle_name)
+        jobs.append(ExtractJob(bundle_path, output_dir / event_folder_name(bundle_path), EVENT_UI_SPEC, label=display_name))
+
+    stats = run_jobs(jobs, **options)
 
     print("\n" + "=" * 60)
     print(f"提取完成!")
-    print(f"总共提取: {total_extracted} 张活动UI图片")
+    stats.print_summary()
     print(f"保存位置: {output_dir}")
     print("=" * 60)
 
@@ -0,0 +1,181 @@
+"""
+提取清单
+每次提取运行把导出结果逐条写入 JSONL 清单（来源bundle、对象、输出路径、尺寸、内容哈希、时间），
+并在每个输出文件夹合并维护一份 _index.json。
+下游（GUI 新数据扫描、抽奖物品爬取的资源存在检查）读一次索引文件即可知道文件夹里有什么，
+不用逐个 stat 上千个文件。
+
+索引文件的修改时间晚于文件夹修改时间才视为有效（之后有文件增删会让文件夹时间更新），
+无效时调用方应退回直接列目录。
+"""
+import os
+import sys
+import json
+import time
+from pathlib import Path
+
+from bundle_cache import to_record_path
+
+# 运行清单目录（每次运行一个 jsonl 文件）
+MANIFEST_DIR = Path(__file__).parent / "解包清单"
+# 每个输出文件夹内的合并索引
+FOLDER_INDEX_NAME = "_index.json"
+FOLDER_INDEX_VERSION = 1
+
+
+# ==================== 读取文件夹索引 ====================
+
+def load_folder_index(folder):
+    """
+    读取文件夹的 _index.json，返回 {文件名: 信息}；
+    索引不存在、损坏或已过期（之后文件夹有变化）时返回 None
+    """
+    folder = Path(folder)
+    index_file = folder / FOLDER_INDEX_NAME
+    try:
+        if index_file.stat().st_mtime_ns <= folder.stat().st_mtime_ns:
+            return None
+        with open(index_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get('version') != FOLDER_INDEX_VERSION:
+        return None
+    return data.get('files', {})
+
+
+def folder_file_names(folder):
+    """文件夹中的文件名集合：优先用有效的索引（一次读取），否则列目录"""
+    files = load_folder_index(folder)
+    if files is not None:
+        return set(files)
+    try:
+        with os.scandir(folder) as it:
+            return {entry.name for entry in it if entry.is_file() and entry.name != FOLDER_INDEX_NAME}
+    except OSError:
+        return set()
+
+
+def refresh_folder_index(folder):
+    """
+    文件被原地替换（文件名集合没变，如去重改为硬链接）后调用:
+    索引中的文件名与目录内容仍一致时，把索引时间推到文件夹时间之后，使其继续有效
+    """
+    folder = Path(folder)
+    index_file = folder / FOLDER_INDEX_NAME
+    try:
+        with open(index_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        with os.scandir(folder) as it:
+            present = {entry.name for entry in it if entry.is_file() and not entry.name.startswith(FOLDER_INDEX_NAME)}
+    except (OSError, ValueError):
+        return False
+    if data.get('version') != FOLDER_INDEX_VERSION or set(data.get('files', {})) != present:
+        return False
+    now = time.time_ns()
+    os.utime(index_file, ns=(now, max(now, folder.stat().st_mtime_ns + 1)))
+    return True
+
+
+def _write_folder_index(folder, files):
+    folder = Path(folder)
+    index_file = folder / FOLDER_INDEX_NAME
+    tmp_file = folder / f"{FOLDER_INDEX_NAME}.{os.getpid()}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump({'version': FOLDER_INDEX_VERSION, 'files': files}, f, ensure_ascii=False)
+    os.replace(tmp_file, index_file)
+    # 替换本身会更新文件夹时间，把索引时间再往后推，使其晚于文件夹时间
+    now = time.time_ns()
+    os.utime(index_file, ns=(now, max(now, folder.stat().st_mtime_ns + 1)))
+
+
+# ==================== 运行清单 ====================
+
+class RunManifest:
+    """一次提取运行的清单：结果到达时立即追加一行，结束时合并各文件夹索引"""
+
+    def __init__(self, name=None, manifest_dir=MANIFEST_DIR):
+        name = name or Path(sys.argv[0]).stem or "extract"
+        os.makedirs(manifest_dir, exist_ok=True)
+        self.path = Path(manifest_dir) / f"{time.strftime('%Y%m%d_%H%M%S')}_{name}.jsonl"
+        self.file = open(self.path, 'a', encoding='utf-8', buffering=1)
+        self.folders = {}  # 文件夹 -> {文件名: 信息}
+        self.count = 0
+
+    def add_result(self, rule, result):
+        """写入一个bundle的全部导出记录"""
+        bundle = to_record_path(result['bundle'])
+        for record in result.get('records', []):
+            path = record['output']
+            entry = {
+                'time': record['time'],
+                'rule': rule,
+                'bundle': bundle,
+                'path_id': record['path_id'],
+                'object': record['object'],
+                'output': to_record_path(path) if path else None,
+                'width': record['width'],
+                'height': record['height'],
+                'hash': record['hash'],
+                'status': record['status'],
+            }
+            if record.get('error'):
+                entry['error'] = record['error']
+            self.file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            self.count += 1
+
+            # 导出失败的记录只写清单，文件夹索引保留原有信息
+            if record['status'] == 'error':
+                continue
+
+            folder, file_name = os.path.split(path)
+            self.folders.setdefault(folder, {})[file_name] = {
+                'bundle': bundle,
+                'path_id': record['path_id'],
+                'object': record['object'],
+                'width': record['width'],
+                'height': record['height'],
+                'hash': record['hash'],
+                'time': record['time'],
+                'status': record['status'],
+            }
+
+    def close(self):
+        """关闭清单并合并各输出文件夹的 _index.json"""
+        self.file.close()
+        for folder, updates in self.folders.items():
+            try:
+                self._merge_folder(folder, updates)
+            except OSError as e:
+                print(f"更新文件夹索引失败 {folder}: {e}")
+        if self.count == 0:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+    def _merge_folder(self, folder, updates):
+        index_file = Path(folder) / FOLDER_INDEX_NAME
+        files = {}
+        if index_file.exists():
+            try:
+                with open(index_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') == FOLDER_INDEX_VERSION:
+                    files = data.get('files', {})
+            except (OSError, ValueError):
+                files = {}
+
+        for file_name, info in updates.items():
+            # 已存在而跳过的文件保留原有记录（含哈希）
+            if info['status'] == 'skipped' and file_name in files:
+                continue
+            files[file_name] = info
+
+        # 以实际目录内容为准：删掉已不存在的，补上不是本工具导出的文件
+        with os.scandir(folder) as it:
+            present = {entry.name for entry in it if entry.is_file() and not entry.name.startswith(FOLDER_INDEX_NAME)}
+        files = {name: info for name, info in files.items() if name in present}
+        for name in present - set(files):
+            files[name] = {}
+        _write_folder_index(folder, files)
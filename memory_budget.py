@@ -0,0 +1,150 @@
+"""
+内存预算
+整包加载 sharedassetsN.assets / resources.assets 时单个 UnityPy 环境可达数GB，
+按CPU核数并行会把内存吃满开始换页。这里按文件大小估算每个任务的工作集，
+只有预算内放得下时才开始新任务（没有任务在跑时总会放行一个，超大文件单独运行）。
+
+估算是粗略的经验值:
+  - .bundle 通常 LZ4 压缩，解压后的块加上解码出的图片约为文件大小的 3 倍
+  - .assets 不压缩，用内存映射读取时原始数据不占进程私有内存，
+    主要是解析出的对象和解码的纹理（纹理数据在同名 .resS 里，一并计入）
+"""
+import os
+import mmap
+import threading
+
+# 每个工作进程本身（Python + UnityPy + Pillow）的基础占用
+PROCESS_BASE_BYTES = 200 * 1024 * 1024
+# 工作集 / 文件大小 的估算系数
+COMPRESSED_FACTOR = 3.0
+UNCOMPRESSED_FACTOR = 1.0
+# 默认预算占物理内存的比例（留给系统和其他程序）
+DEFAULT_BUDGET_RATIO = 0.6
+# 不小于这个大小的文件用内存映射加载
+MMAP_MIN_BYTES = 64 * 1024 * 1024
+
+
+def total_memory_bytes():
+    """物理内存总量，无法获取时返回 None"""
+    try:
+        import psutil
+        return psutil.virtual_memory().total
+    except ImportError:
+        pass
+    if hasattr(os, 'sysconf'):
+        try:
+            return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+        except (ValueError, OSError):
+            pass
+    if os.name == 'nt':
+        import ctypes
+
+        class MEMORYSTATUSEX(ctypes.Structure):
+            _fields_ = [
+                ('dwLength', ctypes.c_ulong),
+                ('dwMemoryLoad', ctypes.c_ulong),
+                ('ullTotalPhys', ctypes.c_ulonglong),
+                ('ullAvailPhys', ctypes.c_ulonglong),
+                ('ullTotalPageFile', ctypes.c_ulonglong),
+                ('ullAvailPageFile', ctypes.c_ulonglong),
+                ('ullTotalVirtual', ctypes.c_ulonglong),
+                ('ullAvailVirtual', ctypes.c_ulonglong),
+                ('ullAvailExtendedVirtual', ctypes.c_ulonglong),
+            ]
+
+        status = MEMORYSTATUSEX()
+        status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return status.ullTotalPhys
+    return None
+
+
+def default_budget_bytes():
+    """默认预算: 物理内存的 60%；无法获取物理内存时不限制（返回 None）"""
+    total = total_memory_bytes()
+    return int(total * DEFAULT_BUDGET_RATIO) if total else None
+
+
+def budget_from_gb(value):
+    """命令行参数转预算字节数: None → 自动，0 → 不限制"""
+    if value is None:
+        return default_budget_bytes()
+    if value <= 0:
+        return None
+    return int(value * 1024 * 1024 * 1024)
+
+
+def estimate_working_set(path):
+    """按文件大小估算加载并处理该文件需要的内存（字节）"""
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return PROCESS_BASE_BYTES
+    if str(path).lower().endswith('.bundle'):
+        return PROCESS_BASE_BYTES + int(size * COMPRESSED_FACTOR)
+    res_path = f"{path}.resS"
+    if os.path.exists(res_path):
+        size += os.path.getsize(res_path)
+    return PROCESS_BASE_BYTES + int(size * UNCOMPRESSED_FACTOR)
+
+
+def format_bytes(value):
+    return f"{value / 1024 / 1024 / 1024:.1f} GB"
+
+
+class MemoryBudget:
+    """
+    内存预算计数（线程安全）
+    try_reserve 用于调度器的非阻塞准入，reserve 用于线程池中阻塞等待
+    """
+
+    def __init__(self, limit_bytes):
+        self.limit = limit_bytes
+        self.used = 0
+        self.peak = 0
+        self._cond = threading.Condition()
+
+    def fits(self, amount):
+        """预算内放得下，或当前没有占用（超大任务单独运行）"""
+        return self.limit is None or self.used == 0 or self.used + amount <= self.limit
+
+    def try_reserve(self, amount):
+        with self._cond:
+            if not self.fits(amount):
+                return False
+            self.used += amount
+            self.peak = max(self.peak, self.used)
+            return True
+
+    def reserve(self, amount):
+        with self._cond:
+            self._cond.wait_for(lambda: self.fits(amount))
+            self.used += amount
+            self.peak = max(self.peak, self.used)
+
+    def release(self, amount):
+        with self._cond:
+            self.used = max(0, self.used - amount)
+            self._cond.notify_all()
+
+
+def load_environment(path, use_mmap=True):
+    """
+    加载 UnityPy 环境；大文件用内存映射读取（页面由系统按需换入换出，不计入进程私有内存）
+    同目录的 .resS 等依赖仍按原路径解析。旧版 UnityPy 不支持时退回 UnityPy.load
+    """
+    import UnityPy
+
+    path = str(path)
+    if use_mmap and os.path.getsize(path) >= MMAP_MIN_BYTES:
+        try:
+            with open(path, 'rb') as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            env = UnityPy.Environment(path=os.path.dirname(os.path.abspath(path)))
+            env.load_file(memoryview(mapped), name=path)
+            # 映射与环境同生命周期，环境被回收时一起释放
+            env._mapped = mapped
+            return env
+        except Exception:
+            pass
+    return UnityPy.load(path)
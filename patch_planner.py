@@ -0,0 +1,286 @@
+"""
+补丁计划（只读，不解包）
+游戏更新后先运行它，看清这次补丁动了什么，再决定跑哪些提取脚本：
+  - 对比当前 aa/w64 目录与资源包索引（bundle_index.py 上次 update 的快照），
+    列出新增 / 内容变化 / 仅时间变化 / 删除的bundle
+  - 对比 Addressables catalog.json 引用的bundle列表（新增引用但本地还没下载的也能看到）
+  - 估算需要解码的数据量（读取字节数、纹理像素数）
+  - 标出 extract_all_events.py 的 SEARCH_CONFIG 中哪些规则会命中
+  - --objects: 额外扫描变化的bundle，按对象列出新增/变化/删除（只读对象头，不解码纹理）
+
+提取脚本本身有解包缓存，只会重新解码内容变化的bundle；这里给的是事先的预览。
+看完计划后运行 python bundle_index.py update 即可把快照更新到当前版本。
+
+用法:
+    python patch_planner.py [--objects] [--workers N] [--limit 30] [--json 计划.json]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from multiprocessing import cpu_count
+
+from bundle_cache import hash_file
+from bundle_index import (BundleIndex, GAME_ROOT, INDEX_ROOTS, CATALOG_FILE, TEXTURE_TYPES,
+                          catalog_bundles, index_bundle)
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "MW解包有益资源"))
+from extract_all_events import search_rules_for
+
+# aa/w64 在库中的路径前缀
+W64_PREFIX = "Modern Warships_Data/StreamingAssets/aa/w64/"
+# 计算内容哈希的线程数（hashlib 释放 GIL，主要受磁盘限制）
+HASH_THREADS = 4
+
+
+# ==================== 对比 ====================
+
+def classify_bundles(index, files, workers=HASH_THREADS):
+    """
+    对比磁盘与索引快照
+    返回 {'added': [key], 'changed': [key], 'touched': [key], 'removed': [key], 'unchanged': 数量}
+    大小相同但修改时间变化的包计算内容哈希，哈希相同记为 touched（提取时会被缓存跳过）
+    """
+    rows = index.bundle_rows()
+    plan = {'added': [], 'changed': [], 'touched': [], 'removed': sorted(set(rows) - set(files)), 'unchanged': 0}
+
+    suspects = []
+    for key, path in sorted(files.items()):
+        row = rows.get(key)
+        if row is None:
+            plan['added'].append(key)
+            continue
+        st = path.stat()
+        if row[1] == st.st_size and row[2] == st.st_mtime_ns:
+            plan['unchanged'] += 1
+        elif row[1] != st.st_size or not row[3]:
+            plan['changed'].append(key)
+        else:
+            suspects.append((key, path, row[3]))
+
+    if suspects:
+        print(f"校验 {len(suspects)} 个大小未变但修改时间变化的包...")
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            hashes = executor.map(lambda item: hash_file(item[1]), suspects)
+            for (key, _, known_hash), current in zip(suspects, hashes):
+                plan['touched' if current == known_hash else 'changed'].append(key)
+    return plan
+
+
+def object_key(type_name, name, path_id):
+    """对象对比键：有名称时按 (类型, 名称)，重新打包后 path_id 可能变化；无名对象退回 path_id"""
+    return (type_name, name) if name else (type_name, f"#{path_id}")
+
+
+def diff_objects(old_objects, new_objects):
+    """
+    old_objects: [(path_id, 类型, 名称, 大小, 宽, 高)]（来自索引）
+    new_objects: [(path_id, 类型, 名称, 大小, 宽, 高, 格式)]（来自 index_bundle）
+    返回 (新增, 变化, 删除)，元素为 (类型, 名称, 宽, 高)
+    """
+    old = {object_key(o[1], o[2], o[0]): o for o in old_objects}
+    new = {object_key(o[1], o[2], o[0]): o for o in new_objects}
+    added = [(o[1], o[2], o[4], o[5]) for key, o in new.items() if key not in old]
+    removed = [(o[1], o[2], o[4], o[5]) for key, o in old.items() if key not in new]
+    changed = []
+    for key, o in new.items():
+        before = old.get(key)
+        if before is not None and (before[3], before[4], before[5]) != (o[3], o[4], o[5]):
+            changed.append((o[1], o[2], o[4], o[5]))
+    return added, changed, removed
+
+
+def texture_pixels(objects, width_at, height_at, type_at):
+    """对象列表中纹理的 (数量, 像素数)"""
+    count = pixels = 0
+    for o in objects:
+        if o[type_at] in TEXTURE_TYPES and o[width_at] and o[height_at]:
+            count += 1
+            pixels += o[width_at] * o[height_at]
+    return count, pixels
+
+
+def rules_for_key(key):
+    if not key.startswith(W64_PREFIX):
+        return []
+    return search_rules_for(key[len(W64_PREFIX):])
+
+
+# ==================== 报告 ====================
+
+def print_keys(title, keys, limit, detail=None):
+    print(f"\n{title}: {len(keys)} 个")
+    for key in keys[:limit]:
+        line = f"  {key[len(W64_PREFIX):] if key.startswith(W64_PREFIX) else key}"
+        if detail:
+            extra = detail(key)
+            if extra:
+                line += f"  {extra}"
+        print(line)
+    if len(keys) > limit:
+        print(f"  ... 另有 {len(keys) - limit} 个")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="补丁计划: 对比当前游戏文件与资源包索引快照（只读）")
+    parser.add_argument('--objects', action='store_true', help='扫描新增/变化的包，按对象列出差异（较慢，不解码纹理）')
+    parser.add_argument('--workers', type=int, default=None, help='--objects 扫描的并行进程数（默认CPU核心数）')
+    parser.add_argument('--limit', type=int, default=30, help='每类最多列出条数')
+    parser.add_argument('--json', dest='json_file', default=None, help='把完整计划写入JSON文件')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("补丁计划（只读，不解包）")
+    print("=" * 70)
+
+    index = BundleIndex.open_existing()
+    if index is None:
+        print("资源包索引不存在，没有可对比的快照，请先运行: python bundle_index.py update")
+        sys.exit(1)
+
+    started = time.time()
+    summary = index.summary()
+    if summary['updated_at']:
+        print(f"快照时间: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(summary['updated_at']))}"
+              f"（{summary['bundles']} 个包）")
+
+    files = index.collect_files(GAME_ROOT, INDEX_ROOTS)
+    plan = classify_bundles(index, files)
+    rows = index.bundle_rows()
+
+    def size_of(key):
+        path = files.get(key)
+        return path.stat().st_size if path is not None else 0
+
+    # -------------------- 解码量估算 --------------------
+    # 变化的包按快照中的纹理估算，新增的包只有文件大小（--objects 时用扫描结果）
+    to_extract = plan['added'] + plan['changed']
+    read_bytes = sum(size_of(key) for key in to_extract)
+    textures = pixels = 0
+    for key in plan['changed']:
+        count, px = texture_pixels(index.indexed_objects(rows[key][0]), 4, 5, 1)
+        textures += count
+        pixels += px
+
+    # -------------------- 对象级差异 --------------------
+    object_diffs = {}
+    if args.objects and to_extract:
+        print(f"扫描 {len(to_extract)} 个新增/变化的包中的对象...")
+        textures = pixels = 0
+        workers = max(1, min(args.workers or cpu_count(), len(to_extract)))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            tasks = [(str(files[key]), None) for key in to_extract]
+            for key, result in zip(to_extract, executor.map(index_bundle, tasks, chunksize=4)):
+                if result['error']:
+                    object_diffs[key] = {'error': result['error']}
+                    continue
+                count, px = texture_pixels(result['objects'], 4, 5, 1)
+                textures += count
+                pixels += px
+                old_objects = index.indexed_objects(rows[key][0]) if key in rows else []
+                added, changed, removed = diff_objects(old_objects, result['objects'])
+                object_diffs[key] = {'added': added, 'changed': changed, 'removed': removed}
+
+    # -------------------- catalog --------------------
+    catalog_now = catalog_bundles(GAME_ROOT / CATALOG_FILE)
+    catalog_before = index.catalog_snapshot()
+    catalog_diff = None
+    if catalog_now is not None and catalog_before is not None:
+        catalog_diff = {
+            'added': sorted(catalog_now - catalog_before),
+            'removed': sorted(catalog_before - catalog_now),
+            # catalog 引用了但本地没有的包（通常是尚未下载的远程包）
+            'missing': sorted(p for p in catalog_now if W64_PREFIX + p not in files),
+        }
+    index.close()
+
+    # -------------------- 规则命中 --------------------
+    rule_hits = Counter()
+    for key in to_extract:
+        for rule in rules_for_key(key):
+            rule_hits[rule] += 1
+
+    # -------------------- 输出 --------------------
+    def bundle_detail(key):
+        parts = []
+        size = size_of(key)
+        if size:
+            parts.append(f"{size / 1024 / 1024:.1f} MB")
+        rules = rules_for_key(key)
+        if rules:
+            parts.append("规则: " + ", ".join(rules))
+        diff = object_diffs.get(key)
+        if diff:
+            if 'error' in diff:
+                parts.append(f"扫描失败: {diff['error']}")
+            else:
+                parts.append(f"对象 +{len(diff['added'])} ~{len(diff['changed'])} -{len(diff['removed'])}")
+        return "  ".join(parts)
+
+    print_keys("新增", plan['added'], args.limit, bundle_detail)
+    print_keys("内容变化", plan['changed'], args.limit, bundle_detail)
+    print_keys("删除", plan['removed'], args.limit, lambda key: ", ".join(rules_for_key(key)))
+    print(f"\n仅修改时间变化（内容相同，提取时会被缓存跳过）: {len(plan['touched'])} 个")
+    print(f"未变化: {plan['unchanged']} 个")
+
+    if object_diffs:
+        print("\n对象差异:")
+        shown = 0
+        for key, diff in object_diffs.items():
+            if 'error' in diff or not (diff['added'] or diff['changed'] or diff['removed']):
+                continue
+            print(f"  [BUNDLE] {key[len(W64_PREFIX):] if key.startswith(W64_PREFIX) else key}")
+            for mark, items in (('+', diff['added']), ('~', diff['changed']), ('-', diff['removed'])):
+                for type_name, name, width, height in items[:args.limit]:
+                    size = f" ({width}x{height})" if width and height else ""
+                    print(f"    {mark} {type_name}: {name or '(无名)'}{size}")
+            shown += 1
+            if shown >= args.limit:
+                break
+
+    if catalog_diff is not None:
+        print(f"\ncatalog.json: 新增引用 {len(catalog_diff['added'])} 个，移除引用 {len(catalog_diff['removed'])} 个，"
+              f"本地缺失 {len(catalog_diff['missing'])} 个")
+        for path in catalog_diff['added'][:args.limit]:
+            print(f"  + {path}")
+        for path in catalog_diff['removed'][:args.limit]:
+            print(f"  - {path}")
+    elif catalog_now is None:
+        print("\ncatalog.json: 未找到或格式无法识别，跳过")
+    else:
+        print("\ncatalog.json: 快照中没有记录（重新运行 bundle_index.py update 后可对比）")
+
+    print(f"\nSEARCH_CONFIG 规则命中（extract_all_events.py）:")
+    if rule_hits:
+        for rule, count in rule_hits.most_common():
+            print(f"  {rule}: {count} 个包")
+    else:
+        print("  无")
+
+    print(f"\n估计解码量: 读取 {len(to_extract)} 个包 / {read_bytes / 1024 / 1024:.1f} MB，"
+          f"纹理 {textures} 张 / {pixels / 1e6:.1f} MP"
+          + ("" if args.objects or not plan['added'] else "（新增包的纹理需 --objects 才能统计）"))
+    print(f"耗时: {time.time() - started:.1f}s")
+
+    if args.json_file:
+        report = {
+            'snapshot_at': summary['updated_at'],
+            'bundles': plan,
+            'objects': object_diffs,
+            'catalog': catalog_diff,
+            'rules': dict(rule_hits),
+            'estimate': {'bundles': len(to_extract), 'bytes': read_bytes, 'textures': textures, 'pixels': pixels},
+        }
+        with open(args.json_file, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"计划已保存: {os.path.abspath(args.json_file)}")
+
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
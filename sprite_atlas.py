@@ -0,0 +1,199 @@
+"""
+图集感知的Sprite提取
+*.spriteatlas.bundle 里几百个 Sprite 共用几张 sactx-N-2048x2048-BC7-... 图集页。
+直接对每个 Sprite 取 .image 时，UnityPy 会为每个 Sprite 重新解析图集页对象（旧版本还可能重新解码），
+提取图集页 Texture2D 本身时又会再解码一遍。
+这里每张图集页只解码一次并缓存：
+  - 矩形打包的 Sprite 按 textureRect 直接裁剪；
+  - 紧密打包（Tight，需要按网格重建轮廓）的 Sprite 把已解码的页放进 UnityPy 自己的缓存，
+    再交给 UnityPy 处理，不会重复解码。
+
+缓存按字节数设上限（LRU 淘汰），一个bundle用完即释放。
+"""
+from collections import OrderedDict
+
+from PIL import Image
+
+# 单个bundle图集页缓存的默认上限
+DEFAULT_ATLAS_CACHE_MB = 512
+# Unity 打包图集页的命名前缀
+ATLAS_PAGE_PREFIX = 'sactx-'
+
+# SpriteSettings 位域（与 Unity 一致）
+PACKING_MODE_TIGHT = 0
+ROTATION_NONE = 0
+ROTATION_FLIP_HORIZONTAL = 1
+ROTATION_FLIP_VERTICAL = 2
+ROTATION_180 = 3
+ROTATION_90 = 4
+
+
+def _pptr_ids(pptr):
+    """PPtr → (file_id, path_id)，兼容新旧版 UnityPy 的属性名"""
+    file_id = getattr(pptr, 'file_id', None)
+    if file_id is None:
+        file_id = getattr(pptr, 'm_FileID', 0)
+    path_id = getattr(pptr, 'path_id', None)
+    if path_id is None:
+        path_id = getattr(pptr, 'm_PathID', 0)
+    return file_id, path_id
+
+
+def _deref(pptr):
+    deref = getattr(pptr, 'deref_parse_as_object', None)
+    if deref is not None:
+        return deref()
+    return pptr.read()
+
+
+def _decode_unflipped(texture):
+    """解码纹理，保持 Unity 的左下角原点方向（与 UnityPy 的 Sprite 裁剪坐标一致）"""
+    try:
+        from UnityPy.export.Texture2DConverter import get_image_from_texture2d
+        return get_image_from_texture2d(texture, False)
+    except ImportError:
+        return texture.image.transpose(Image.FLIP_TOP_BOTTOM)
+
+
+def _settings(settings_raw):
+    """返回 (packed, packing_mode, packing_rotation)"""
+    if isinstance(settings_raw, int):
+        return bool(settings_raw & 1), (settings_raw >> 1) & 1, (settings_raw >> 2) & 0xF
+    packed = getattr(settings_raw, 'packed', 0)
+    mode = getattr(settings_raw, 'packingMode', PACKING_MODE_TIGHT)
+    rotation = getattr(settings_raw, 'packingRotation', ROTATION_NONE)
+    return bool(packed), int(getattr(mode, 'value', mode)), int(getattr(rotation, 'value', rotation))
+
+
+def _find_render_data(sprite):
+    """找到 Sprite 实际使用的渲染数据：有图集时取图集中的条目，否则用自身的 m_RD"""
+    atlas_ptr = getattr(sprite, 'm_SpriteAtlas', None)
+    if atlas_ptr is not None and _pptr_ids(atlas_ptr)[1]:
+        atlas = _deref(atlas_ptr)
+        key = getattr(sprite, 'm_RenderDataKey', None)
+        render_map = atlas.m_RenderDataMap
+        if isinstance(render_map, dict):
+            return render_map.get(key)
+        for map_key, data in render_map:
+            if map_key == key:
+                return data
+        return None
+    return sprite.m_RD
+
+
+class AtlasCropper:
+    """单个bundle内的图集页缓存 + Sprite 裁剪"""
+
+    def __init__(self, max_bytes=DEFAULT_ATLAS_CACHE_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.pages = OrderedDict()  # (所在文件, file_id, path_id) -> 已解码图集页（Unity 方向）
+        self.seeded = {}            # 同上键 -> (UnityPy缓存字典, 键)，淘汰时一并移除
+        self.total_bytes = 0
+        self.decoded_pages = 0
+        self.cropped_sprites = 0
+
+    @staticmethod
+    def _image_bytes(img):
+        return img.width * img.height * len(img.getbands())
+
+    def _evict(self, key):
+        img = self.pages.pop(key)
+        self.total_bytes -= self._image_bytes(img)
+        seeded = self.seeded.pop(key, None)
+        if seeded is not None:
+            cache, cache_key = seeded
+            if cache.get(cache_key) is img:
+                del cache[cache_key]
+
+    def _store(self, key, img):
+        size = self._image_bytes(img)
+        if size > self.max_bytes:
+            return
+        if key in self.pages:
+            self._evict(key)
+        self.pages[key] = img
+        self.total_bytes += size
+        while self.total_bytes > self.max_bytes and self.pages:
+            self._evict(next(iter(self.pages)))
+
+    def remember_texture(self, obj, name, img):
+        """提取图集页 Texture2D 时顺便登记已解码的图像（.image 为正常方向），后续 Sprite 直接复用"""
+        if not name or not name.startswith(ATLAS_PAGE_PREFIX):
+            return
+        self._store((id(obj.assets_file), 0, obj.path_id), img.transpose(Image.FLIP_TOP_BOTTOM))
+
+    def cached_texture(self, obj):
+        """Texture2D 本身要导出时，若该页已因 Sprite 解码过，直接翻转得到 .image，不再解码"""
+        key = (id(obj.assets_file), 0, obj.path_id)
+        page = self.pages.get(key)
+        if page is None:
+            return None
+        self.pages.move_to_end(key)
+        return page.transpose(Image.FLIP_TOP_BOTTOM)
+
+    def _page(self, texture_ptr):
+        file_id, path_id = _pptr_ids(texture_ptr)
+        key = (id(getattr(texture_ptr, 'assets_file', None)), file_id, path_id)
+        img = self.pages.get(key)
+        if img is not None:
+            self.pages.move_to_end(key)
+            return key, img
+        img = _decode_unflipped(_deref(texture_ptr))
+        self.decoded_pages += 1
+        self._store(key, img)
+        return key, img
+
+    def _seed_unitypy_cache(self, sprite, key, texture_ptr, page):
+        """把已解码的页放进 UnityPy 的 Sprite 图集缓存（按 path_id 索引，方向相同）"""
+        cache = getattr(getattr(sprite, 'assets_file', None), '_cache', None)
+        if not isinstance(cache, dict) or key not in self.pages:
+            return
+        cache_key = _pptr_ids(texture_ptr)[1]
+        cache[cache_key] = page
+        self.seeded[key] = (cache, cache_key)
+
+    def sprite_image(self, sprite):
+        """
+        返回裁剪好的 Sprite 图像；返回 None 时调用方改用 sprite.image
+        （紧密打包的 Sprite 返回 None，但已为 UnityPy 准备好图集页）
+        """
+        try:
+            render_data = _find_render_data(sprite)
+            if render_data is None:
+                return None
+            alpha_ptr = getattr(render_data, 'alphaTexture', None)
+            if alpha_ptr is not None and _pptr_ids(alpha_ptr)[1]:
+                return None
+
+            key, page = self._page(render_data.texture)
+            packed, packing_mode, rotation = _settings(render_data.settingsRaw)
+            if packing_mode == PACKING_MODE_TIGHT:
+                self._seed_unitypy_cache(sprite, key, render_data.texture, page)
+                return None
+
+            rect = render_data.textureRect
+            img = page.crop((
+                int(round(rect.x)),
+                int(round(rect.y)),
+                int(round(rect.x + rect.width)),
+                int(round(rect.y + rect.height)),
+            ))
+
+            if packed:
+                if rotation == ROTATION_FLIP_HORIZONTAL:
+                    img = img.transpose(Image.FLIP_LEFT_RIGHT)
+                elif rotation == ROTATION_FLIP_VERTICAL:
+                    img = img.transpose(Image.FLIP_TOP_BOTTOM)
+                elif rotation == ROTATION_180:
+                    img = img.transpose(Image.ROTATE_180)
+                elif rotation == ROTATION_90:
+                    img = img.transpose(Image.ROTATE_270)
+
+            self.cropped_sprites += 1
+            return img.transpose(Image.FLIP_TOP_BOTTOM)
+        except Exception:
+            return None
+
+    def clear(self):
+        for key in list(self.pages):
+            self._evict(key)
@@ -0,0 +1,217 @@
+"""
+网页资源导出
+把 MW解包有益资源 下的 PNG 转成网页用的 WebP / AVIF，并按 srcset 生成多个宽度，
+输出到 MW解包有益资源_web（目录结构与源目录一致），同步脚本再把它发到模拟器项目和 OSS。
+
+文件名: 原名@宽度w.格式（原尺寸为 原名.格式），例如 activity_gacha_x_widget@256w.webp
+srcset.json 记录每张源图的全部变体，前端据此生成 <picture>/srcset。
+
+按源文件内容哈希缓存（网页资源缓存.json）：源图和导出配置都没变时直接跳过。
+
+用法:
+    python web_export.py [--profile webp avif] [--workers N] [--force]
+"""
+import os
+import json
+import time
+import hashlib
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import cpu_count
+
+from PIL import Image, features
+
+from bundle_cache import BundleCache
+
+SOURCE_DIR = Path(__file__).parent / "MW解包有益资源"
+OUTPUT_DIR = Path(__file__).parent / "MW解包有益资源_web"
+WEB_CACHE_FILE = Path(__file__).parent / "网页资源缓存.json"
+SRCSET_FILE_NAME = "srcset.json"
+
+# 导出配置（质量参数与 GUI 缩略图一致）
+WEB_PROFILES = {
+    "webp": {"format": "WEBP", "ext": "webp", "options": {"quality": 90, "method": 4}},
+    "webp_lossless": {"format": "WEBP", "ext": "webp", "options": {"lossless": True, "quality": 100, "method": 4}},
+    "avif": {"format": "AVIF", "ext": "avif", "options": {"quality": 80}},
+}
+DEFAULT_PROFILES = ["webp", "avif"]
+# srcset 缩小宽度（只缩小不放大），原尺寸总会导出
+SRCSET_WIDTHS = (128, 256, 512)
+
+
+def profile_available(name):
+    fmt = WEB_PROFILES[name]["format"].lower()
+    return features.check(fmt) if fmt in ('webp', 'avif') else True
+
+
+def profile_signature(profiles, widths):
+    """导出配置签名: 配置变化后缓存自动失效"""
+    config = json.dumps([[name, WEB_PROFILES[name]] for name in profiles] + [list(widths)], sort_keys=True)
+    return hashlib.blake2b(config.encode(), digest_size=6).hexdigest()
+
+
+def variant_name(stem, width, ext, original_width):
+    if width >= original_width:
+        return f"{stem}.{ext}"
+    return f"{stem}@{width}w.{ext}"
+
+
+# ==================== 子进程: 导出单张图 ====================
+
+def export_image(source_path, output_dir, profiles, widths):
+    """
+    导出一张图的全部变体，返回 (source_path, [(格式名, 宽, 高, 输出路径), ...], 错误)
+    同一张图只解码一次，各宽度缩放后分别编码
+    """
+    outputs = []
+    try:
+        with Image.open(source_path) as img:
+            img.load()
+            if img.mode not in ('RGB', 'RGBA'):
+                img = img.convert('RGBA')
+        stem = Path(source_path).stem
+        os.makedirs(output_dir, exist_ok=True)
+
+        sizes = [img.width] + [w for w in sorted(widths, reverse=True) if w < img.width]
+        for width in sizes:
+            if width == img.width:
+                scaled = img
+            else:
+                scaled = img.resize((width, max(1, round(img.height * width / img.width))), Image.LANCZOS)
+            for name in profiles:
+                profile = WEB_PROFILES[name]
+                path = os.path.join(output_dir, variant_name(stem, width, profile["ext"], img.width))
+                if name == "webp_lossless" and "webp" in profiles:
+                    # 同时要有损和无损 WebP 时，无损版本加后缀区分
+                    path = path[:-len(".webp")] + ".lossless.webp"
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                scaled.save(tmp_path, profile["format"], **profile["options"])
+                os.replace(tmp_path, path)
+                outputs.append((name, scaled.width, scaled.height, path))
+        return source_path, outputs, None
+    except Exception as e:
+        return source_path, outputs, str(e)
+
+
+# ==================== srcset 清单 ====================
+
+def srcset_entry(output_root, outputs):
+    """一张源图的变体: {格式名: [{w, h, src}, ...]}，src 相对输出目录，按宽度升序"""
+    variants = {}
+    for name, width, height, path in outputs:
+        rel = os.path.relpath(path, output_root).replace('\\', '/')
+        variants.setdefault(name, []).append({'w': width, 'h': height, 'src': rel})
+    for items in variants.values():
+        items.sort(key=lambda item: item['w'])
+    return variants
+
+
+def load_srcset(output_root):
+    try:
+        with open(Path(output_root) / SRCSET_FILE_NAME, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_srcset(output_root, entries):
+    """srcset.json: {源图相对路径: {格式名: [{w, h, src}, ...]}}"""
+    tmp_path = Path(output_root) / f"{SRCSET_FILE_NAME}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(dict(sorted(entries.items())), f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, Path(output_root) / SRCSET_FILE_NAME)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="导出网页用 WebP/AVIF 资源（含 srcset 多尺寸）")
+    parser.add_argument('--profile', nargs='+', choices=sorted(WEB_PROFILES), default=DEFAULT_PROFILES,
+                        help=f'导出格式（默认 {" ".join(DEFAULT_PROFILES)}）')
+    parser.add_argument('--widths', type=int, nargs='*', default=list(SRCSET_WIDTHS),
+                        help=f'srcset 缩小宽度（默认 {" ".join(map(str, SRCSET_WIDTHS))}），不传值表示只导出原尺寸')
+    parser.add_argument('--workers', type=int, default=None, help='并行进程数（默认CPU核心数）')
+    parser.add_argument('--force', action='store_true', help='忽略缓存，全部重新导出')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("网页资源导出 (WebP / AVIF)")
+    print("=" * 70)
+
+    profiles = []
+    for name in args.profile:
+        if profile_available(name):
+            profiles.append(name)
+        else:
+            print(f"✗ 当前 Pillow 不支持 {WEB_PROFILES[name]['format']}，跳过 {name}（AVIF 需要 Pillow 11.2+ 或 pillow-avif-plugin）")
+    if not profiles:
+        return
+
+    if not SOURCE_DIR.exists():
+        print(f"ERROR: 找不到源目录: {SOURCE_DIR}")
+        return
+
+    started = time.time()
+    rule = f"web_export:{profile_signature(profiles, args.widths)}"
+    cache = BundleCache(WEB_CACHE_FILE)
+    sources = sorted(p for p in SOURCE_DIR.rglob("*.png") if p.is_file())
+    previous = load_srcset(OUTPUT_DIR)
+
+    entries = {}  # 源图相对路径 -> srcset 条目（未变化的沿用上次的清单）
+    todo = []
+    for source in sources:
+        source_rel = source.relative_to(SOURCE_DIR).as_posix()
+        stamp = None
+        if not args.force:
+            fresh, stamp = cache.check(rule, source)
+            if fresh and source_rel in previous:
+                entries[source_rel] = previous[source_rel]
+                continue
+        todo.append((source, source_rel, stamp))
+
+    print(f"格式: {', '.join(profiles)}，宽度: {', '.join(map(str, sorted(args.widths))) or '仅原尺寸'}")
+    print(f"源图: {len(sources)} 张（未变化跳过 {len(sources) - len(todo)}，需要导出 {len(todo)}）\n")
+
+    exported = failed = 0
+    source_bytes = output_bytes = 0
+    if todo:
+        workers = max(1, min(args.workers or cpu_count(), len(todo)))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(export_image, str(source), str(OUTPUT_DIR / Path(source_rel).parent),
+                                profiles, args.widths): (source, source_rel, stamp)
+                for source, source_rel, stamp in todo
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                source, source_rel, stamp = futures[future]
+                _, outputs, error = future.result()
+                if error:
+                    failed += 1
+                    print(f"  ✗ {source_rel} - {error}")
+                    continue
+                exported += 1
+                entries[source_rel] = srcset_entry(OUTPUT_DIR, outputs)
+                cache.record(rule, source, [(None, name, path) for name, _, _, path in outputs], stamp)
+                # 体积对比只算原尺寸变体
+                full_width = max(width for _, width, _, _ in outputs)
+                source_bytes += source.stat().st_size
+                output_bytes += sum(os.path.getsize(path) for _, width, _, path in outputs if width == full_width)
+                if done % 200 == 0:
+                    print(f"  已导出 {done}/{len(todo)} 张...")
+    cache.save()
+
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    write_srcset(OUTPUT_DIR, entries)
+
+    print(f"\n{'=' * 70}")
+    print(f"导出完成! 新导出 {exported} 张，失败 {failed} 张，耗时 {time.time() - started:.1f}s")
+    if source_bytes:
+        per_format = output_bytes / len(profiles)
+        print(f"  原尺寸体积: PNG {source_bytes / 1024 / 1024:.1f} MB → 每种格式平均 {per_format / 1024 / 1024:.1f} MB"
+              f"（{per_format / source_bytes:.0%}）")
+    print(f"输出目录: {OUTPUT_DIR}")
+    print(f"srcset清单: {OUTPUT_DIR / SRCSET_FILE_NAME}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,9 +4,14 @@
 """
 import UnityPy
 import os
+import sys
 from pathlib import Path
 import re
 
+# 资源包索引在上级工具目录
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from bundle_index import BundleIndex, GAME_ROOT
+
 def search_flagship_container():
     """搜索Flagship Container相关的所有资源"""
 
@@ -64,7 +69,6 @@ def search_flagship_container():
     print("=" * 70)
     print("[步骤2] 深度扫描bundle内容")
     print("=" * 70)
-    print("提示: 这将扫描所有bundle文件，可能需要几分钟...\n")
 
     bundle_count = 0
     animation_types = [
@@ -76,95 +80,115 @@ def search_flagship_container():
         'RuntimeAnimatorController'
     ]
 
-    for root, dirs, files in os.walk(game_data_path):
-        for file in files:
-            if file.endswith('.bundle'):
-                bundle_count += 1
-                full_path = os.path.join(root, file)
-                relative_path = os.path.relpath(full_path, game_data_path)
-
-                # 每100个bundle显示进度
-                if bundle_count % 100 == 0:
-                    print(f"  已扫描 {bundle_count} 个bundle...")
-
+    # 有资源包索引时只扫描可能匹配的bundle：对象名/包名命中关键词的，以及含动画对象的
+    # （动画还要看所属 GameObject 的名称，索引里没有，需要打开确认）
+    index = BundleIndex.open_existing()
+    if index is not None:
+        candidates = set()
+        for keyword in keywords:
+            candidates.update(index.find_bundles([keyword]))
+        candidates.update(index.find_bundles([], types=animation_types))
+        index.close()
+        bundle_files = sorted(
+            str(GAME_ROOT / key) for key in candidates
+            if key.endswith('.bundle') and (GAME_ROOT / key).exists()
+        )
+        print(f"提示: 使用资源包索引，只需扫描 {len(bundle_files)} 个候选bundle\n")
+    else:
+        print("提示: 这将扫描所有bundle文件，可能需要几分钟...")
+        print("      （先运行 bundle_index.py update 建立索引可大幅加速）\n")
+        bundle_files = [
+            os.path.join(root, file)
+            for root, dirs, files in os.walk(game_data_path)
+            for file in files if file.endswith('.bundle')
+        ]
+
+    for full_path in bundle_files:
+        bundle_count += 1
+        relative_path = os.path.relpath(full_path, game_data_path)
+
+        # 每100个bundle显示进度
+        if bundle_count % 100 == 0:
+            print(f"  已扫描 {bundle_count} 个bundle...")
+
+        try:
+            env = UnityPy.load(full_path)
+            bundle_matches = []
+
+            for obj in env.objects:
                 try:
-                    env = UnityPy.load(full_path)
-                    bundle_matches = []
-
-                    for obj in env.objects:
-                        try:
-                            obj_type = obj.type.name
-
-                            # 检查是否是动画相关类型
-                            is_animation = obj_type in animation_types
-
-                            # 读取对象数据
-                            data = obj.read()
-
-                            # 获取对象名称
-                            name = getattr(data, 'name', None) or getattr(data, 'm_Name', None)
-
-                            if name:
-                                name_lower = name.lower()
-
-                                # 检查名称是否包含关键词
-                                for keyword in keywords:
-                                    if keyword in name_lower:
-                                        match_info = {
-                                            'type': obj_type,
-                                            'name': name,
-                                            'is_animation': is_animation
-                                        }
-
-                                        if match_info not in bundle_matches:
-                                            bundle_matches.append(match_info)
-                                        break
-
-                            # 特别关注：所有动画资源（即使名称不匹配）
-                            elif is_animation:
-                                # 尝试获取更多信息
-                                if hasattr(data, 'm_GameObject'):
-                                    try:
-                                        go = data.m_GameObject.read()
-                                        go_name = getattr(go, 'name', None) or getattr(go, 'm_Name', None)
-                                        if go_name:
-                                            go_lower = go_name.lower()
-                                            for keyword in keywords:
-                                                if keyword in go_lower:
-                                                    match_info = {
-                                                        'type': obj_type,
-                                                        'name': f"[GameObject] {go_name}",
-                                                        'is_animation': True
-                                                    }
-                                                    if match_info not in bundle_matches:
-                                                        bundle_matches.append(match_info)
-                                                    break
-                                    except:
-                                        pass
-
-                        except:
-                            continue
-
-                    if bundle_matches:
-                        results['bundles'][relative_path] = bundle_matches
-
-                        print(f"\n  [BUNDLE] {relative_path}")
-                        for match in bundle_matches:
-                            icon = "[ANIM]" if match['is_animation'] else "[ASSET]"
-                            print(f"     {icon} {match['type']}: {match['name']}")
-
-                        # 如果有动画，单独记录
-                        for match in bundle_matches:
-                            if match['is_animation']:
-                                results['animations'].append({
-                                    'bundle': relative_path,
-                                    'type': match['type'],
-                                    'name': match['name']
-                                })
-
-                except Exception as e:
+                    obj_type = obj.type.name
+
+                    # 检查是否是动画相关类型
+                    is_animation = obj_type in animation_types
+
+                    # 读取对象数据
+                    data = obj.read()
+
+                    # 获取对象名称
+                    name = getattr(data, 'name', None) or getattr(data, 'm_Name', None)
+
+                    if name:
+                        name_lower = name.lower()
+
+                        # 检查名称是否包含关键词
+                        for keyword in keywords:
+                            if keyword in name_lower:
+                                match_info = {
+                                    'type': obj_type,
+                                    'name': name,
+                                    'is_animation': is_animation
+                                }
+
+                                if match_info not in bundle_matches:
+                                    bundle_matches.append(match_info)
+                                break
+
+                    # 特别关注：所有动画资源（即使名称不匹配）
+                    elif is_animation:
+                        # 尝试获取更多信息
+                        if hasattr(data, 'm_GameObject'):
+                            try:
+                                go = data.m_GameObject.read()
+                                go_name = getattr(go, 'name', None) or getattr(go, 'm_Name', None)
+                                if go_name:
+                                    go_lower = go_name.lower()
+                                    for keyword in keywords:
+                                        if keyword in go_lower:
+                                            match_info = {
+                                                'type': obj_type,
+                                                'name': f"[GameObject] {go_name}",
+                                                'is_animation': True
+                                            }
+                                            if match_info not in bundle_matches:
+                                                bundle_matches.append(match_info)
+                                            break
+                            except:
+                                pass
+
+                except:
                     continue
 
+            if bundle_matches:
+                results['bundles'][relative_path] = bundle_matches
+
+                print(f"\n  [BUNDLE] {relative_path}")
+                for match in bundle_matches:
+                    icon = "[ANIM]" if match['is_animation'] else "[ASSET]"
+                    print(f"     {icon} {match['type']}: {match['name']}")
+
+                # 如果有动画，单独记录
+                for match in bundle_matches:
+                    if match['is_animation']:
+                        results['animations'].append({
+                            'bundle': relative_path,
+                            'type': match['type'],
+                            'name': match['name']
+                        })
+
+        except Exception as e:
+            continue
+
     print(f"\n  总共扫描了 {bundle_count} 个bundle文件")
 
     # ============ 3. 汇总结果 ============
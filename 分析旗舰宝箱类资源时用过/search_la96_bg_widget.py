@@ -2,51 +2,76 @@
 检索 la96 活动的 background 和 widget 相关 bundle 文件
 """
 import re
+import sys
 from pathlib import Path
 
+# 资源包索引在上级工具目录
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from bundle_index import BundleIndex
+
+# 索引中的路径相对游戏根目录，输出时去掉 w64 前缀
+W64_PREFIX = "Modern Warships_Data/StreamingAssets/aa/w64/"
+
 # 输入文件
 INPUT_FILE = Path(__file__).parent / "分析旗舰宝箱类资源时用过/flagship_container_搜索结果.txt"
 OUTPUT_FILE = Path(__file__).parent / "la96_background_widget_检索.txt"
 
+def search_index(index, keywords):
+    """从资源包索引查询：包路径或包内对象名同时包含所有关键词的bundle"""
+    bundles = []
+    for key in index.find_bundles(keywords):
+        if key.endswith('.bundle'):
+            bundles.append(key[len(W64_PREFIX):] if key.startswith(W64_PREFIX) else key)
+    return bundles
+
+def search_dump(content, keywords):
+    """从搜索结果文本中逐行检索（没有索引时使用）"""
+    bundles = []
+    for line in content.split('\n'):
+        line_lower = line.lower()
+        if all(k in line_lower for k in keywords) and '.bundle' in line:
+            match = re.search(r'contentseparated[^\s]+\.bundle', line)
+            if match:
+                bundle_path = match.group(0).replace('\\', '/')
+                if bundle_path not in bundles:
+                    bundles.append(bundle_path)
+    return bundles
+
 def main():
     print("=" * 70)
     print("检索 la96 的 background 和 widget bundle")
     print("=" * 70)
 
-    if not INPUT_FILE.exists():
-        print(f"\n错误: 找不到输入文件")
-        print(f"路径: {INPUT_FILE}")
-        return
+    index = BundleIndex.open_existing()
+    if index is not None:
+        print(f"\n使用资源包索引查询")
+        print(f"输出文件: {OUTPUT_FILE}\n")
+        search = lambda keywords: search_index(index, keywords)
+    else:
+        if not INPUT_FILE.exists():
+            print(f"\n错误: 找不到资源包索引，也找不到输入文件")
+            print(f"路径: {INPUT_FILE}")
+            return
 
-    print(f"\n输入文件: {INPUT_FILE}")
-    print(f"输出文件: {OUTPUT_FILE}\n")
+        print(f"\n输入文件: {INPUT_FILE}")
+        print(f"输出文件: {OUTPUT_FILE}\n")
 
-    # 读取文件
-    print("正在读取文件...")
-    with open(INPUT_FILE, 'r', encoding='utf-8') as f:
-        content = f.read()
+        # 读取文件
+        print("正在读取文件...")
+        with open(INPUT_FILE, 'r', encoding='utf-8') as f:
+            content = f.read()
+        search = lambda keywords: search_dump(content, keywords)
 
     # 检索 la96 + background
     print("检索: la96 + background")
-    la96_background = []
-    for line in content.split('\n'):
-        if 'la96' in line.lower() and 'background' in line.lower() and '.bundle' in line:
-            match = re.search(r'contentseparated[^\s]+\.bundle', line)
-            if match:
-                bundle_path = match.group(0).replace('\\', '/')
-                if bundle_path not in la96_background:
-                    la96_background.append(bundle_path)
+    la96_background = search(['la96', 'background'])
 
     # 检索 la96 + widget
     print("检索: la96 + widget")
-    la96_widget = []
-    for line in content.split('\n'):
-        if 'la96' in line.lower() and 'widget' in line.lower() and '.bundle' in line:
-            match = re.search(r'contentseparated[^\s]+\.bundle', line)
-            if match:
-                bundle_path = match.group(0).replace('\\', '/')
-                if bundle_path not in la96_widget:
-                    la96_widget.append(bundle_path)
+    la96_widget = search(['la96', 'widget'])
+
+    if index is not None:
+        index.close()
 
     # 写入结果
     print(f"\n找到 {len(la96_background)} 个 background 文件")
@@ -11,6 +11,8 @@ import hashlib
 from pathlib import Path
 from datetime import datetime
 
+from dedup_textures import load_alias_map, load_hash_cache, alias_still_valid
+
 # ========== 配置区域 ==========
 # 本地路径配置
 SYNC_RULES = [
@@ -21,7 +23,18 @@ SYNC_RULES = [
             r"D:\my_pro\web_ob\现代战舰抽奖模拟器\public\assets"
         ],
         "oss_path": "mw-gacha-simulation/assets/",
-        "exclude_patterns": ["*.py", "*.pyc", "__pycache__"]
+        "exclude_patterns": ["*.py", "*.pyc", "__pycache__", "_index.json"]
+    },
+    {
+        # web_export.py 导出的 WebP/AVIF（含 srcset 多尺寸），与 PNG 并存于同一目录；
+        # 只发布网页格式时给上一条规则的 exclude_patterns 加 "*.png"
+        "name": "网页资源",
+        "source": "MW解包有益资源_web",
+        "targets": [
+            r"D:\my_pro\web_ob\现代战舰抽奖模拟器\public\assets"
+        ],
+        "oss_path": "mw-gacha-simulation/assets/",
+        "exclude_patterns": []
     },
     {
         "name": "抽奖配置",
@@ -120,15 +133,22 @@ def sync_to_local(source_root, target_root, exclude_patterns):
     return copied_count, skipped_count
 
 
-def sync_to_oss(source_root, oss_prefix, exclude_patterns, oss_client, bucket):
-    """同步文件到阿里云OSS（增量）"""
+def sync_to_oss(source_root, oss_prefix, exclude_patterns, oss_client, bucket, alias_map=None, hash_cache=None):
+    """
+    同步文件到阿里云OSS（增量）
+    alias_map: 去重映射 {别名绝对路径: (规范文件绝对路径, 像素哈希)}，规范文件也在本目录下、
+    且映射仍然成立（未被重新提取成不同内容）时，别名上传为指向它的 OSS 软链接，不再重复上传相同内容
+    hash_cache: 去重工具的像素哈希缓存，确认映射时未变化的图不必重新解码
+    """
     source_path = Path(source_root)
+    alias_map = alias_map or {}
 
     if not source_path.exists():
         print(f"  ✗ 源目录不存在: {source_path}")
-        return 0, 0
+        return 0, 0, 0
 
     uploaded_count = 0
+    linked_count = 0
     skipped_count = 0
 
     # 遍历源目录
@@ -144,20 +164,52 @@ def sync_to_oss(source_root, oss_prefix, exclude_patterns, oss_client, bucket):
         rel_path = src_file.relative_to(source_path)
         oss_key = oss_prefix + str(rel_path).replace("\\", "/")
 
+        # 去重别名: 应指向的规范文件 key（指向自身的软链接会把真实文件替换掉，不允许）
+        target_key = None
+        mapping = alias_map.get(os.path.normcase(os.path.abspath(src_file)))
+        if mapping:
+            canonical, pixel_hash = mapping
+            target_rel = os.path.relpath(canonical, os.path.abspath(source_path))
+            if not target_rel.startswith('..'):
+                target_key = oss_prefix + target_rel.replace("\\", "/")
+                if target_key == oss_key or not alias_still_valid(str(src_file), canonical, pixel_hash, hash_cache):
+                    target_key = None
+
+        # OSS上的软链接: HEAD 返回的是目标对象的大小，不能按大小比较，改为比较链接目标
+        remote_link = None
+        if mapping:
+            try:
+                remote_link = bucket.get_symlink(oss_key).target_key
+            except Exception:
+                remote_link = None
+
+        if target_key:
+            if remote_link == target_key:
+                skipped_count += 1
+            else:
+                bucket.put_symlink(target_key, oss_key)
+                linked_count += 1
+                print(f"    ↪ {rel_path} → {target_key}（软链接）")
+            continue
+
         # 检查OSS上是否存在
         need_upload = False
-        try:
-            # 获取OSS对象信息
-            meta = bucket.get_object_meta(oss_key)
-            remote_size = int(meta.headers.get('Content-Length', 0))
-            local_size = src_file.stat().st_size
-
-            # 比较大小
-            if local_size != remote_size:
-                need_upload = True
-        except:
-            # OSS上不存在
+        if remote_link is not None:
+            # 映射已失效，原来的软链接要换成实际内容
             need_upload = True
+        else:
+            try:
+                # 获取OSS对象信息
+                meta = bucket.get_object_meta(oss_key)
+                remote_size = int(meta.headers.get('Content-Length', 0))
+                local_size = src_file.stat().st_size
+
+                # 比较大小
+                if local_size != remote_size:
+                    need_upload = True
+            except:
+                # OSS上不存在
+                need_upload = True
 
         if need_upload:
             bucket.put_object_from_file(oss_key, str(src_file))
@@ -166,7 +218,7 @@ def sync_to_oss(source_root, oss_prefix, exclude_patterns, oss_client, bucket):
         else:
             skipped_count += 1
 
-    return uploaded_count, skipped_count
+    return uploaded_count, linked_count, skipped_count
 
 
 def main():
@@ -196,6 +248,12 @@ def main():
             print(f"✗ OSS 连接失败: {e}\n")
             OSS_CONFIG["enabled"] = False
 
+    # 去重映射（dedup_textures.py 生成），重复的图在 OSS 上只存一份
+    alias_map = load_alias_map() if OSS_CONFIG["enabled"] else {}
+    hash_cache = load_hash_cache() if alias_map else {}
+    if alias_map:
+        print(f"✓ 读取去重映射: {len(alias_map)} 个别名\n")
+
     # 执行同步
     for rule in SYNC_RULES:
         print("=" * 70)
@@ -222,14 +280,16 @@ def main():
         # 同步到OSS
         if OSS_CONFIG["enabled"] and bucket:
             print(f"\nOSS: {rule['oss_path']}")
-            uploaded, skipped = sync_to_oss(
+            uploaded, linked, skipped = sync_to_oss(
                 source,
                 rule["oss_path"],
                 rule["exclude_patterns"],
                 oss_client,
-                bucket
+                bucket,
+                alias_map,
+                hash_cache
             )
-            print(f"  结果: 上传 {uploaded} 个文件，跳过 {skipped} 个")
+            print(f"  结果: 上传 {uploaded} 个文件，软链接 {linked} 个，跳过 {skipped} 个")
 
         print()
 
@@ -2,10 +2,11 @@
 探索UI背景图
 提取所有可能是UI背景的大型PNG texture文件
 """
-import UnityPy
 import os
 from pathlib import Path
 
+from extract_engine import ExtractSpec, ExtractJob, run_jobs, parse_engine_args, glob_bundles
+
 # 配置
 GAME_DATA_PATH = r"Modern Warships_Data\StreamingAssets\aa\w64"
 OUTPUT_PATH = r"MW资源\ui_backgrounds_探索"
@@ -23,6 +24,9 @@ INCLUDE_KEYWORDS = [
     'gacha', 'window', 'popup', 'menu'
 ]
 
+# 只提取较大的图片（可能是背景）
+MIN_BACKGROUND_SIZE = 512
+
 def should_process(file_name):
     """判断文件是否应该被处理"""
     file_lower = file_name.lower()
@@ -39,34 +43,26 @@ def should_process(file_name):
 
     return False
 
-def extract_texture(bundle_path, output_dir):
-    """提取bundle中的纹理"""
-    try:
-        env = UnityPy.load(bundle_path)
-        extracted = []
-
-        for obj in env.objects:
-            if obj.type.name == "Texture2D":
-                data = obj.read()
-                if hasattr(data, 'image'):
-                    img = data.image
-                    width, height = img.size
-
-                    # 只提取较大的图片（可能是背景）
-                    if width >= 512 or height >= 512:
-                        name = getattr(data, 'name', None) or getattr(data, 'm_Name', None)
-                        if not name:
-                            name = Path(bundle_path).stem
-
-                        img_path = os.path.join(output_dir, f"{name}_{width}x{height}.png")
-                        img.save(img_path)
-                        extracted.append((name, width, height))
-
-        return extracted
-    except Exception as e:
-        return []
+def is_large_texture(width, height, job):
+    return width >= MIN_BACKGROUND_SIZE or height >= MIN_BACKGROUND_SIZE
+
+def texture_file_name(name, img, path_id, job):
+    width, height = img.size
+    if not name:
+        name = Path(job.bundle_path).stem
+    return f"{name}_{width}x{height}.png"
+
+# 提取规则
+UI_BACKGROUND_SPEC = ExtractSpec(
+    "探索UI背景图",
+    types=("Texture2D",),
+    size_filter=is_large_texture,
+    output_name=texture_file_name,
+)
 
 def main():
+    options = parse_engine_args("探索UI背景图")
+
     print("=" * 70)
     print("探索UI背景图")
     print("=" * 70)
@@ -85,31 +81,18 @@ def main():
 
     # 搜索所有可能的bundle文件
     print("正在扫描文件...")
-    all_bundles = list(game_path.rglob("*.bundle"))
-
-    candidates = []
-    for bundle in all_bundles:
-        if should_process(bundle.name):
-            candidates.append(bundle)
+    all_bundles = glob_bundles(game_path, "*.bundle", recursive=True)
+    candidates = [bundle for bundle in all_bundles if should_process(bundle.name)]
 
     print(f"找到 {len(candidates)} 个候选文件\n")
 
     # 提取
-    total_extracted = 0
-    for i, bundle_path in enumerate(candidates, 1):
-        print(f"[{i}/{len(candidates)}] {bundle_path.name}")
-        extracted = extract_texture(str(bundle_path), str(output_dir))
-
-        if extracted:
-            for name, w, h in extracted:
-                print(f"  ✓ {name} ({w}x{h})")
-                total_extracted += 1
-        else:
-            print(f"  - 无大型纹理")
+    jobs = [ExtractJob(bundle, output_dir, UI_BACKGROUND_SPEC) for bundle in candidates]
+    stats = run_jobs(jobs, show_outputs=True, **options)
 
     print("\n" + "=" * 70)
     print(f"提取完成!")
-    print(f"共提取 {total_extracted} 张图片")
+    stats.print_summary()
     print(f"保存位置: {output_dir}")
     print("=" * 70)
     print("\n提示: 打开输出目录，逐个查看图片，找到宝箱界面背景")
@@ -1,10 +1,12 @@
-﻿import UnityPy
+﻿import gc
 import os
 from pathlib import Path
 import json
 import re
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+from memory_budget import MemoryBudget, estimate_working_set, load_environment, budget_from_gb, format_bytes
+
 # 主资源文件路径
 GAME_DATA_PATH = r"Modern Warships_Data"
 OUTPUT_PATH = r"MW资源\\探索文本数据"
@@ -15,14 +17,31 @@ TEXT_KEYWORDS = ["ship_", "weapon_", "localiz", "lang", "desc"]
 # 并行线程数
 MAX_WORKERS = 10
 
+# 同时加载的文件估算内存上限（GB），None 为物理内存的 60%，0 不限制
+# resources.assets 等大文件整包加载可达数GB，超出预算时线程会等待前面的文件处理完
+MEMORY_BUDGET_GB = None
+
+memory_budget = MemoryBudget(budget_from_gb(MEMORY_BUDGET_GB))
+
 
 def extract_text_from_file(file_path, output_dir):
     """从资源文件中提取 TextAsset 与 MonoBehaviour"""
     file_name = os.path.basename(file_path)
+    estimate = estimate_working_set(file_path)
+    memory_budget.reserve(estimate)
     print(f"\n[SCAN] {file_name}")
 
     try:
-        env = UnityPy.load(str(file_path))
+        return _extract_text(file_path, file_name, output_dir)
+    finally:
+        # 环境内部有循环引用，主动回收后再释放预算
+        gc.collect()
+        memory_budget.release(estimate)
+
+
+def _extract_text(file_path, file_name, output_dir):
+    try:
+        env = load_environment(file_path)
         text_count = 0
         mono_count = 0
 
@@ -100,6 +119,8 @@ def main():
     os.makedirs(output_dir, exist_ok=True)
     print(f"\n关键词: {', '.join(TEXT_KEYWORDS)}")
     print(f"并行线程数: {MAX_WORKERS}")
+    if memory_budget.limit:
+        print(f"内存预算: {format_bytes(memory_budget.limit)}")
 
     # 搜索目标文件
     files_to_scan = []